@@ -1,6 +1,9 @@
+import os
+
 import pygame
 import player
 import obstacle
+from shared import FixedStepClock, Leaderboard, get_leaderboard_path
 
 
 if __name__ == "__main__":
@@ -10,7 +13,8 @@ if __name__ == "__main__":
 
     HEIGHT = 1440
     WIDTH = 2560
-    FPS = 60
+    FPS = 60  # logic steps per second, nothing is rendered faster than that
+    MAX_CATCH_UP_STEPS = 5  # most logic steps run in one frame after a slow frame
 
     MONITOR_SIZE = pygame.display.Info()
     WINDOW = pygame.display.set_mode((MONITOR_SIZE.current_w // 2, MONITOR_SIZE.current_h // 2), pygame.RESIZABLE)
@@ -26,14 +30,23 @@ if __name__ == "__main__":
     cleared_obstacles = []
     obstacle_timer = OBSTACLE_INTERVAL
     score = 0
+    leaderboard = Leaderboard(get_leaderboard_path(os.path.dirname(__file__)))
     font = pygame.font.SysFont('Impact.ttf', 120)
+    small_font = pygame.font.SysFont('Impact.ttf', 60)
+    best_text = small_font.render(f"BEST {leaderboard.get_high_score()}", True, (200, 155, 80))
     fullscreen = False
 
     score_text = font.render("0", True, (0, 0, 0))
     text_rect = score_text.get_rect()
     text_rect.center = (WIDTH // 2, HEIGHT // 8)
 
+    # logic advances in steps of 1 / FPS seconds however fast frames are rendered (same clock as tetris)
+    clock = FixedStepClock(FPS, MAX_CATCH_UP_STEPS)
+    clock.reset()  # time the first frame from here rather than from whenever the clock was made
+
     while running:
+        steps = clock.tick()
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
@@ -51,40 +64,51 @@ if __name__ == "__main__":
                                                          pygame.FULLSCREEN)
                     fullscreen = not fullscreen
 
+        # Update objects, once per logic step
+        for _ in range(steps):
+            player.tick()
+
+            clone = obstacles.copy()
+            for element in obstacles:
+                if element.get_dimensions()[0][0] < -100:
+                    clone.remove(element)
+                result = element.tick((player.get_x(), player.get_y()))
+                if result == 1:
+                    clone.remove(element)
+                    if score > 0 and leaderboard.add(score) == 0:
+                        best_text = small_font.render(f"BEST {score}", True, (200, 155, 80))
+                    score = 0
+                elif result == 2:
+                    score += 1
+            obstacles = clone
+
+            if obstacle_timer > 0:
+                obstacle_timer -= 1
+            else:
+                obstacles.append(obstacle.Obstacle())
+                obstacle_timer = OBSTACLE_INTERVAL
+        clock.logic_done()
+
+        # Draw objects
         SCREEN.fill((255, 238, 179))
-
-        # Draw and update objects
         pygame.draw.rect(SCREEN, (184, 231, 225), pygame.Rect(player.get_x(), player.get_y(), 80, 80))
-        player.tick()
-
-        clone = obstacles.copy()
         for element in obstacles:
             dimensions = element.get_dimensions()
-            if dimensions[0][0] < -100:
-                clone.remove(element)
             pygame.draw.rect(SCREEN, (158, 111, 33), pygame.Rect(dimensions[0]))
             pygame.draw.rect(SCREEN, (158, 111, 33), pygame.Rect(dimensions[1]))
-            result = element.tick((player.get_x(), player.get_y()))
-            if result == 1:
-                clone.remove(element)
-                score = 0
-            elif result == 2:
-                score += 1
-        obstacles = clone
-
-        if obstacle_timer > 0:
-            obstacle_timer -= 1
-        else:
-            obstacles.append(obstacle.Obstacle())
-            obstacle_timer = OBSTACLE_INTERVAL
 
         # Show score
         score_text = font.render(str(score), True, (200, 155, 80))
         SCREEN.blit(score_text, text_rect)
+        SCREEN.blit(best_text, (text_rect.left, text_rect.bottom))
 
         # Update the display
         WINDOW.blit(pygame.transform.scale(SCREEN, WINDOW.get_rect().size), (0, 0))
         pygame.display.flip()
-        pygame.time.Clock().tick(FPS)
+        clock.render_done()
+        clock.wait()
 
+    if score > 0:
+        leaderboard.add(score)
+    leaderboard.close()
     pygame.quit()
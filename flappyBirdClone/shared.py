@@ -0,0 +1,29 @@
+import importlib.util
+import os
+import sys
+
+# code this game shares with the rest of the collection. The games run as scripts from their own folders, so rather
+# than putting other folders on sys.path (where their modules could shadow this game's), the shared files are loaded
+# here by path
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load(name, *path):
+    """
+    :param name: (str) module name, kept in sys.modules so the module is only loaded once
+    :param path: (str) parts of the file's path from the collection folder
+    :return: (module)
+    """
+    module = sys.modules.get(name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(_ROOT, *path))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+FixedStepClock = _load("timing", "tetrisClone", "files", "timing.py").FixedStepClock
+_leaderboard = _load("leaderboard", "leaderboard.py")
+Leaderboard = _leaderboard.Leaderboard
+get_leaderboard_path = _leaderboard.get_leaderboard_path
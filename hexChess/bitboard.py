@@ -0,0 +1,223 @@
+from geometry import CELL_COUNT, CELLS, ORTHOGONALS, DIAGONALS, KNIGHT_MOVES, KING_MOVES, PAWN_FORWARD, \
+    PAWN_CAPTURE_STEPS, PAWN_CAPTURES, PAWN_STARTS, WHITE, BLACK, get_ray, step
+from pieces import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+
+# positions as python ints used as 91 bit bitboards: bit n is cell n (see geometry for the numbering)
+FULL = (1 << CELL_COUNT) - 1
+
+
+def to_mask(cells):
+    """
+    :param cells: (iterable) of cell numbers
+    :return: (int) bitboard with those cells set
+    """
+    mask = 0
+    for cell in cells:
+        mask |= 1 << cell
+    return mask
+
+
+def iter_cells(mask):
+    """
+    yields the cell numbers set in a bitboard, lowest first
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def to_positions(mask):
+    """
+    :return: (set) of coordinates (tuple) of the cells set in a bitboard
+    """
+    return {CELLS[cell] for cell in iter_cells(mask)}
+
+
+def _build_slides(directions):
+    """
+    for each direction, whether it goes towards higher cell numbers and the ray mask from every cell. Cell numbers
+    only go up along a ray that goes up a column or towards the right (and only down otherwise), so the first piece
+    in the way is the lowest set bit of the blockers on an ascending ray and the highest on a descending one
+    """
+    return tuple((dq > 0 or dq == 0 and dv > 0, tuple(to_mask(get_ray(cell, (dq, dv))) for cell in range(CELL_COUNT)))
+                 for dq, dv in directions)
+
+
+ORTHOGONAL_SLIDES = _build_slides(ORTHOGONALS)
+DIAGONAL_SLIDES = _build_slides(DIAGONALS)
+KNIGHT_MASKS = tuple(map(to_mask, KNIGHT_MOVES))
+KING_MASKS = tuple(map(to_mask, KING_MOVES))
+
+
+def _build_shifts(direction):
+    """
+    a step in one direction changes the cell number by a different amount depending on the column, but there are only
+    a few different amounts. Groups the cells by that amount, so moving a whole bitboard one step is one shift per group
+    :return: (tuple) of (shift, mask of cells that step by that shift) pairs, cells stepping off the board are left out
+    """
+    groups = {}
+    for cell in range(CELL_COUNT):
+        target = step(cell, direction)
+        if target is not None:
+            groups[target - cell] = groups.get(target - cell, 0) | 1 << cell
+    return tuple(sorted(groups.items()))
+
+
+def shift(mask, shifts):
+    """
+    moves every cell of a bitboard one step in a direction, dropping the ones that would leave the board
+    :param shifts: (tuple) from _build_shifts for the direction
+    :return: (int)
+    """
+    result = 0
+    for amount, source in shifts:
+        if amount > 0:
+            result |= (mask & source) << amount
+        else:
+            result |= (mask & source) >> -amount
+    return result
+
+
+# [side] tables for pawns, as in geometry
+PAWN_PUSH_SHIFTS = tuple(_build_shifts(PAWN_FORWARD[side]) for side in (WHITE, BLACK))
+PAWN_CAPTURE_SHIFTS = tuple(tuple(_build_shifts(direction) for direction in PAWN_CAPTURE_STEPS[side])
+                            for side in (WHITE, BLACK))
+PAWN_START_MASKS = tuple(to_mask(PAWN_STARTS[side]) for side in (WHITE, BLACK))
+# [side][cell] cells a pawn on cell captures on. A pawn of one side attacks a cell from exactly the cells the other
+# side's pawns would capture on from it, so [side ^ 1][cell] also gives where side's pawns attack cell from
+PAWN_CAPTURE_MASKS = tuple(tuple(map(to_mask, PAWN_CAPTURES[side])) for side in (WHITE, BLACK))
+
+
+def slide(cell, occupied, slides):
+    """
+    cells a sliding piece reaches from cell: each ray up to and including the first occupied cell
+    :param occupied: (int) bitboard of every piece on the board
+    :param slides: (tuple) ORTHOGONAL_SLIDES or DIAGONAL_SLIDES
+    :return: (int) bitboard
+    """
+    attacks = 0
+    for ascending, rays in slides:
+        ray = rays[cell]
+        blockers = ray & occupied
+        if blockers:
+            first = (blockers & -blockers).bit_length() - 1 if ascending else blockers.bit_length() - 1
+            ray ^= rays[first]  # everything past the first blocker
+        attacks |= ray
+    return attacks
+
+
+class Bitboards:
+    """
+    a position as one bitboard per side and piece type, plus the occupancy of each side, kept up to date alongside
+    HexBoard.squares. Moves for a piece, or every move of a side at once, come out as a bitboard of destination cells
+    from a few big int operations instead of stepping through squares one at a time.
+    """
+    def __init__(self):
+        self.pieces = [[0] * 6 for _ in (WHITE, BLACK)]  # [side][kind] -> bitboard, kinds as in pieces.py
+        self.occupied = [0, 0]  # [side] -> bitboard of all of that side's pieces
+
+    def add(self, side, kind, cell):
+        """
+        :param side: (int) WHITE or BLACK
+        :param kind: (int) piece type, e.g. pieces.ROOK
+        :param cell: (int) cell number
+        """
+        bit = 1 << cell
+        self.pieces[side][kind] |= bit
+        self.occupied[side] |= bit
+
+    def remove(self, side, kind, cell):
+        bit = 1 << cell
+        self.pieces[side][kind] &= ~bit
+        self.occupied[side] &= ~bit
+
+    def piece_moves(self, side, kind, cell, en_passant=0):
+        """
+        destinations of one piece, not taking into account whether its king would be left in check
+        :param en_passant: (int) bitboard of the cell a pawn can capture en passant on, if any
+        :return: (int) bitboard
+        """
+        own = self.occupied[side]
+        occupied = own | self.occupied[side ^ 1]
+        if kind == PAWN:
+            return self._pawn_moves(side, 1 << cell, occupied, en_passant)
+        if kind == KNIGHT:
+            return KNIGHT_MASKS[cell] & ~own
+        if kind == KING:
+            return KING_MASKS[cell] & ~own
+        attacks = 0
+        if kind != BISHOP:
+            attacks |= slide(cell, occupied, ORTHOGONAL_SLIDES)
+        if kind != ROOK:
+            attacks |= slide(cell, occupied, DIAGONAL_SLIDES)
+        return attacks & ~own
+
+    def side_moves(self, side, en_passant=0):
+        """
+        destinations of every piece of a side together, not taking into account whether the king would be left in
+        check
+        :param side: (int) WHITE or BLACK
+        :param en_passant: (int) as for piece_moves
+        :return: (int) bitboard
+        """
+        occupied = self.occupied[WHITE] | self.occupied[BLACK]
+        moves = self._pawn_moves(side, self.pieces[side][PAWN], occupied, en_passant)
+        return (moves | self._piece_attacks(side, occupied)) & ~self.occupied[side]
+
+    def attacks(self, side):
+        """
+        cells a side attacks (could capture on if an enemy piece was there), including its own pieces
+        :param side: (int) WHITE or BLACK
+        :return: (int) bitboard
+        """
+        occupied = self.occupied[WHITE] | self.occupied[BLACK]
+        attacks = 0
+        for shifts in PAWN_CAPTURE_SHIFTS[side]:
+            attacks |= shift(self.pieces[side][PAWN], shifts)
+        return attacks | self._piece_attacks(side, occupied)
+
+    def attacked(self, cell, side):
+        """
+        whether side attacks one cell, looking outwards from the cell for each kind of attacker rather than working out
+        everything the side attacks (so checking for check is cheap)
+        :param cell: (int) cell number
+        :param side: (int) attacking side
+        :return: (bool)
+        """
+        pieces = self.pieces[side]
+        if KNIGHT_MASKS[cell] & pieces[KNIGHT] or KING_MASKS[cell] & pieces[KING] or \
+                PAWN_CAPTURE_MASKS[side ^ 1][cell] & pieces[PAWN]:
+            return True
+        occupied = self.occupied[WHITE] | self.occupied[BLACK]
+        return bool(slide(cell, occupied, ORTHOGONAL_SLIDES) & (pieces[ROOK] | pieces[QUEEN]) or
+                    slide(cell, occupied, DIAGONAL_SLIDES) & (pieces[BISHOP] | pieces[QUEEN]))
+
+    def _pawn_moves(self, side, pawns, occupied, en_passant=0):
+        """
+        pushes (2 cells from the start cells) and captures of a bitboard of pawns
+        """
+        empty = ~occupied & FULL
+        pushes = PAWN_PUSH_SHIFTS[side]
+        single = shift(pawns, pushes) & empty
+        moves = single | shift(shift(pawns & PAWN_START_MASKS[side], pushes) & single, pushes) & empty
+        targets = self.occupied[side ^ 1] | en_passant
+        for shifts in PAWN_CAPTURE_SHIFTS[side]:
+            moves |= shift(pawns, shifts) & targets
+        return moves
+
+    def _piece_attacks(self, side, occupied):
+        """
+        cells the knights, bishops, rooks, queens and king of a side reach (own pieces included)
+        """
+        pieces = self.pieces[side]
+        attacks = 0
+        for cell in iter_cells(pieces[KNIGHT]):
+            attacks |= KNIGHT_MASKS[cell]
+        for cell in iter_cells(pieces[KING]):
+            attacks |= KING_MASKS[cell]
+        for cell in iter_cells(pieces[ROOK] | pieces[QUEEN]):
+            attacks |= slide(cell, occupied, ORTHOGONAL_SLIDES)
+        for cell in iter_cells(pieces[BISHOP] | pieces[QUEEN]):
+            attacks |= slide(cell, occupied, DIAGONAL_SLIDES)
+        return attacks
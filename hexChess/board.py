@@ -1,26 +1,115 @@
+from geometry import ROWS, CELL_COUNT, CELLS, INDEX, PAWN_PUSHES, PROMOTION_CELLS, to_name, from_name
 from pieces import *
+from bitboard import Bitboards, PAWN_CAPTURE_MASKS, iter_cells
+from zobrist import PIECE_KEYS, TURN_KEY, EN_PASSANT_KEYS
+
+# Gliński's starting position as (piece class, white's squares); black's pieces are the same squares mirrored top to
+# bottom within each column
+START_POSITION = ((King, ((7, 1),)), (Queen, ((5, 1),)), (Bishop, ((6, 1), (6, 2), (6, 3))),
+                  (Knight, ((4, 1), (8, 1))), (Rook, ((3, 1), (9, 1))),
+                  (Pawn, ((2, 1), (3, 2), (4, 3), (5, 4), (6, 5), (7, 4), (8, 3), (9, 2), (10, 1))))
+PROMOTIONS = {"Q": QUEEN, "R": ROOK, "B": BISHOP, "N": KNIGHT}  # update flag -> piece type a pawn promotes to
 
 
 class HexBoard:
     """
     Represents the current game state with pieces and their locations, as well as meta game data (turn, checks, etc.)
     """
-    rows = [6, 7, 8, 9, 10, 11, 10, 9, 8, 7, 6]
+    rows = list(ROWS)
 
-    def __init__(self):
-        self._pieces = {}  # stores location of each piece
-        # todo: add pieces to board here
+    def __init__(self, empty=False):
+        """
+        :param empty: (bool) start with no pieces on the board instead of the starting position
+        """
+        self.squares = [None] * CELL_COUNT  # piece on each cell (see geometry for the numbering), None if empty
+        self.bitboards = Bitboards()  # the same position as bitboards, for generating moves
+        # moves made, as (piece, start cell, end cell, captured piece, promoted piece, en passant cell before, key
+        # before), so they can be taken back without keeping copies of the board
         self._previous = []
-        self._kings = [(6, 1), (6, 11)]  # king locations [white, black]
+        self._kings = [None, None]  # king cells [white, black], None while a side has no king
+        self.en_passant = None  # cell a pawn skipped over moving 2 cells last move, where it can be captured
+        self.key = 0  # Zobrist key of the position (see zobrist.py), kept up to date by every change to it
 
         # immutable attributes
         self.turn = "W"
         self.status = None
 
+        if not empty:
+            for piece_type, squares in START_POSITION:
+                for col, row in squares:
+                    self._add_piece(piece_type((col, row), "W", self))
+                    self._add_piece(piece_type((col, ROWS[col - 1] + 1 - row), "B", self))
+
+    @classmethod
+    def from_notation(cls, text):
+        """
+        builds a board from a position written the way to_notation writes it
+        :param text: (str)
+        :return: (HexBoard)
+        """
+        fields = text.split()
+        if len(fields) != 3 or fields[0] not in ("w", "b"):
+            raise ValueError(f"Invalid position: {text!r}")
+        board = cls(empty=True)
+        for token in fields[1].split(","):
+            kind = PIECE_LETTERS.find(token[:1].upper())
+            cell = from_name(token[1:])
+            if kind < 0 or cell is None:
+                raise ValueError(f"Invalid piece {token!r} in position")
+            board._add_piece(PIECE_TYPES[kind](CELLS[cell], "W" if token[0].isupper() else "B", board))
+        board.turn = fields[0].upper()
+        if fields[2] != "-":
+            board.en_passant = from_name(fields[2])
+            if board.en_passant is None:
+                raise ValueError(f"Invalid en passant square {fields[2]!r} in position")
+        board.key = board.compute_key()
+        return board
+
+    def to_notation(self):
+        """
+        writes the position on one line: the side to move (w or b), every piece as its letter (upper case for white,
+        see pieces.PIECE_LETTERS) and square separated by commas, then the en passant square or - if there is none
+        e.g. "b Kg1,Pf7,kg10 f6"
+        :return: (str)
+        """
+        pieces = ",".join((PIECE_LETTERS[p.kind] if p.side == "W" else PIECE_LETTERS[p.kind].lower()) + to_name(p.cell)
+                          for p in self.squares if p is not None)
+        en_passant = "-" if self.en_passant is None else to_name(self.en_passant)
+        return f"{self.turn.lower()} {pieces} {en_passant}"
+
     def _add_piece(self, piece):
-        if piece.pos in self._pieces:
+        if self.squares[piece.cell] is not None:
             raise RuntimeError("Trying to place piece where one already exists!")
-        self._pieces[piece.pos] = piece
+        self.squares[piece.cell] = piece
+        self.bitboards.add(SIDE_INDEXES[piece.side], piece.kind, piece.cell)
+        self.key ^= PIECE_KEYS[SIDE_INDEXES[piece.side]][piece.kind][piece.cell]
+        if piece.kind == KING:
+            self._kings[SIDE_INDEXES[piece.side]] = piece.cell
+
+    def _en_passant_key(self, cell, side):
+        """
+        the en passant part of the key only counts when a pawn is there to make the capture, so positions that only
+        differ by a capture nobody can make get the same key
+        :param cell: (int) en passant cell
+        :param side: (int) side that would capture
+        :return: (int) key to xor in
+        """
+        return EN_PASSANT_KEYS[cell] if PAWN_CAPTURE_MASKS[side ^ 1][cell] & self.bitboards.pieces[side][PAWN] else 0
+
+    def compute_key(self):
+        """
+        works out the Zobrist key of the position from scratch (self.key is the same, kept up to date move by move)
+        :return: (int)
+        """
+        key = 0
+        for piece in self.squares:
+            if piece is not None:
+                key ^= PIECE_KEYS[SIDE_INDEXES[piece.side]][piece.kind][piece.cell]
+        if self.turn == "B":
+            key ^= TURN_KEY
+        if self.en_passant is not None:
+            key ^= self._en_passant_key(self.en_passant, SIDE_INDEXES[self.turn])
+        return key
 
     def get_piece(self, pos: tuple):
         """
@@ -28,7 +117,8 @@ class HexBoard:
         :param pos: (str) valid algebraic coordinates
         :return: (Piece)
         """
-        return self._pieces.get(pos, None)
+        cell = INDEX.get(pos)
+        return None if cell is None else self.squares[cell]
 
     def capturable_by(self, pos):
         """
@@ -37,7 +127,7 @@ class HexBoard:
         :param pos:
         :return:
         """
-        p = self._pieces.get(pos, None)
+        p = self.get_piece(pos)
         if p is None:
             return False
         if p.side == "W":
@@ -50,27 +140,188 @@ class HexBoard:
         :param pos: (str)
         :return: (bool)
         """
-        if 1 <= pos[0] <= 11 and 1 <= pos[1] <= self.rows[pos[0] - 1]:
-            return pos not in self._pieces
-        return False
+        cell = INDEX.get(pos)
+        return cell is not None and self.squares[cell] is None
+
+    def make_move(self, start, end, promotion=QUEEN):
+        """
+        moves the piece on start to end and passes the turn, without checking the move is legal. Everything needed to
+        take it back is pushed onto the undo stack
+        :param start: (int) cell number of the piece to move
+        :param end: (int) cell number to move it to
+        :param promotion: (int) piece type a pawn becomes if it reaches the far edge
+        """
+        squares = self.squares
+        bitboards = self.bitboards
+        piece = squares[start]
+        side = SIDE_INDEXES[piece.side]
+        kind = piece.kind
+        side_keys = PIECE_KEYS[side]
+        key = self.key ^ TURN_KEY ^ side_keys[kind][start]
+        if self.en_passant is not None:
+            key ^= self._en_passant_key(self.en_passant, SIDE_INDEXES[self.turn])
+
+        captured = squares[end]
+        if kind == PAWN and end == self.en_passant and piece.side == self.turn:
+            captured = squares[PAWN_PUSHES[side ^ 1][end]]  # the pawn that skipped over end
+        if captured is not None:
+            squares[captured.cell] = None
+            bitboards.remove(side ^ 1, captured.kind, captured.cell)
+            key ^= PIECE_KEYS[side ^ 1][captured.kind][captured.cell]
+
+        squares[start] = None
+        bitboards.remove(side, kind, start)
+        promoted = None
+        if kind == PAWN and end in PROMOTION_CELLS[side]:
+            promoted = PIECE_TYPES[promotion](CELLS[end], piece.side, self)
+            squares[end] = promoted
+            bitboards.add(side, promotion, end)
+            key ^= side_keys[promotion][end]
+        else:
+            piece.cell = end
+            squares[end] = piece
+            bitboards.add(side, kind, end)
+            key ^= side_keys[kind][end]
+        if kind == KING:
+            self._kings[side] = end
+
+        self._previous.append((piece, start, end, captured, promoted, self.en_passant, self.key))
+        self.en_passant = None
+        if kind == PAWN:
+            front = PAWN_PUSHES[side][start]
+            if end != front and end == PAWN_PUSHES[side][front]:
+                self.en_passant = front
+                key ^= self._en_passant_key(front, side ^ 1)
+        self.key = key
+        self.turn = "B" if self.turn == "W" else "W"
+
+    def unmake_move(self):
+        """
+        takes back the last move made with make_move
+        """
+        piece, start, end, captured, promoted, self.en_passant, self.key = self._previous.pop()
+        squares = self.squares
+        bitboards = self.bitboards
+        side = SIDE_INDEXES[piece.side]
+
+        squares[end] = None
+        bitboards.remove(side, piece.kind if promoted is None else promoted.kind, end)
+        piece.cell = start
+        squares[start] = piece
+        bitboards.add(side, piece.kind, start)
+        if captured is not None:  # the captured piece still knows its cell, which isn't end for en passant
+            squares[captured.cell] = captured
+            bitboards.add(side ^ 1, captured.kind, captured.cell)
+        if piece.kind == KING:
+            self._kings[side] = start
+        self.turn = "B" if self.turn == "W" else "W"
+
+    def _in_check(self, side):
+        """
+        :param side: (int) WHITE or BLACK
+        :return: (bool) whether that side's king is attacked
+        """
+        king = self._kings[side]
+        return king is not None and self.bitboards.attacked(king, side ^ 1)
+
+    def _legal_targets(self, cell):
+        """
+        :return: (list) of cell numbers the piece on cell can move to without leaving its king in check
+        """
+        piece = self.squares[cell]
+        side = SIDE_INDEXES[piece.side]
+        en_passant = 1 << self.en_passant if self.en_passant is not None and piece.side == self.turn else 0
+        targets = []
+        for end in iter_cells(self.bitboards.piece_moves(side, piece.kind, cell, en_passant)):
+            self.make_move(cell, end)
+            if not self._in_check(side):
+                targets.append(end)
+            self.unmake_move()
+        return targets
+
+    def generate_moves(self):
+        """
+        returns every legal move of the side to move; a pawn reaching the far edge gives one move per piece it can
+        become
+        :return: (list) of (start cell, end cell, promotion piece type or None) tuples
+        """
+        side = SIDE_INDEXES[self.turn]
+        promotion_cells = PROMOTION_CELLS[side]
+        squares = self.squares
+        moves = []
+        for start in iter_cells(self.bitboards.occupied[side]):
+            is_pawn = squares[start].kind == PAWN
+            for end in self._legal_targets(start):
+                if is_pawn and end in promotion_cells:
+                    moves.extend((start, end, kind) for kind in (QUEEN, ROOK, BISHOP, KNIGHT))
+                else:
+                    moves.append((start, end, None))
+        return moves
+
+    def repetitions(self):
+        """
+        returns how many times the current position came up earlier in the game, going by Zobrist key. Only looks back
+        to the last pawn move or capture, since no position before one of those can come up again
+        :return: (int)
+        """
+        count = 0
+        for piece, _, _, captured, _, _, key in reversed(self._previous):
+            if key == self.key:
+                count += 1
+            if piece.kind == PAWN or captured is not None:
+                break
+        return count
+
+    def _get_status(self):
+        """
+        :return: (str) status of the side to move, see update
+        """
+        in_check = self._in_check(SIDE_INDEXES[self.turn])
+        if not any(self._legal_targets(cell) for cell in iter_cells(self.bitboards.occupied[SIDE_INDEXES[self.turn]])):
+            return "checkmate" if in_check else "stalemate"
+        if self.repetitions() >= 2:
+            return "repetition"
+        if in_check:
+            return "check"
+        # only kings and at most one knight or bishop left can't checkmate
+        pieces = self.bitboards.pieces
+        minors = 0
+        for side in (WHITE, BLACK):
+            if pieces[side][PAWN] or pieces[side][ROOK] or pieces[side][QUEEN]:
+                return None
+            minors += bin(pieces[side][KNIGHT] | pieces[side][BISHOP]).count("1")
+        return "insufficient material" if minors <= 1 else None
 
     def update(self, piece, move, flag=None):
         """
         moves piece to new position changes which turn it is, taking into account captures and special moves
-        will return string for 'check', 'checkmate', 'stalemate', 'promotion', and 'insufficient material'
+        will return string for 'check', 'checkmate', 'stalemate', 'promotion', 'repetition' (the same position a third
+        time), and 'insufficient material'
+        'promotion' means a pawn would reach the far edge without flag saying what it becomes; the move is not made then
         :param piece: (Piece) which has moved
         :param move: (str) position of piece after move
         :param flag: (int) 0 for castling, 1 for enpassant, 'Q', 'R', 'N', 'B' for promotion
+        (castling isn't part of hexagonal chess and en passant is recognised from the move, so only the letters matter)
         :return: (str)
         """
-        pass
+        if piece.side != self.turn or move not in self.get_legal_moves(piece.pos):
+            raise RuntimeError(f"{piece} can't move to {move}")
+        end = INDEX[move]
+        if piece.kind == PAWN and end in PROMOTION_CELLS[SIDE_INDEXES[piece.side]]:
+            if flag not in PROMOTIONS:
+                return "promotion"
+            self.make_move(piece.cell, end, PROMOTIONS[flag])
+        else:
+            self.make_move(piece.cell, end)
+        self.status = self._get_status()
+        return self.status
 
     def is_check(self):
         """
         returns True if the current moving side is in check
         :return: (bool)
         """
-        pass
+        return self._in_check(SIDE_INDEXES[self.turn])
 
     def test_check(self, start, end):
         """
@@ -80,6 +331,11 @@ class HexBoard:
         :param end: (tuple) coordinates of a square the piece can move to
         :return: (bool)
         """
+        side = SIDE_INDEXES[self.get_piece(start).side]
+        self.make_move(INDEX[start], INDEX[end])
+        in_check = self._in_check(side)
+        self.unmake_move()
+        return in_check
 
     def undo(self):
         """
@@ -87,7 +343,9 @@ class HexBoard:
         multiple timeline kind of system)
         :return:
         """
-        pass
+        if self._previous:
+            self.unmake_move()
+            self.status = "check" if self.is_check() else None
 
     def get_legal_moves(self, pos):
         """
@@ -98,16 +356,24 @@ class HexBoard:
         p = self.get_piece(pos)
         if p is None:
             return set()
-        # result = set()
-        return p.get_moves()  # temporary
+        return {CELLS[cell] for cell in self._legal_targets(p.cell)}
+
+    def get_side_moves(self, side):
+        """
+        returns every square any piece of a side can move to at once, as a bitboard (see bitboard.py), not taking into
+        account whether the king would be left in check
+        :param side: (str) "W" or "B"
+        :return: (int)
+        """
+        en_passant = 1 << self.en_passant if self.en_passant is not None and side == self.turn else 0
+        return self.bitboards.side_moves(SIDE_INDEXES[side], en_passant)
 
 
 if __name__ == "__main__":
 
-    board = HexBoard()
+    board = HexBoard(empty=True)
     board._add_piece(Pawn((2, 1), "W", board))
     board._add_piece(Rook((3, 2), "B", board))
     board._add_piece(Pawn((3, 6), "W", board))
     print(board.get_legal_moves((2, 1)))
     print(sorted(list(board.get_legal_moves((3, 2)))))
-
@@ -0,0 +1,122 @@
+# cell numbering and move tables for the 91 cell board (Gliński's hexagonal chess), all worked out once at import.
+#
+# Squares are (col, row) with col 1-11 from left to right and row 1 at the bottom of each column, the same as HexBoard.
+# Cells are numbered 0-90 column by column from the bottom, following ROWS, so cell numbers only go up moving up a
+# column or to a column further right.
+# Stepping between columns changes the row differently either side of the middle column, so the tables are built in
+# axial coordinates q = col - 6, v = row + max(0, q), where each direction is the same (dq, dv) step everywhere.
+
+ROWS = (6, 7, 8, 9, 10, 11, 10, 9, 8, 7, 6)  # cells in each column
+CENTRE = 6  # middle column
+CELL_COUNT = sum(ROWS)
+
+# the 6 directions to a neighbouring cell (sharing an edge), clockwise from up, as (dq, dv)
+UP, UP_RIGHT, DOWN_RIGHT, DOWN, DOWN_LEFT, UP_LEFT = (0, 1), (1, 1), (1, 0), (0, -1), (-1, -1), (-1, 0)
+ORTHOGONALS = (UP, UP_RIGHT, DOWN_RIGHT, DOWN, DOWN_LEFT, UP_LEFT)
+# the 6 directions to the nearest cells sharing only a corner, each between two neighbouring orthogonal directions
+DIAGONALS = tuple((a[0] + b[0], a[1] + b[1]) for a, b in zip(ORTHOGONALS, ORTHOGONALS[1:] + ORTHOGONALS[:1]))
+# knights go 2 cells in an orthogonal direction, then 1 more in either direction next to it
+KNIGHT_STEPS = tuple((2 * a[0] + b[0], 2 * a[1] + b[1]) for i, a in enumerate(ORTHOGONALS)
+                     for b in (ORTHOGONALS[i - 1], ORTHOGONALS[(i + 1) % 6]))
+
+WHITE, BLACK = 0, 1  # side indexes used by the tables below
+# pawns move straight forward and capture on the two neighbouring cells either side of that
+PAWN_FORWARD = (UP, DOWN)
+PAWN_CAPTURE_STEPS = ((UP_LEFT, UP_RIGHT), (DOWN_LEFT, DOWN_RIGHT))
+
+
+def _build_cells():
+    cells = []
+    for col, height in enumerate(ROWS, 1):
+        cells.extend((col, row) for row in range(1, height + 1))
+    return tuple(cells)
+
+
+CELLS = _build_cells()  # cell number -> (col, row)
+INDEX = {pos: cell for cell, pos in enumerate(CELLS)}  # (col, row) -> cell number
+COLUMNS = "abcdefghijk"  # column letters for square names, as drawn in window.py
+
+
+def to_name(cell):
+    """
+    :param cell: (int) cell number
+    :return: (str) square name, column letter then row (e.g. "f5")
+    """
+    col, row = CELLS[cell]
+    return f"{COLUMNS[col - 1]}{row}"
+
+
+def from_name(name):
+    """
+    :param name: (str) square name, e.g. "f5"
+    :return: (int) cell number, None if there is no such square
+    """
+    if len(name) < 2 or name[0] not in COLUMNS or not name[1:].isdigit():
+        return None
+    return INDEX.get((COLUMNS.index(name[0]) + 1, int(name[1:])))
+
+
+def to_axial(pos):
+    """
+    :param pos: (tuple) col, row
+    :return: (tuple) q, v axial coordinates
+    """
+    q = pos[0] - CENTRE
+    return q, pos[1] + max(0, q)
+
+
+def from_axial(q, v):
+    """
+    :return: (int) cell number of the axial coordinates, None if they are off the board
+    """
+    col = q + CENTRE
+    if not 1 <= col <= len(ROWS):
+        return None
+    return INDEX.get((col, v - max(0, q)))
+
+
+def step(cell, direction):
+    """
+    :param cell: (int) cell number
+    :param direction: (tuple) dq, dv
+    :return: (int) cell number one step away in that direction, None if that is off the board
+    """
+    q, v = to_axial(CELLS[cell])
+    return from_axial(q + direction[0], v + direction[1])
+
+
+def get_ray(cell, direction):
+    """
+    :return: (tuple) cell numbers from cell (not included) to the board edge in a direction, nearest first
+    """
+    ray = []
+    cell = step(cell, direction)
+    while cell is not None:
+        ray.append(cell)
+        cell = step(cell, direction)
+    return tuple(ray)
+
+
+def _build_steps(cell, directions):
+    return tuple(target for target in (step(cell, direction) for direction in directions) if target is not None)
+
+
+# for every cell, the cells along each direction in order from nearest to the board edge (empty rays are left out)
+ORTHOGONAL_RAYS = tuple(tuple(ray for ray in (get_ray(cell, d) for d in ORTHOGONALS) if ray)
+                        for cell in range(CELL_COUNT))
+DIAGONAL_RAYS = tuple(tuple(ray for ray in (get_ray(cell, d) for d in DIAGONALS) if ray)
+                      for cell in range(CELL_COUNT))
+KNIGHT_MOVES = tuple(_build_steps(cell, KNIGHT_STEPS) for cell in range(CELL_COUNT))
+KING_MOVES = tuple(_build_steps(cell, ORTHOGONALS + DIAGONALS) for cell in range(CELL_COUNT))
+
+# [side][cell] tables for pawns: the cell in front (None at the far edge) and the cells a pawn captures on
+PAWN_PUSHES = tuple(tuple(step(cell, PAWN_FORWARD[side]) for cell in range(CELL_COUNT)) for side in (WHITE, BLACK))
+PAWN_CAPTURES = tuple(tuple(_build_steps(cell, PAWN_CAPTURE_STEPS[side]) for cell in range(CELL_COUNT))
+                      for side in (WHITE, BLACK))
+# cells pawns start the game on, from where they may move 2 cells forward
+PAWN_STARTS = (frozenset(INDEX[pos] for pos in ((2, 1), (3, 2), (4, 3), (5, 4), (6, 5), (7, 4), (8, 3), (9, 2),
+                                               (10, 1))),
+               frozenset(INDEX[col, 7] for col in range(2, 11)))
+# cells at the far edge for each side, where pawns promote
+PROMOTION_CELLS = (frozenset(INDEX[col, height] for col, height in enumerate(ROWS, 1)),
+                   frozenset(INDEX[col, 1] for col in range(1, len(ROWS) + 1)))
@@ -0,0 +1,98 @@
+import argparse
+import sys
+import time
+
+from board import HexBoard
+from geometry import to_name
+from pieces import PIECE_LETTERS
+from zobrist import TranspositionTable
+
+
+def move_name(move):
+    """
+    :param move: (tuple) start cell, end cell and promotion piece type or None, as from HexBoard.generate_moves
+    :return: (str) e.g. "f5f7", or "b6b7=Q" for a promotion
+    """
+    start, end, promotion = move
+    name = to_name(start) + to_name(end)
+    return name if promotion is None else f"{name}={PIECE_LETTERS[promotion]}"
+
+
+def perft(board, depth, table=None):
+    """
+    counts the positions reached after every sequence of depth legal moves from the board (leaf nodes)
+    :param board: (HexBoard) left as it was when done
+    :param depth: (int) moves
+    :param table: (TranspositionTable) counts of positions already counted by key, filled in as it goes, or None to
+    count every subtree from scratch
+    :return: (int)
+    """
+    if depth == 0:
+        return 1
+    if table is not None:
+        entry = table.get(board.key)
+        if entry is not None and entry[0] == depth:
+            return entry[1]
+    moves = board.generate_moves()
+    if depth == 1:
+        return len(moves)  # the moves are legal already, so the last ply doesn't need making
+    nodes = 0
+    for move in moves:
+        board.make_move(*move)
+        nodes += perft(board, depth - 1, table)
+        board.unmake_move()
+    if table is not None:
+        table.store(board.key, depth, nodes)
+    return nodes
+
+
+def divide(board, depth, table=None):
+    """
+    perft split up by the first move, for finding which move a wrong count comes from
+    :return: (list) of (move name, count) pairs
+    """
+    counts = []
+    for move in board.generate_moves():
+        board.make_move(*move)
+        counts.append((move_name(move), perft(board, depth - 1, table)))
+        board.unmake_move()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="counts hex chess move generation leaf nodes to a depth and times it")
+    parser.add_argument("depth", type=int, help="moves deep to count")
+    parser.add_argument("-p", "--position", help="position to start from, written as by HexBoard.to_notation "
+                                                 "(default: the starting position)")
+    parser.add_argument("-d", "--divide", action="store_true", help="show the count after each first move")
+    parser.add_argument("--hash", type=int, nargs="?", const=1 << 20, metavar="ENTRIES",
+                        help="count positions reached again by other move orders once, using a table of this size")
+    parser.add_argument("-e", "--expect", type=int, nargs="+", metavar="COUNT",
+                        help="known counts for depth 1, 2, ... to check against (e.g. published perft results)")
+    args = parser.parse_args()
+
+    board = HexBoard.from_notation(args.position) if args.position else HexBoard()
+    table = TranspositionTable(args.hash) if args.hash else None
+    failed = False
+    for depth in range(1, args.depth + 1):
+        start = time.perf_counter()
+        nodes = perft(board, depth, table)
+        seconds = time.perf_counter() - start
+        line = f"depth {depth:2} {nodes:14,} nodes {seconds:9.3f} s {nodes / max(seconds, 1e-9):12,.0f} nodes/s"
+        if args.expect and depth <= len(args.expect):
+            correct = nodes == args.expect[depth - 1]
+            failed |= not correct
+            line += "  ok" if correct else f"  expected {args.expect[depth - 1]:,}"
+        print(line)
+
+    if args.divide:
+        print()
+        counts = divide(board, args.depth, table)
+        for name, nodes in sorted(counts):
+            print(f"{name:10} {nodes:,}")
+        print(f"{len(counts)} moves, {sum(nodes for _, nodes in counts):,} nodes")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
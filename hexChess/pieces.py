@@ -1,135 +1,147 @@
-from board import HexBoard
+from typing import TYPE_CHECKING
 
+from geometry import CELLS, INDEX, ORTHOGONAL_RAYS, DIAGONAL_RAYS, KNIGHT_MOVES, KING_MOVES, PAWN_PUSHES, \
+    PAWN_CAPTURES, PAWN_STARTS, WHITE, BLACK
 
-def scan_orthogonal(board: HexBoard, start_pos: tuple, side: str):
+if TYPE_CHECKING:  # board.py imports this module, so the import is only for type hints
+    from board import HexBoard
+
+SIDE_INDEXES = {"W": WHITE, "B": BLACK}  # side -> index into the [side] tables in geometry
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)  # piece types, as indexes for per type tables (e.g. bitboards)
+
+
+def scan_rays(board: "HexBoard", rays, side: str):
     """
-    scans all three orthogonal directions in board stopping at first obstacle
-    (including obstacle if it is an enemy piece), returning all pieces
+    walks rays of cell numbers (e.g. from geometry.ORTHOGONAL_RAYS) stopping each one at the first obstacle
+    (including the obstacle if it is an enemy piece)
+    :param rays: (iterable) of tuples of cell numbers, nearest first
+    :param side: (str) side of the moving piece
+    :return: (set) of coordinates (tuple)
     """
     result = set()
-    x, y = start_pos
-    while True:  # up
-        y += 1
-        if not board.is_clear((x, y)):
-            if board.capturable_by((x, y)) == side:
-                result.add((x, y))
-            break
-        result.add((x, y))
-
-    y = start_pos[1]
-    while True:
-        y -= 1  # down
-        if not board.is_clear((x, y)):
-            if board.capturable_by((x, y)) == side:
-                result.add((x, y))
-            break
-        result.add((x, y))
-
-    x, y = start_pos
-    while True:  # up-left
-        if x > 6:
-            y += 1
-        x -= 1
-        if not board.is_clear((x, y)):
-            if board.capturable_by((x, y)) == side:
-                result.add((x, y))
-            break
-        result.add((x, y))
-
-    x, y = start_pos
-    while True:  # up-left
-        if x < 6:
-            y += 1
-        x += 1
-        if not board.is_clear((x, y)):
-            if board.capturable_by((x, y)) == side:
-                result.add((x, y))
-            break
-        result.add((x, y))
-
-    x, y = start_pos
-    while True:  # down-left
-        if x <= 6:
-            y -= 1
-        x -= 1
-        if not board.is_clear((x, y)):
-            if board.capturable_by((x, y)) == side:
-                result.add((x, y))
-            break
-        result.add((x, y))
-
-    x, y = start_pos
-    while True:  # down-right
-        if x >= 6:
-            y -= 1
-        x += 1
-        if not board.is_clear((x, y)):
-            if board.capturable_by((x, y)) == side:
-                result.add((x, y))
-            break
-        result.add((x, y))
-
+    squares = board.squares
+    for ray in rays:
+        for cell in ray:
+            piece = squares[cell]
+            if piece is not None:
+                if piece.side != side:
+                    result.add(CELLS[cell])
+                break
+            result.add(CELLS[cell])
     return result
 
 
-class Rook:
-    def __init__(self, pos: tuple, side: str, board: HexBoard):
-        self.pos = pos
+def scan_steps(board: "HexBoard", cells, side: str):
+    """
+    returns the cells out of cells (e.g. from geometry.KNIGHT_MOVES) that are empty or hold an enemy piece
+    :return: (set) of coordinates (tuple)
+    """
+    squares = board.squares
+    return {CELLS[cell] for cell in cells if squares[cell] is None or squares[cell].side != side}
+
+
+def scan_orthogonal(board: "HexBoard", start_pos: tuple, side: str):
+    """
+    scans all six orthogonal directions in board stopping at first obstacle
+    (including obstacle if it is an enemy piece), returning all squares
+    """
+    return scan_rays(board, ORTHOGONAL_RAYS[INDEX[start_pos]], side)
+
+
+def scan_diagonal(board: "HexBoard", start_pos: tuple, side: str):
+    """
+    scans all six diagonal directions in board stopping at first obstacle
+    (including obstacle if it is an enemy piece), returning all squares
+    """
+    return scan_rays(board, DIAGONAL_RAYS[INDEX[start_pos]], side)
+
+
+class Piece:
+    """
+    shared functionality of the pieces; the position is kept as a cell number (see geometry) so subclasses can walk
+    the precomputed move tables from it
+    """
+    kind = None  # piece type, one of PAWN to KING
+
+    def __init__(self, pos: tuple, side: str, board: "HexBoard"):
+        if type(self) is Piece:
+            raise Exception('Piece is an abstract class and cannot be instantiated directly')
+        self.cell = INDEX[pos]
         self.side = side
         self._board = board
 
+    @property
+    def pos(self):
+        return CELLS[self.cell]
+
     def __repr__(self):
-        return f"<{self.side} Rook Object with pos {self.pos}>"
+        return f"<{self.side} {type(self).__name__} Object with pos {self.pos}>"
 
     def get_moves(self):
-        return scan_orthogonal(self._board, self.pos, self.side)
+        """
+        returns the squares the piece can move to, not taking into account whether its king would be left in check
+        :return: (set) of coordinates (tuple)
+        """
+        raise NotImplementedError("Subclass did not implement get_moves method")
 
 
-class Pawn:
-    def __init__(self, pos: tuple, side: str, board: HexBoard):
-        self.pos = pos
-        self.side = side
-        self._board = board
+class Rook(Piece):
+    kind = ROOK
 
-    def __repr__(self):
-        return f"<{self.side} Pawn Object with pos {self.pos}>"
+    def get_moves(self):
+        return scan_rays(self._board, ORTHOGONAL_RAYS[self.cell], self.side)
+
+
+class Bishop(Piece):
+    kind = BISHOP
 
     def get_moves(self):
-        if self.side == 'B':
-            return self.moves_black()
-        else:
-            return self.moves_white()
+        return scan_rays(self._board, DIAGONAL_RAYS[self.cell], self.side)
 
-    def moves_black(self):
-        moves = set()
-        if self._board.is_clear((self.pos[0], self.pos[1] - 1)):
-            moves.add((self.pos[0], self.pos[1] - 1))
-            if self.pos[1] == 7:  # black pawns can move two squares on seventh row
-                if self._board.is_clear((self.pos[0], self.pos[1] - 2)):
-                    moves.add((self.pos[0], self.pos[1] - 2))
-
-        # check sideways movements for captures
-        if self._board.capturable_by((self.pos[0] + 1, self.pos[1])) == self.side:
-            moves.add((self.pos[0] + 1, self.pos[1]))
-        if self._board.capturable_by((self.pos[0] - 1, self.pos[1] - 1)) == self.side:
-            moves.add((self.pos[0] - 1, self.pos[1] - 1))
 
-        return moves
+class Queen(Piece):
+    kind = QUEEN
 
-    def moves_white(self):
-        moves = set()
-        if self._board.is_clear((self.pos[0], self.pos[1] + 1)):
-            moves.add((self.pos[0], self.pos[1] + 1))
-            if self.pos[0] - self.pos[1] == 1 and self.pos[0] <= 6 or self.pos in [(7, 4), (8, 3), (9, 2), (10, 1)]:
-                if self._board.is_clear((self.pos[0], self.pos[1] + 2)):
-                    moves.add((self.pos[0], self.pos[1] + 2))
+    def get_moves(self):
+        return scan_rays(self._board, ORTHOGONAL_RAYS[self.cell] + DIAGONAL_RAYS[self.cell], self.side)
 
-        if self._board.capturable_by((self.pos[0] - 1, self.pos[1])) == self.side:
-            moves.add((self.pos[0] - 1, self.pos[1]))
-        if self._board.capturable_by((self.pos[0] + 1, self.pos[1] + 1)) == self.side:
-            moves.add((self.pos[0] + 1, self.pos[1] + 1))
 
-        return moves
+class Knight(Piece):
+    kind = KNIGHT
 
+    def get_moves(self):
+        return scan_steps(self._board, KNIGHT_MOVES[self.cell], self.side)
+
+
+class King(Piece):
+    kind = KING
+
+    def get_moves(self):
+        return scan_steps(self._board, KING_MOVES[self.cell], self.side)
+
+
+class Pawn(Piece):
+    kind = PAWN
+
+    def get_moves(self):
+        side = SIDE_INDEXES[self.side]
+        squares = self._board.squares
+        moves = set()
+        front = PAWN_PUSHES[side][self.cell]
+        if front is not None and squares[front] is None:
+            moves.add(CELLS[front])
+            if self.cell in PAWN_STARTS[side]:  # pawns can move two squares from where they start
+                second = PAWN_PUSHES[side][front]
+                if squares[second] is None:
+                    moves.add(CELLS[second])
+
+        # captures are on the neighbouring squares either side of the one in front
+        en_passant = self._board.en_passant if self._board.turn == self.side else None
+        for cell in PAWN_CAPTURES[side][self.cell]:
+            if squares[cell] is not None and squares[cell].side != self.side or cell == en_passant:
+                moves.add(CELLS[cell])
+        return moves
 
 
+PIECE_TYPES = (Pawn, Knight, Bishop, Rook, Queen, King)  # piece type -> class
+PIECE_LETTERS = "PNBRQK"  # piece type -> letter, written upper case for white and lower case for black
@@ -0,0 +1,62 @@
+import random
+
+from geometry import CELL_COUNT, WHITE, BLACK
+
+# Zobrist hashing: every (side, piece type, cell) gets a random 64 bit number and a position's key is the xor of the
+# numbers of its pieces, plus TURN_KEY when black is to move and the en passant cell's number when that capture is on.
+# A move only changes a few of them, so HexBoard keeps its key up to date by xoring those in and out.
+# The numbers come from a fixed seed so a position has the same key every run.
+_rng = random.Random(0x9E3779B97F4A7C15)
+PIECE_KEYS = tuple(tuple(tuple(_rng.getrandbits(64) for _ in range(CELL_COUNT)) for _ in range(6))
+                   for _ in (WHITE, BLACK))  # [side][kind][cell]
+TURN_KEY = _rng.getrandbits(64)
+EN_PASSANT_KEYS = tuple(_rng.getrandbits(64) for _ in range(CELL_COUNT))  # [cell]
+
+
+class TranspositionTable:
+    """
+    fixed size store of results by position key, for search and analysis tools. Entries live in preallocated lists
+    indexed by the low bits of the key, so memory stays the same however many positions go through it. When two
+    positions share a slot, the one searched deeper is kept.
+    """
+    def __init__(self, size=1 << 20):
+        """
+        :param size: (int) number of entries, rounded up to a power of 2
+        """
+        size = 1 << max(size - 1, 0).bit_length()
+        self._mask = size - 1
+        self._keys = [0] * size
+        self._depths = [-1] * size  # -1 for an empty slot
+        self._values = [None] * size
+
+    def __len__(self):
+        return len(self._keys)
+
+    def get(self, key):
+        """
+        :param key: (int) position key
+        :return: (tuple) depth and value stored for the position, None if it isn't in the table
+        """
+        index = key & self._mask
+        if self._keys[index] != key or self._depths[index] < 0:
+            return None
+        return self._depths[index], self._values[index]
+
+    def store(self, key, depth, value):
+        """
+        stores a result unless the slot holds a different position searched deeper
+        :param key: (int) position key
+        :param depth: (int) how deep the result was searched, 0 or more
+        :param value: anything
+        """
+        index = key & self._mask
+        if self._keys[index] == key or depth >= self._depths[index]:
+            self._keys[index] = key
+            self._depths[index] = depth
+            self._values[index] = value
+
+    def clear(self):
+        size = len(self._keys)
+        self._keys = [0] * size
+        self._depths = [-1] * size
+        self._values = [None] * size
@@ -0,0 +1,125 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+# shared by the games in this collection; tetris's main.py puts this folder on sys.path before importing it, and
+# flappy bird loads it by path through its shared module
+
+Entry = namedtuple("Entry", ["name", "score", "level", "lines", "timestamp"])
+
+_CREATE = ("CREATE TABLE IF NOT EXISTS scores (name TEXT NOT NULL, score INTEGER NOT NULL, level INTEGER NOT NULL, "
+           "lines INTEGER NOT NULL, timestamp REAL NOT NULL)")
+_SELECT = "SELECT name, score, level, lines, timestamp FROM scores ORDER BY score DESC, timestamp ASC LIMIT ?"
+
+
+def _sort_key(entry):
+    # best score first, earlier entries win ties (same order as _SELECT)
+    return -entry.score, entry.timestamp
+
+
+class Leaderboard:
+    """
+    top entries of a game, stored in an SQLite file. The entries are read once when created and kept in memory, so
+    reading scores never touches the disk, and new entries are written by a background thread so a game never waits
+    on the disk either. Every write is one transaction, so the file is never left half written.
+    """
+    def __init__(self, path, size=10):
+        """
+        :param path: (str) database file, created if missing
+        :param size: (int) number of entries kept
+        """
+        self.path = path
+        self.size = size
+        self._entries = []
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+
+        connection = sqlite3.connect(path)
+        try:
+            with connection:
+                connection.execute(_CREATE)
+            self._entries = [Entry(*row) for row in connection.execute(_SELECT, (size,))]
+        finally:
+            connection.close()
+
+    def get_entries(self):
+        """
+        :return: (list) of Entry, best first
+        """
+        with self._lock:
+            return list(self._entries)
+
+    def get_high_score(self):
+        """
+        :return: (int) best score, 0 if there are no entries yet
+        """
+        with self._lock:
+            return self._entries[0].score if self._entries else 0
+
+    def qualifies(self, score):
+        """
+        :return: (boolean) whether a score would make it onto the leaderboard
+        """
+        with self._lock:
+            return len(self._entries) < self.size or score > self._entries[-1].score
+
+    def add(self, score, name="PLAYER", level=0, lines=0):
+        """
+        adds an entry if it makes the top entries; returns straight away and saves it in the background
+        :param score: (int)
+        :param name: (str)
+        :param level: (int) level reached, if the game has levels
+        :param lines: (int) lines cleared, if the game has lines
+        :return: (int) 0 based rank of the new entry, or None if it didn't make the leaderboard
+        """
+        entry = Entry(name, int(score), int(level), int(lines), time.time())
+        with self._lock:
+            if len(self._entries) >= self.size and entry.score <= self._entries[-1].score:
+                return None
+            self._entries.append(entry)
+            self._entries.sort(key=_sort_key)
+            del self._entries[self.size:]
+            rank = self._entries.index(entry)
+
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="leaderboard writer", daemon=True)
+            self._writer.start()
+        self._queue.put(entry)
+        return rank
+
+    def close(self):
+        """
+        waits for entries still being written, call before the game exits
+        """
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+
+    def _write_loop(self):
+        # sqlite connections can only be used by the thread that made them, so the writer has its own
+        connection = sqlite3.connect(self.path)
+        try:
+            while True:
+                entry = self._queue.get()
+                if entry is None:
+                    return
+                with connection:  # one transaction: insert and trim to the top entries together
+                    connection.execute("INSERT INTO scores VALUES (?, ?, ?, ?, ?)", entry)
+                    connection.execute("DELETE FROM scores WHERE rowid NOT IN (SELECT rowid FROM scores "
+                                       "ORDER BY score DESC, timestamp ASC LIMIT ?)", (self.size,))
+        finally:
+            connection.close()
+
+
+def get_leaderboard_path(game_folder, name="high_scores.db"):
+    """
+    :param game_folder: (str) folder of the game, so the file doesn't depend on where the game was started from
+    :param name: (str) file name
+    :return: (str) absolute path of a game's leaderboard file
+    """
+    return os.path.join(os.path.abspath(game_folder), name)
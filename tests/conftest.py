@@ -0,0 +1,9 @@
+import os
+import sys
+
+# the games are run from their own folders and import their modules from there (e.g. "files.engine" or "board")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ("tetrisClone", "hexChess"):
+    path = os.path.join(ROOT, folder)
+    if path not in sys.path:
+        sys.path.insert(0, path)
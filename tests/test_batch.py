@@ -0,0 +1,62 @@
+import random
+
+import numpy as np
+
+from files.batch import BatchEngine
+from files.engine import TetrisEngine, HARD_DROP
+from files.playfield import BitboardPlayfield, WIDTH, HEIGHT
+import files.tetrominoes as tet
+
+
+def _grid(field):
+    return np.array([[not field.is_clear(x, y) for x in range(WIDTH)] for y in range(HEIGHT)])
+
+
+def test_matches_scalar_engine():
+    # random low placements on a batch of boards and on one TetrisEngine per board, which have to stay identical
+    boards = 16
+    rng = random.Random(0)
+    batch = BatchEngine(range(boards))
+    scalar = [TetrisEngine(field_type=BitboardPlayfield, seed=seed) for seed in range(boards)]
+    for _ in range(300):
+        if batch.over.all():
+            break
+        rotations = np.zeros(boards, dtype=np.int64)
+        xs = np.zeros(boards, dtype=np.int64)
+        for i, engine in enumerate(scalar):
+            if engine.over:
+                continue
+            assert engine.current.KIND == batch.current[i]
+            kind = engine.current.KIND
+            states = [tet.PieceState(kind, r, x, tet.SPAWN_Y) for r in range(4) for x in range(-2, WIDTH)]
+            options = [state for state in states if engine.field.fits(tet.get_shape(state), state.x, state.y)]
+            options.sort(key=lambda s: engine.field.get_landing(tet.get_shape(s), s.x, s.y) + rng.random() * 3)
+            rotations[i], xs[i] = options[0].rotation, options[0].x
+            engine.current.set_position(int(xs[i]), tet.SPAWN_Y, int(rotations[i]))
+            engine.step(HARD_DROP)
+            engine.events.clear()
+        batch.step(rotations, xs)
+        for i, engine in enumerate(scalar):
+            assert (_grid(engine.field) == batch.field.grid[i]).all()
+            assert (engine.score, engine.level, engine.lines, engine.over) == \
+                   (batch.score[i], batch.level[i], batch.lines[i], batch.over[i])
+    assert batch.lines.sum() > 0
+
+
+def test_placement_that_does_not_fit_tops_out():
+    # the one way the engines differ: TetrisEngine can't be given a placement that doesn't fit at the spawn height,
+    # while its spawned pieces always fit until a block reaches the hidden rows, which ends both kinds of game
+    batch = BatchEngine([1, 1])
+    batch.field.grid[:, 19, :WIDTH - 1] = True
+    before = batch.field.grid.copy()
+    batch.step([1, 0], [0, 0])  # standing up the piece reaches row 19, flat it only covers rows 20 and 21
+    assert batch.over.tolist() == [True, True]  # the flat piece is left in the hidden rows
+    assert (batch.field.grid[0] == before[0]).all()
+    assert batch.score[0] == 0 and batch.pieces.tolist() == [0, 1]
+
+    engine = TetrisEngine(field_type=BitboardPlayfield, seed=1)
+    engine.field.add_blocks([(x, 19) for x in range(WIDTH - 1)], (0, 0, 0))
+    state = engine.current.get_state()
+    assert state == tet.spawn(state.kind) and engine.field.fits(tet.get_shape(state), state.x, state.y)
+    engine.step(HARD_DROP)
+    assert engine.over
@@ -0,0 +1,21 @@
+from benchmark import get_baseline, find_regressions
+
+
+def run(ns, baseline=False):
+    return {"baseline": baseline, "results": {"hard_drop": ns}}
+
+
+def test_first_run_is_the_baseline_until_one_is_pinned():
+    history = [run(100), run(105), run(108)]
+    assert get_baseline(history) is history[0]
+    history.append(run(90, baseline=True))
+    history.append(run(95))
+    assert get_baseline(history) is history[3]
+    assert get_baseline([]) is None
+
+
+def test_slow_drift_is_flagged_against_the_pinned_baseline():
+    history = [run(100, baseline=True), run(105), run(109)]
+    # each run is within 10% of the one before it, but not of the baseline
+    assert find_regressions({"hard_drop": 115}, get_baseline(history)["results"], 0.1) == [("hard_drop", 100, 115)]
+    assert find_regressions({"hard_drop": 109, "new": 5}, get_baseline(history)["results"], 0.1) == []
@@ -0,0 +1,11 @@
+from files.engine import TetrisEngine, EVENT_PLACE, EVENT_HOLD, HARD_DROP, HOLD
+
+
+def test_hold_with_hard_drop_holds_the_next_piece():
+    engine = TetrisEngine(seed=7)
+    following = engine.bag.show_next_n(1)[0]
+    engine.step(HARD_DROP | HOLD)
+    kinds = [event[0] for event in engine.events]
+    assert kinds.index(EVENT_PLACE) < kinds.index(EVENT_HOLD)
+    assert sum(not engine.field.is_clear(x, y) for x in range(10) for y in range(22)) == 4
+    assert engine.held.KIND == following
@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+from board import HexBoard
+from geometry import from_name
+from perft import perft, divide
+from zobrist import TranspositionTable
+
+# perft counts of Gliński's starting position
+START_COUNTS = (51, 2586, 137858)
+
+
+def random_walk(board, rng, plies):
+    """
+    makes random legal moves, checking the incrementally kept key against one worked out from scratch after each
+    :return: (list) of (notation, key) before each move made
+    """
+    history = []
+    for _ in range(plies):
+        moves = board.generate_moves()
+        if not moves:
+            break
+        history.append((board.to_notation(), board.key))
+        board.make_move(*rng.choice(moves))
+        assert board.key == board.compute_key()
+    return history
+
+
+def test_perft_start_position():
+    board = HexBoard()
+    assert [perft(board, depth) for depth in (1, 2)] == list(START_COUNTS[:2])
+    assert sum(nodes for _, nodes in divide(board, 2)) == START_COUNTS[1]
+
+
+def test_perft_with_table_matches():
+    board = HexBoard()
+    key = board.key
+    assert perft(board, 3, TranspositionTable(1 << 16)) == START_COUNTS[2]
+    assert board.key == key and board.to_notation() == HexBoard().to_notation()
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_unmake_restores_position(seed):
+    board = HexBoard()
+    history = random_walk(board, random.Random(seed), 120)
+    for notation, key in reversed(history):
+        board.unmake_move()
+        assert (board.to_notation(), board.key) == (notation, key)
+
+
+def test_key_only_depends_on_position():
+    board = HexBoard()
+    random_walk(board, random.Random(7), 40)
+    copy = HexBoard.from_notation(board.to_notation())
+    assert copy.key == board.key
+    assert HexBoard.from_notation("w Kg1,kg10 -").key != HexBoard.from_notation("b Kg1,kg10 -").key
+
+
+def test_promotion_keys():
+    board = HexBoard.from_notation("w Kg1,Pb6,kg10 -")  # the pawn is one step from the far edge
+    key = board.key
+    promotions = [move for move in board.generate_moves() if move[2] is not None]
+    assert len(promotions) == 4
+    for move in promotions:
+        board.make_move(*move)
+        assert board.key == board.compute_key()
+        board.unmake_move()
+        assert board.key == key
+
+
+def test_en_passant_keys():
+    # black's pawn just moved f7 to f5, so white's g5 pawn can take it on f6
+    board = HexBoard.from_notation("w Kg1,Pg5,pf5,kg10 f6")
+    assert board.key != HexBoard.from_notation("w Kg1,Pg5,pf5,kg10 -").key
+    notation, key = board.to_notation(), board.key
+    capture = from_name("g5"), from_name("f6"), None
+    assert capture in board.generate_moves()
+    board.make_move(*capture)
+    assert board.to_notation() == "b Pf6,Kg1,kg10 -" and board.key == board.compute_key()
+    board.unmake_move()
+    assert (board.to_notation(), board.key) == (notation, key)
+    # with no pawn there to take it, the en passant square doesn't change the key
+    assert HexBoard.from_notation("w Kg1,pf5,kg10 f6").key == HexBoard.from_notation("w Kg1,pf5,kg10 -").key
+
+
+def test_transposition_table():
+    table = TranspositionTable(1000)
+    assert len(table) == 1024
+    assert table.get(5) is None
+    table.store(5, 2, "a")
+    assert table.get(5) == (2, "a")
+    table.store(5 + 1024, 1, "b")  # same slot, searched less deeply, so it doesn't replace the entry
+    assert table.get(5 + 1024) is None and table.get(5) == (2, "a")
+    table.store(5 + 1024, 3, "c")
+    assert table.get(5) is None and table.get(5 + 1024) == (3, "c")
+    table.store(5 + 1024, 0, "d")  # the same position always replaces its own entry
+    assert table.get(5 + 1024) == (0, "d")
+    table.clear()
+    assert table.get(5 + 1024) is None and len(table) == 1024
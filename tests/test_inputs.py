@@ -0,0 +1,91 @@
+from files.engine import LEFT, RIGHT, SOFT_DROP, HOLD
+from files.inputs import InputHandler
+from files.timing import FixedStepClock
+
+FRAME = 1000 / 60
+
+
+def make_handler(times, das=100, arr=20):
+    """
+    :param times: (list) ms timestamps the handler's timer returns in order
+    """
+    times = iter(times)
+    return InputHandler(das, arr, timer=lambda: next(times) / 1000)
+
+
+def test_presses_in_one_frame_charge_from_their_own_time():
+    # both presses land between the same two frames, 2 ms and 15 ms after the first
+    early = make_handler([0, 2])
+    late = make_handler([0, 15])
+    for handler in (early, late):
+        handler.update()
+        handler.key_down(LEFT)
+
+    # the frame after the press only has the press itself, neither has charged yet
+    assert early.update(FRAME) == (LEFT, 0, 0)
+    assert late.update(FRAME) == (LEFT, 0, 0)
+    # by 105 ms the early press has been held past the 100 ms DAS but the late one hasn't
+    assert early.update(105) == (0, -1, 0)
+    assert late.update(105) == (0, 0, 0)
+    assert late.update(115) == (0, -1, 0)
+
+
+def test_owed_repeats_are_applied_at_once():
+    handler = InputHandler(100, 20)
+    handler.key_down(RIGHT, 0)
+    handler.update(0)
+    assert handler.update(165) == (0, 4, 0)  # 100, 120, 140 and 160 ms
+    handler.key_up(RIGHT, 170)
+    assert handler.update(500) == (0, 0, 0)
+
+
+def test_release_before_update_keeps_repeats_up_to_the_release():
+    handler = InputHandler(100, 20, soft_drop_delay=50, soft_drop_arr=10)
+    handler.key_down(SOFT_DROP, 0)
+    handler.key_up(SOFT_DROP, 75)
+    assert handler.update(200) == (SOFT_DROP, 0, 3)  # 50, 60 and 70 ms
+
+
+def test_instant_arr_shifts_to_the_wall():
+    handler = InputHandler(100, 0)
+    handler.key_down(LEFT, 0)
+    assert handler.update(100)[1] == -10
+
+
+def test_both_directions_held_cancel_out():
+    handler = InputHandler(100, 20)
+    handler.key_down(LEFT, 0)
+    handler.key_down(RIGHT, 10)
+    assert handler.update(200) == (LEFT | RIGHT, 0, 0)
+    # letting go of one charges the other from the release
+    handler.key_up(RIGHT, 200)
+    assert handler.update(290)[1] == 0
+    assert handler.update(300)[1] == -1
+
+
+def test_presses_are_passed_on_once():
+    handler = InputHandler()
+    handler.key_down(HOLD, 0)
+    assert handler.update(1)[0] == HOLD
+    assert handler.update(2)[0] == 0
+
+
+def test_clock_polls_while_waiting():
+    clock = FixedStepClock(60)
+    polls = []
+    clock.tick()
+    clock.wait(lambda: polls.append(clock._timer()), poll_interval=0.002)
+    # several polls within the one frame, so events are timestamped to within a few ms of arriving
+    assert len(polls) >= 3
+    assert polls[-1] - polls[0] > 0.005
+
+
+def test_second_press_of_a_key_is_kept_for_the_next_update():
+    handler = InputHandler()
+    handler.key_down(HOLD, 0)
+    handler.key_up(HOLD, 1)
+    handler.key_down(HOLD, 2)
+    handler.key_down(LEFT, 3)
+    assert handler.update(5)[0] == HOLD | LEFT
+    assert handler.update(6)[0] == HOLD
+    assert handler.update(7)[0] == 0
@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from benchmark import make_stack
+from files.playfield import Playfield, BitboardPlayfield, PLAYFIELD_TYPES, WIDTH, HEIGHT, get_playfield_type
+import files.tetrominoes as tet
+
+FIELD_TYPES = [Playfield, BitboardPlayfield]
+GREY = (128, 128, 128)
+
+
+def contents(field):
+    return [[field.get_contents(x, y) for x in range(WIDTH)] for y in range(HEIGHT)]
+
+
+def test_types_match():
+    for seed in range(50):
+        rng = random.Random(seed)
+        fields = [field_type() for field_type in FIELD_TYPES]
+        for _ in range(40):
+            coords = [(rng.randrange(WIDTH), rng.randrange(HEIGHT)) for _ in range(rng.randint(1, 12))]
+            colour = rng.choice(((1, 2, 3), (4, 5, 6), GREY))
+            assert len({field.add_blocks(coords, colour) for field in fields}) == 1
+            if rng.random() < 0.1:
+                lines, gap = rng.randint(1, 3), rng.randrange(WIDTH)
+                assert len({field.insert_garbage(lines, gap, GREY) for field in fields}) == 1
+            if rng.random() < 0.2:
+                fields = [field.copy() for field in fields]
+            list_field, bitboard = fields
+            assert contents(list_field) == contents(bitboard)
+            assert list_field.get_heights() == bitboard.get_heights()
+            assert list_field.garbage_out() == bitboard.garbage_out()
+
+
+@pytest.mark.parametrize("field_type", FIELD_TYPES)
+def test_line_clear_moves_rows_down(field_type):
+    field = field_type()
+    field.add_blocks([(x, y) for y in (0, 2) for x in range(1, WIDTH)] + [(5, 1), (5, 3)], GREY)
+    assert field.get_heights()[5] == 4
+    assert field.add_blocks([(0, 0), (0, 2)], (1, 2, 3)) == 2
+    assert [x for x in range(WIDTH) if not field.is_clear(x, 0)] == [5]
+    assert [x for x in range(WIDTH) if not field.is_clear(x, 1)] == [5]
+    assert field.get_heights() == [0] * 5 + [2] + [0] * 4
+    assert not field.is_clear(5, 1) and field.is_clear(5, 2)
+
+
+@pytest.mark.parametrize("field_type", FIELD_TYPES)
+def test_insert_garbage(field_type):
+    field = field_type()
+    field.add_blocks([(0, 0)], (1, 2, 3))
+    assert not field.insert_garbage(2, 4, GREY)
+    assert [field.is_clear(x, 1) for x in range(WIDTH)] == [x == 4 for x in range(WIDTH)]
+    assert field.get_contents(0, 2) == (1, 2, 3)
+    assert field.get_heights() == [3] + [2] * 3 + [0] + [2] * 5
+    field.add_blocks([(0, HEIGHT - 1)], GREY)
+    assert field.insert_garbage(1, 0, GREY)
+
+
+@pytest.mark.parametrize("field_type", FIELD_TYPES)
+def test_copy_is_independent(field_type):
+    field = make_stack(field_type, height=6)
+    other = field.copy()
+    assert type(other) is field_type
+    other.add_blocks([(x, 10) for x in range(3)], (1, 2, 3))
+    assert field.get_heights() != other.get_heights()
+    assert all(field.is_clear(x, 10) for x in range(3))
+
+
+@pytest.mark.parametrize("field_type", FIELD_TYPES)
+def test_landing_and_slide_match_single_steps(field_type):
+    for seed in range(10):
+        field = make_stack(field_type, seed, height=random.Random(seed).randint(0, 14))
+        for n in range(7):
+            for shape in tet.num_to_piece(n)._shapes:
+                for x in range(-3, WIDTH):
+                    for y in range(HEIGHT):
+                        if not field.fits(shape, x, y):
+                            continue
+                        landing = y
+                        while field.fits(shape, x, landing - 1):
+                            landing -= 1
+                        assert field.get_landing(shape, x, y) == landing
+                        for step in (-1, 1):
+                            end = x
+                            while abs(end - x) < WIDTH and field.fits(shape, end + step, y):
+                                end += step
+                            assert field.get_slide(shape, x, y, step * WIDTH) == end
+
+
+def test_get_playfield_type():
+    assert get_playfield_type("list") is Playfield
+    assert all(get_playfield_type(name) is field_type for name, field_type in PLAYFIELD_TYPES.items())
+    with pytest.raises(ValueError):
+        get_playfield_type("array")
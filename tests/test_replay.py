@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+from files.bot import evaluate
+from files.engine import TetrisEngine, EVENT_PIECE, EVENT_HOLD, HARD_DROP, HOLD
+from files.playfield import Playfield, BitboardPlayfield
+from files.replay import (ReplayRecorder, Replay, MAGIC, write_varint, read_varint, to_zigzag, from_zigzag,
+                          board_hash)
+from files.search import find_placements
+
+
+def record_game(seed, frames=3000, field_type=Playfield):
+    """
+    plays the inputs of the placements files.bot rates best, with idle frames, holds and auto repeat mixed in, with a
+    recorder attached
+    :return: (tuple) the engine and the recorded replay as bytes
+    """
+    rng = random.Random(seed)
+    engine = TetrisEngine(max_rotates=10, field_type=field_type, seed=seed)
+    recorder = ReplayRecorder(engine)
+    plan = []
+    for _ in range(frames):
+        if engine.over:
+            break
+        if not plan:
+            state = engine.current.get_state()
+            placements = find_placements(engine.field, type(engine.current), (state.x, state.y, state.rotation))
+            best = max(placements, key=lambda p: evaluate(engine.field, type(engine.current), p), default=None)
+            plan = [HARD_DROP] if best is None else list(best.path)
+        pressed = shift = drops = 0
+        if rng.random() < 0.5:
+            pressed = plan.pop(0)
+        elif rng.random() < 0.02:
+            pressed = HOLD
+        elif rng.random() < 0.05:
+            shift, drops = rng.choice((-1, 1)), rng.randint(0, 2)
+        engine.step(pressed, shift, drops)
+        recorder.record(pressed, shift, drops)
+        if any(event[0] in (EVENT_PIECE, EVENT_HOLD) for event in engine.events) or shift or drops:
+            plan = []
+        engine.events.clear()
+    return engine, recorder.to_bytes()
+
+
+def test_varints_round_trip():
+    out = bytearray()
+    numbers = [0, 1, 127, 128, 300, 2 ** 40]
+    for n in numbers:
+        write_varint(out, n)
+    assert len(out) < 2 + len(numbers) * 3
+    pos = 0
+    for n in numbers:
+        value, pos = read_varint(out, pos)
+        assert value == n
+    assert pos == len(out)
+    assert [from_zigzag(to_zigzag(n)) for n in range(-5, 6)] == list(range(-5, 6))
+    with pytest.raises(ValueError):
+        write_varint(out, -1)
+
+
+@pytest.mark.parametrize("field_type", [Playfield, BitboardPlayfield])
+def test_replay_reproduces_game(field_type):
+    engine, data = record_game(3, field_type=field_type)
+    replay = Replay(data)
+    assert (replay.seed, replay.max_rotates, replay.infinity, replay.score) == (3, 10, False, engine.score)
+    assert engine.score > 0
+    assert len(list(replay.inputs())) == replay.frames == engine.frame
+    # the board hash only covers what is on the board, so the field type the replay is played back on doesn't matter
+    assert replay.verify(Playfield) and replay.verify(BitboardPlayfield)
+    assert board_hash(replay.create_engine(field_type).field) != replay.board_hash
+
+
+def test_changed_replay_fails():
+    _, data = record_game(5)
+    replay = Replay(data)
+    replay.score += 1
+    assert not replay.verify()
+    replay = Replay(data)
+    replay.seed += 1
+    assert not replay.verify()
+
+
+def test_rejects_other_files():
+    _, data = record_game(5, frames=10)
+    with pytest.raises(ValueError):
+        Replay(b"PNG" + data)
+    with pytest.raises(ValueError):
+        Replay(MAGIC + bytes([2]) + data[len(MAGIC) + 1:])
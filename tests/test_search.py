@@ -0,0 +1,93 @@
+import random
+from collections import deque
+
+import pytest
+
+from benchmark import make_stack
+from files.engine import LEFT, RIGHT, SOFT_DROP, HARD_DROP, ROTATE_RIGHT, ROTATE_LEFT
+from files.playfield import PLAYFIELD_TYPES, WIDTH
+from files.search import find_placements
+import files.tetrominoes as tet
+
+T_SPIN_CORNERS = ((0, 0), (0, 2), (2, 0), (2, 2))
+
+
+def brute_force(field, piece_type):
+    """
+    every move from every state, one row at a time, with none of find_placements' shortcuts
+    :return: (set) of (squares, t-spin) for every placement
+    """
+    x, y, rotation = tet.SPAWN
+    shapes = piece_type._shapes
+    if not field.fits(shapes[rotation], x, y):
+        return set()
+    start = (rotation, x, y, False)
+    seen = {start}
+    queue = deque([start])
+    found = set()
+    while queue:
+        rotation, x, y, rotated = queue.popleft()
+        moves = [(rotation, x + dx, y, False) for dx in (-1, 1)]
+        if field.fits(shapes[rotation], x, y - 1):
+            moves.append((rotation, x, y - 1, False))
+        else:
+            t_spin = rotated and sum(not field.is_clear(x + dx, y - dy) for dx, dy in T_SPIN_CORNERS) >= 3
+            found.add((frozenset((x + dx, y - dy) for dx, dy in piece_type._offsets[rotation]), t_spin))
+        if piece_type is not tet.OPiece:
+            for new_rotation in ((rotation + 1) & 3, (rotation - 1) & 3):
+                for dx, dy in piece_type._kicks[rotation][new_rotation]:
+                    if field.fits(shapes[new_rotation], x + dx, y + dy):
+                        moves.append((new_rotation, x + dx, y + dy, piece_type is tet.TPiece))
+                        break
+        for move in moves:
+            if move not in seen and field.fits(shapes[move[0]], move[1], move[2]):
+                seen.add(move)
+                queue.append(move)
+    return found
+
+
+def tunnel(field_type):
+    # a two row tunnel under the stack, only reachable by moving sideways once the piece is inside
+    field = field_type()
+    for y in range(10):
+        if y not in (5, 6):
+            field.add_blocks([(x, y) for x in range(WIDTH - 2)], (128, 128, 128))
+    return field
+
+
+def play_path(field, piece_type, placement):
+    piece = piece_type(field)
+    actions = {LEFT: piece.left, RIGHT: piece.right, ROTATE_RIGHT: piece.rotate_right, ROTATE_LEFT: piece.rotate_left,
+               SOFT_DROP: piece.drop}
+    assert placement.path[-1] == HARD_DROP
+    for action in placement.path[:-1]:
+        before = piece.get_state()
+        actions[action]()
+        assert piece.get_state() != before
+    return piece
+
+
+@pytest.mark.parametrize("field_type", sorted(PLAYFIELD_TYPES.values(), key=lambda t: t.__name__))
+def test_matches_brute_force(field_type):
+    rng = random.Random(1)
+    fields = [tunnel(field_type)] + [make_stack(field_type, seed, rng.randint(0, 16)) for seed in range(15)]
+    for field in fields:
+        for n in range(7):
+            piece_type = tet.num_to_piece(n)
+            placements = find_placements(field, piece_type)
+            found = {(frozenset((p.x + dx, p.y - dy) for dx, dy in piece_type._offsets[p.rotation]), p.t_spin)
+                     for p in placements}
+            assert len(found) == len(placements)
+            assert found == brute_force(field, piece_type)
+            for placement in placements:
+                piece = play_path(field, piece_type, placement)
+                assert tuple(piece.get_state())[1:] == (placement.rotation, placement.x, placement.y)
+                if piece_type is tet.TPiece:
+                    t_spin = piece.get_last_action() == "ROTATE" and piece.t_spin_corners_satisfied()
+                    assert t_spin == placement.t_spin
+
+
+def test_blocked_spawn_has_no_placements():
+    field = make_stack(PLAYFIELD_TYPES["list"], height=0)
+    field.add_blocks([(x, 20) for x in range(WIDTH - 1)], (128, 128, 128))
+    assert find_placements(field, tet.TPiece) == []
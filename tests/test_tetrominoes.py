@@ -0,0 +1,86 @@
+import pytest
+
+from files.playfield import Playfield, BitboardPlayfield, WIDTH
+import files.tetrominoes as tet
+
+ROTATING_KINDS = [n for n in range(7) if tet.num_to_piece(n) is not tet.OPiece]
+
+
+def cells(kind, rotation, x, y):
+    return set(tet.get_coordinates(tet.PieceState(kind, rotation, x, y)))
+
+
+@pytest.mark.parametrize("kind", range(7))
+def test_rotating_in_open_air_needs_no_kick(kind):
+    field = Playfield()
+    state = tet.PieceState(kind, 0, 3, 10)
+    for turn in range(1, 5):
+        state = tet.rotate(state, field, turn & 3) or state
+        assert (state.x, state.y) == (3, 10)
+    assert state == tet.PieceState(kind, 0, 3, 10)
+
+
+@pytest.mark.parametrize("field_type", [Playfield, BitboardPlayfield])
+@pytest.mark.parametrize("kind", ROTATING_KINDS)
+def test_kicks_are_tried_in_table_order(field_type, kind):
+    # for every rotation, block each kick in turn and check the next one in the SRS table is used
+    piece_type = tet.num_to_piece(kind)
+    for rotation in range(4):
+        for new_rotation in ((rotation + 1) & 3, (rotation - 1) & 3):
+            kicks = piece_type._kicks[rotation][new_rotation]
+            start = tet.PieceState(kind, rotation, 3, 10)
+            blocked = set()
+            for i, (dx, dy) in enumerate(kicks):
+                field = field_type()
+                field.add_blocks(blocked, (128, 128, 128))
+                result = tet.rotate(start, field, new_rotation)
+                assert result == tet.PieceState(kind, new_rotation, 3 + dx, 10 + dy), (rotation, new_rotation, i)
+                # a square only this kick covers, so blocking it moves the rotation on to the next kick
+                free = cells(kind, new_rotation, 3 + dx, 10 + dy) - cells(kind, rotation, 3, 10)
+                free -= set().union(*(cells(kind, new_rotation, 3 + kx, 10 + ky) for kx, ky in kicks[i + 1:]))
+                if not free:
+                    break
+                blocked.add(min(free))
+
+
+def test_i_piece_kicks_off_the_wall():
+    field = Playfield()
+    piece = tet.IPiece(field)
+    piece.rotate_right()
+    piece.shift(-WIDTH)
+    assert min(x for x, _ in piece.get_coordinates()) == 0
+    x = piece.get_state().x
+    piece.rotate_right()  # lying flat it would stick out of the wall, and so would the first kick to the left
+    kick = tet.I_WALL_KICK_DATA["1>2"][1]
+    assert piece.get_state() == tet.PieceState(tet.IPiece.KIND, 2, x + kick[0], tet.SPAWN_Y + kick[1])
+    assert min(x for x, _ in piece.get_coordinates()) == 0
+
+
+def test_o_piece_does_not_rotate():
+    field = Playfield()
+    piece = tet.OPiece(field)
+    before = piece.get_state()
+    piece.rotate_right()
+    piece.rotate_left()
+    assert piece.get_state() == before and piece.get_last_action() is None
+
+
+def test_piece_follows_state_functions():
+    field = Playfield()
+    field.add_blocks([(x, 0) for x in range(WIDTH - 1)], (128, 128, 128))
+    piece = tet.TPiece(field)
+    state = piece.get_state()
+    assert state == tet.spawn(tet.TPiece.KIND)
+    piece.shift(-WIDTH)
+    state = tet.slide(state, field, -WIDTH)
+    assert piece.get_state() == state and piece.get_last_action() == "MOVE"
+    piece.rotate_right()
+    state = tet.rotate(state, field, 1)
+    assert piece.get_state() == state and piece.get_last_action() == "ROTATE"
+    assert set(piece.get_ghost_coords()) == set(tet.get_coordinates(tet.hard_drop(state, field)))
+    assert piece.soft_drop(3) == 3
+    state = tet.drop(state, field, 3)
+    assert piece.get_state() == state and piece.get_last_action() == "DROP"
+    rows = piece.hard_drop()
+    assert piece.get_state() == tet.hard_drop(state, field) and rows == state.y - piece.get_state().y
+    assert not piece.drop()
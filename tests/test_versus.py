@@ -0,0 +1,86 @@
+import asyncio
+
+from files.engine import TetrisEngine
+from files.playfield import BitboardPlayfield
+from files.search import find_placements
+from files.versus import (VersusServer, VersusClient, BotController, BoardEncoder, RemoteBoard, JOIN, START, OVER,
+                          NOBODY, send, read_message)
+
+
+def run_match(*clients):
+    """
+    plays clients against each other through a server on this machine
+    :return: (list) result of each client
+    """
+    async def play():
+        server = await VersusServer().start()
+        host, port = server.sockets[0].getsockname()[:2]
+        try:
+            return await asyncio.gather(*(client.run(host, port) for client in clients))
+        finally:
+            server.close()
+            await server.wait_closed()
+    return asyncio.run(play())
+
+
+def test_frame_limit_is_a_draw_for_everyone():
+    players = [VersusClient(BotController(think_frames=5), "room", realtime=False, max_frames=limit)
+               for limit in (60, 90)]
+    spectator = VersusClient(None, "room")
+    assert run_match(*players, spectator) == ["DRAW", "DRAW", "OVER"]
+    assert [client.loser for client in players + [spectator]] == [NOBODY] * 3
+
+
+def test_topping_out_loses():
+    class GiveUp:
+        def __call__(self, engine, boards):
+            engine.over = engine.frame >= 30
+            engine.step()
+
+    players = [VersusClient(GiveUp(), "room", realtime=False),
+               VersusClient(BotController(think_frames=5), "room", realtime=False)]
+    spectator = VersusClient(None, "room")
+    assert run_match(*players, spectator) == ["LOSS", "WIN", "OVER"]
+    assert spectator.loser == players[0].index
+
+
+def test_leaving_after_the_result_changes_nothing():
+    async def play():
+        listener = await VersusServer().start()
+        host, port = listener.sockets[0].getsockname()[:2]
+        # the opponent is a bare connection that never plays, so the bot reaches its frame limit first
+        reader, writer = await asyncio.open_connection(host, port)
+        send(writer, JOIN + b"room")
+        result = await VersusClient(BotController(), "room", realtime=False, max_frames=30).run(host, port)
+        messages = []
+        while True:
+            message = await read_message(reader)
+            if message is None:
+                break
+            messages.append(message)
+            if message[:1] == OVER:
+                writer.close()  # leaving once the match is over
+        listener.close()
+        await listener.wait_closed()
+        return result, [message for message in messages if message[:1] in (START, OVER)]
+
+    result, messages = asyncio.run(play())
+    assert result == "DRAW"
+    assert messages[0][:1] == START
+    assert messages[1:] == [OVER + bytes((NOBODY,))]
+
+
+def test_remote_board_matches_the_sent_field():
+    engine = TetrisEngine(field_type=BitboardPlayfield, seed=3)
+    encoder = BoardEncoder()
+    board = RemoteBoard()
+    while not engine.over and engine.lines < 10:
+        engine.apply_placement(find_placements(engine.field, type(engine.current))[-1])
+        message = bytearray(b"S")
+        message += bytes((engine.frame & 127, 2))  # frame, HAS_ROWS
+        encoder.encode(engine.field, message)
+        assert len(message) < 100
+        board.apply(bytes(message), 1)
+        for y in range(22):
+            for x in range(10):
+                assert (board.get_contents(x, y) != 0) == (not engine.field.is_clear(x, y))
@@ -0,0 +1,255 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from files.bag import Bag
+from files.playfield import PLAYFIELD_TYPES, WIDTH
+from files.search import find_all_placements
+import files.tetrominoes as tet
+
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_history.json")
+
+
+def measure(func, make_state=None, number=1000, repeat=5):
+    """
+    times func, returning the best time of several runs so background noise doesn't count
+    :param func: function to time, called with a state from make_state if given
+    :param make_state: function returning a fresh argument for each call, made before the timer starts (for
+    benchmarks that change what they run on)
+    :param number: (int) calls per run
+    :param repeat: (int) runs
+    :return: (float) nanoseconds per call
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        if make_state is None:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+        else:
+            states = [make_state() for _ in range(number)]
+            start = time.perf_counter()
+            for state in states:
+                func(state)
+        best = min(best, time.perf_counter() - start)
+    return best / number * 1e9
+
+
+def make_stack(field_type, seed=0, height=8):
+    """
+    returns a playfield with a messy stack of blocks (holes and all) up to about height, with no full rows
+    """
+    rng = random.Random(seed)
+    field = field_type()
+    for y in range(height):
+        gaps = set(rng.sample(range(WIDTH), rng.randint(1, 4)))
+        field.add_blocks([(x, y) for x in range(WIDTH) if x not in gaps], (128, 128, 128))
+    return field
+
+
+def make_line_clear_field(field_type, lines):
+    """
+    returns a playfield where a vertical I piece placed in column 0 clears the given number of lines
+    :return: (tuple) the playfield and the coordinates of the I piece's blocks
+    """
+    field = field_type()
+    for y in range(4):
+        # rows that shouldn't be cleared get a second gap in the last column
+        field.add_blocks([(x, y) for x in range(1, WIDTH if y < lines else WIDTH - 1)], (128, 128, 128))
+    return field, [(0, y) for y in range(4)]
+
+
+def find_kick(field, piece_type):
+    """
+    finds a position where rotating right only works with a wall kick, so the kick table walk gets timed
+    :return: (tuple) corner x, corner y and rotation
+    """
+    shapes = piece_type._shapes
+    for rotation in range(4):
+        new_rotation = (rotation + 1) & 3
+        for y in range(21, -1, -1):
+            for x in range(-3, WIDTH):
+                kicks = piece_type._kicks[rotation][new_rotation]
+                if field.fits(shapes[rotation], x, y) and not field.fits(shapes[new_rotation], x, y) and \
+                        any(field.fits(shapes[new_rotation], x + dx, y + dy) for dx, dy in kicks[1:]):
+                    return x, y, rotation
+    raise ValueError("no position needs a kick")
+
+
+def run_benchmarks(number):
+    """
+    :return: (dict) benchmark name -> nanoseconds per call
+    """
+    results = {}
+    for type_name, field_type in sorted(PLAYFIELD_TYPES.items()):
+        prefix = f"{type_name}/"
+        for lines in range(5):
+            field, coords = make_line_clear_field(field_type, lines)
+            results[f"{prefix}add_blocks_{lines}_lines"] = measure(
+                lambda f: f.add_blocks(coords, (1, 237, 250)), field.copy, number)
+
+        field = make_stack(field_type)
+        cells = [(x, y) for y in range(field.get_dimensions()[1]) for x in range(WIDTH)]
+
+        def is_clear_all():
+            for x, y in cells:
+                field.is_clear(x, y)
+        results[f"{prefix}is_clear"] = measure(is_clear_all, number=max(number // 10, 1)) / len(cells)
+
+        piece = tet.TPiece(field)
+        x, y, rotation = find_kick(field, tet.TPiece)
+
+        def rotate_with_kick():
+            piece.set_position(x, y, rotation)
+            piece.rotate_right()
+        results[f"{prefix}perform_rotate_kick"] = measure(rotate_with_kick, number=number)
+
+        def ghost():
+            piece.set_position(3, 21, 0)
+            piece.get_ghost_coords()
+        results[f"{prefix}get_ghost_coords"] = measure(ghost, number=number)
+
+        def hard_drop():
+            piece.set_position(3, 21, 0)
+            piece.hard_drop()
+        results[f"{prefix}hard_drop"] = measure(hard_drop, number=number)
+
+        def shift_to_wall():
+            piece.set_position(3, 21, 0)
+            piece.shift(-WIDTH)
+            piece.soft_drop(3)
+            piece.shift(WIDTH)
+        results[f"{prefix}shift_to_wall"] = measure(shift_to_wall, number=number)
+
+        # a low stack, where most of the search is above the stack (see search.find_placements)
+        low_stack = make_stack(field_type, height=4)
+        results[f"{prefix}find_all_placements"] = measure(lambda: find_all_placements(low_stack),
+                                                          number=max(number // 200, 1))
+
+    bag = Bag(0)
+    results["bag_next"] = measure(bag.next, number=number * 10)
+    results.update(run_render_benchmarks(number))
+    return results
+
+
+def run_render_benchmarks(number):
+    """
+    times SurfaceField.update without a window, using SDL's dummy video driver
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import files.game as game
+
+    results = {}
+    field = make_stack(PLAYFIELD_TYPES["list"])
+    piece = tet.TPiece(field)
+    surface_field = game.SurfaceField(field, piece)
+    surface_field.update(True)
+    moves = [(x, 21, 0) for x in range(0, WIDTH - 2)]
+    step = iter(range(10 ** 9))
+
+    def piece_move():
+        x, y, rotation = moves[next(step) % len(moves)]
+        piece.set_position(x, y, rotation)
+        surface_field.calculate_ghost()
+        surface_field.update(True)
+    results["surface_field_update_move"] = measure(piece_move, number=number)
+
+    def field_change():
+        surface_field.field_changed()
+        surface_field.update(True)
+    results["surface_field_update_field_changed"] = measure(field_change, number=max(number // 10, 1))
+
+    def full_redraw():
+        surface_field.invalidate()
+        surface_field.update(True)
+    results["surface_field_update_full"] = measure(full_redraw, number=max(number // 10, 1))
+    return results
+
+
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def get_baseline(history):
+    """
+    :param history: (list) of runs, oldest first
+    :return: (dict) the run pinned as the baseline most recently, the first run if none was pinned, None if there
+    are no runs. Every run is compared against the same baseline so slow drift over many runs still shows up
+    """
+    for run in reversed(history):
+        if run.get("baseline"):
+            return run
+    return history[0] if history else None
+
+
+def find_regressions(results, baseline, threshold):
+    """
+    :param results: (dict) name -> ns per call of this run
+    :param baseline: (dict) name -> ns per call of the run to compare against
+    :param threshold: (float) allowed slowdown, e.g. 0.1 for 10%
+    :return: (list) of (name, baseline ns, new ns) for every benchmark slower than allowed
+    """
+    return [(name, baseline[name], ns) for name, ns in results.items()
+            if name in baseline and ns > baseline[name] * (1 + threshold)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="times the tetris hot paths and compares them with a baseline run")
+    parser.add_argument("--history", default=HISTORY_PATH, help="JSON file runs are kept in")
+    parser.add_argument("-n", "--number", type=int, default=2000, help="calls per timing run")
+    parser.add_argument("-t", "--threshold", type=float, default=0.1,
+                        help="slowdown against the baseline that counts as a regression (0.1 = 10%%)")
+    parser.add_argument("--no-save", action="store_true", help="don't add this run to the history")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="add this run to the history as the baseline later runs are compared against, even if "
+                             "it is slower than the current one (e.g. after an intended change)")
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    baseline = get_baseline(history)
+    results = run_benchmarks(args.number)
+
+    for name, ns in results.items():
+        line = f"{name:40} {ns:12.1f} ns"
+        if baseline and name in baseline["results"]:
+            line += f"  ({ns / baseline['results'][name] - 1:+.1%})"
+        print(line)
+
+    regressions = find_regressions(results, baseline["results"], args.threshold) if baseline else []
+    if regressions:
+        print(f"\n{len(regressions)} regressions of over {args.threshold:.0%} against {baseline['commit']} "
+              f"({baseline['date']}):")
+        for name, old, new in regressions:
+            print(f"  {name}: {old:.1f} ns -> {new:.1f} ns")
+
+    if args.save_baseline or not (args.no_save or regressions):
+        # runs that regressed aren't kept unless asked for, so they can't end up as a baseline
+        history.append({"date": time.strftime("%Y-%m-%d %H:%M:%S"), "commit": get_commit(),
+                        "python": platform.python_version(), "baseline": args.save_baseline or not history,
+                        "results": results})
+        with open(args.history, "w") as f:
+            json.dump(history, f, indent=1)
+    elif regressions and not args.no_save:
+        print("\nnot added to the history, use --save-baseline to keep it as the new baseline")
+    sys.exit(1 if regressions and not args.save_baseline else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import json
+import os
+
+import pygame as pg
+
+
+class Assets:
+    """
+    loads fonts and renders fixed labels the first time they are asked for instead of at import, and starts pygame
+    then too. Looking a system font up (pg.font.match_font, which SysFont uses) scans every installed font, so the path
+    each font name resolved to is kept in a JSON file and reused on the next run.
+    """
+    def __init__(self, cache_path):
+        """
+        :param cache_path: (str) JSON file for resolved font paths
+        """
+        self._cache_path = cache_path
+        self._font_paths = None  # font name -> file path (None for pygame's default font), read from cache_path
+        self._fonts = {}
+        self._labels = {}
+        self._initialized = False
+
+    def init(self):
+        """
+        starts pygame, only does anything the first time it is called
+        """
+        if not self._initialized:
+            pg.init()
+            pg.font.init()
+            self._initialized = True
+
+    def font(self, name, size):
+        """
+        :param name: (str) system font name, as given to pg.font.SysFont
+        :param size: (int)
+        :return: (pg.font.Font) same font SysFont would give, created once per name and size
+        """
+        key = name, size
+        font = self._fonts.get(key)
+        if font is None:
+            self.init()
+            font = self._fonts[key] = pg.font.Font(self._get_font_path(name), size)
+        return font
+
+    def label(self, font, text, colour):
+        """
+        :return: (pg.Surface) text rendered with antialiasing, rendered only once for each font, text and colour
+        """
+        key = font, text, colour
+        surface = self._labels.get(key)
+        if surface is None:
+            surface = self._labels[key] = font.render(text, True, colour)
+        return surface
+
+    def _get_font_path(self, name):
+        if self._font_paths is None:
+            self._font_paths = self._load_cache()
+        if name in self._font_paths:
+            path = self._font_paths[name]
+            if path is None or os.path.exists(path):
+                return path
+        # not cached (or the font was uninstalled): do the slow lookup and remember it
+        path = pg.font.match_font(name)
+        self._font_paths[name] = path
+        self._save_cache()
+        return path
+
+    def _load_cache(self):
+        try:
+            with open(self._cache_path) as f:
+                paths = json.load(f)
+            return paths if isinstance(paths, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self):
+        temp_path = self._cache_path + ".tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(self._font_paths, f)
+            os.replace(temp_path, self._cache_path)
+        except OSError:
+            pass  # only costs the lookup again next time
+
+
+class FontSet:
+    """
+    named sizes of one font, each loaded through Assets the first time it is used, e.g. FontSet(assets, "Arial",
+    normal=45).normal
+    """
+    def __init__(self, assets, name, **sizes):
+        self._assets = assets
+        self._name = name
+        self._sizes = sizes
+
+    def __getattr__(self, key):
+        try:
+            size = self._sizes[key]
+        except KeyError:
+            raise AttributeError(key) from None
+        font = self._assets.font(self._name, size)
+        setattr(self, key, font)  # later lookups find the attribute without coming back here
+        return font
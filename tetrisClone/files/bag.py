@@ -1,18 +1,35 @@
-from random import shuffle
+import random
+from collections import deque
+from itertools import islice
 
-PIECES = [i for i in range(7)]
+PIECES = tuple(range(7))
 
 
 class Bag:
     """
-    Class to cycle through 7 numbers in a pseudo-random order. This is an implementation of the tetris 7-bag
+    Class to cycle through 7 numbers in a pseudo-random order. This is an implementation of the tetris 7-bag.
+    The order only depends on the seed (or random.Random instance) given, so games can be reproduced
     """
-    def __init__(self):
-        temp1 = PIECES.copy()
-        shuffle(temp1)
-        temp2 = PIECES.copy()
-        shuffle(temp2)
-        self._queue = temp1 + temp2
+    def __init__(self, seed=None, rng=None):
+        """
+        :param seed: (int) seed for the shuffles, a random one is picked (and kept in self.seed) if neither this nor
+        rng are given
+        :param rng: (random.Random) generator to shuffle with instead of creating one from seed
+        """
+        if rng is None:
+            if seed is None:
+                seed = random.getrandbits(32)
+            rng = random.Random(seed)
+        self.seed = seed
+        self._rng = rng
+        self._queue = deque()
+        self._refill()
+        self._refill()
+
+    def _refill(self):
+        temp = list(PIECES)
+        self._rng.shuffle(temp)
+        self._queue.extend(temp)
 
     def next(self):
         """
@@ -20,10 +37,8 @@ class Bag:
         :return: one of the 7 tetromino objects
         """
         if len(self._queue) <= len(PIECES):
-            temp = PIECES.copy()
-            shuffle(temp)
-            self._queue += temp
-        return self._queue.pop(0)
+            self._refill()
+        return self._queue.popleft()
 
     def show_next_n(self, n: int):
         """
@@ -31,4 +46,14 @@ class Bag:
         :param n: integer from 1-7
         :return: (tuple) of integers representing the next n inputs
         """
-        return tuple(self._queue[:n])
+        return tuple(islice(self._queue, n))
+
+    def take(self, n: int):
+        """
+        returns the next n numbers at once, as if next was called n times (e.g. to precompute a simulation's pieces)
+        :param n: (int)
+        :return: (list) of integers
+        """
+        while len(self._queue) < n + len(PIECES):
+            self._refill()
+        return [self._queue.popleft() for _ in range(n)]
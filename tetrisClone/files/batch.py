@@ -0,0 +1,203 @@
+import numpy as np
+
+from files.bag import Bag
+from files.engine import SCORING_BASE_VALUES, BACK_TO_BACK_MULTIPLIER
+from files.playfield import WIDTH, HEIGHT
+import files.tetrominoes as tet
+
+# _CELLS[piece, rotation] is the 4 (dx, dy) offsets of a piece's blocks from its corner, pieces numbered like the bag
+_CELLS = np.array([tet.num_to_piece(n)._offsets for n in range(7)], dtype=np.int64)
+_ROW_INDEX = np.arange(HEIGHT)
+_LINE_VALUES = np.array([0] + [SCORING_BASE_VALUES[n] for n in range(1, 5)], dtype=np.int64)
+PIECE_CHUNK = 256  # pieces taken from each board's bag at a time
+
+
+class BatchPlayfield:
+    """
+    N playfields stored as one (N, HEIGHT, WIDTH) bool array, grid[board, y, x], so collision tests, placing pieces,
+    line clears and row compaction happen for every board in a single numpy call. Pieces are given as arrays of
+    bag numbers, rotations and corner positions with one entry per board, and blocks are only tracked as filled or
+    empty (no colours).
+    """
+    def __init__(self, n: int):
+        """
+        :param n: (int) number of boards
+        """
+        self.grid = np.zeros((n, HEIGHT, WIDTH), dtype=bool)
+        self._boards = np.arange(n)[:, None]
+
+    def _cells(self, pieces, rotations, xs, ys):
+        """
+        :return: (tuple) x and y arrays of shape (N, 4) with the absolute coordinates of every board's piece
+        """
+        offsets = _CELLS[pieces, rotations]
+        return np.asarray(xs)[:, None] + offsets[..., 0], np.asarray(ys)[:, None] - offsets[..., 1]
+
+    def fits(self, pieces, rotations, xs, ys):
+        """
+        same as Playfield.fits for every board at once
+        :param pieces: (np.ndarray) bag number (0-6) of each board's piece
+        :param rotations: (np.ndarray) rotation state of each board's piece
+        :param xs: (np.ndarray) corner x of each board's piece
+        :param ys: (np.ndarray) corner y of each board's piece
+        :return: (np.ndarray) of bool, whether the piece fits on each board
+        """
+        cx, cy = self._cells(pieces, rotations, xs, ys)
+        in_bounds = (cx >= 0) & (cx < WIDTH) & (cy >= 0) & (cy < HEIGHT)
+        filled = self.grid[self._boards, np.clip(cy, 0, HEIGHT - 1), np.clip(cx, 0, WIDTH - 1)]
+        return (in_bounds & ~filled).all(axis=1)
+
+    def get_landing(self, pieces, rotations, xs, ys):
+        """
+        same as Playfield.get_landing for every board at once, the pieces must fit where they are. Rather than moving
+        the pieces down a row at a time, this finds the highest filled square below every block of the piece
+        :return: (np.ndarray) lowest corner y each board's piece can be moved straight down to
+        """
+        cx, cy = self._cells(pieces, rotations, xs, ys)
+        # highest filled row at or below each square, -1 if the column is empty down to the floor
+        top_below = np.maximum.accumulate(np.where(self.grid, _ROW_INDEX[None, :, None], -1), axis=1)
+        below = np.clip(cy - 1, 0, HEIGHT - 1)
+        highest = np.where(cy > 0, top_below[self._boards, below, np.clip(cx, 0, WIDTH - 1)], -1)
+        return np.asarray(ys) - (cy - 1 - highest).min(axis=1)
+
+    def add_blocks(self, pieces, rotations, xs, ys, active=None):
+        """
+        same as Playfield.add_blocks for every board at once: fills the piece's squares (ignoring any out of bounds)
+        then removes full rows, moving everything above them down
+        :param active: (np.ndarray) of bool, boards to place on, all of them if None
+        :return: (np.ndarray) number of rows cleared on each board
+        """
+        cx, cy = self._cells(pieces, rotations, xs, ys)
+        placed = (cx >= 0) & (cx < WIDTH) & (cy >= 0) & (cy < HEIGHT)
+        if active is not None:
+            placed &= np.asarray(active)[:, None]
+        boards = np.broadcast_to(self._boards, placed.shape)
+        self.grid[boards[placed], cy[placed], cx[placed]] = True
+
+        full = self.grid.all(axis=2)
+        cleared = full.sum(axis=1)
+        changed = np.flatnonzero(cleared)
+        if changed.size:
+            # a stable sort on the full flags moves the remaining rows down in order and the full rows to the top,
+            # where they are emptied (same as deleting them and appending empty rows)
+            order = np.argsort(full[changed], axis=1, kind="stable")
+            grid = np.take_along_axis(self.grid[changed], order[:, :, None], axis=1)
+            grid[_ROW_INDEX[None, :] >= HEIGHT - cleared[changed, None]] = False
+            self.grid[changed] = grid
+        return cleared
+
+    def garbage_out(self):
+        """
+        same as Playfield.garbage_out for every board at once
+        :return: (np.ndarray) of bool
+        """
+        return self.grid[:, 20].any(axis=1)
+
+    def get_dimensions(self):
+        return WIDTH, HEIGHT
+
+
+class BatchEngine:
+    """
+    plays N games side by side for bots, where every step places each board's current piece by dropping it straight
+    down from the spawn height with a chosen rotation and x, scored like TetrisEngine (hard drop points, line clears,
+    combos, back to back tetrises and levels). T-spins can't happen since pieces are never rotated once they drop.
+    A placement that doesn't fit at the spawn height can't be dropped into, so it tops that board out and leaves its
+    field as it was. TetrisEngine has no such move (its pieces only go where they fit), and otherwise both end a game
+    the same way: once a block is left in the rows above the visible field. Finished boards are left untouched.
+    """
+    def __init__(self, seeds):
+        """
+        :param seeds: (iterable) one piece order seed per board (None for a random one)
+        """
+        self._bags = [Bag(seed) for seed in seeds]
+        self.seeds = [bag.seed for bag in self._bags]
+        n = len(self._bags)
+        self.n = n
+        self.field = BatchPlayfield(n)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.lines = np.zeros(n, dtype=np.int64)  # total lines cleared
+        self.pieces = np.zeros(n, dtype=np.int64)  # pieces placed
+        self.over = np.zeros(n, dtype=bool)
+        self._lines_left = self.level + 4
+        self._combo = np.full(n, -1, dtype=np.int64)
+        self._b2b = np.zeros(n, dtype=bool)
+        self._queue = None
+        self._queue_pos = PIECE_CHUNK
+        self.current = self._next_pieces()
+
+    def _next_pieces(self):
+        if self._queue_pos == PIECE_CHUNK:
+            self._queue = np.array([bag.take(PIECE_CHUNK) for bag in self._bags], dtype=np.int64).reshape(self.n, -1)
+            self._queue_pos = 0
+        pieces = self._queue[:, self._queue_pos]
+        self._queue_pos += 1
+        return pieces
+
+    def show_next(self):
+        """
+        :return: (np.ndarray) bag number of each board's next piece
+        """
+        if self._queue_pos == PIECE_CHUNK:
+            return np.array([bag.show_next_n(1)[0] for bag in self._bags], dtype=np.int64)
+        return self._queue[:, self._queue_pos]
+
+    def step(self, rotations, xs):
+        """
+        hard drops every unfinished board's current piece and deals the next ones
+        :param rotations: (np.ndarray) rotation state (0-3) to drop each board's piece in
+        :param xs: (np.ndarray) corner x to drop each board's piece from
+        :return: (np.ndarray) lines cleared on each board
+        """
+        rotations = np.asarray(rotations)
+        xs = np.asarray(xs)
+        ys = np.full(self.n, tet.SPAWN_Y)
+        active = ~self.over
+        fits = self.field.fits(self.current, rotations, xs, ys)
+        self.over |= active & ~fits
+        active &= fits
+
+        landing = self.field.get_landing(self.current, rotations, xs, ys)
+        self.score += np.where(active, SCORING_BASE_VALUES["HardDrop"] * (ys - landing), 0)
+        cleared = self.field.add_blocks(self.current, rotations, xs, landing, active)
+        self._score_lines(cleared, active)
+        self.over |= active & self.field.garbage_out()
+        self.pieces += active
+        self.current = self._next_pieces()
+        return cleared
+
+    def _score_lines(self, cleared, active):
+        """
+        vectorized version of TetrisEngine._handle_scoring, without t-spins
+        """
+        scored = active & (cleared > 0)
+        self._combo = np.where(active, np.where(scored, self._combo + 1, -1), self._combo)
+        increase = np.where(scored & (self._combo > 0), SCORING_BASE_VALUES["Combo"] * self.level * self._combo, 0)
+
+        tetris = scored & (cleared == 4)
+        b2b_value = (SCORING_BASE_VALUES[4] * self.level * BACK_TO_BACK_MULTIPLIER).astype(np.int64)
+        increase += np.where(tetris, np.where(self._b2b, b2b_value, SCORING_BASE_VALUES[4] * self.level), 0)
+        increase += np.where(scored & ~tetris, _LINE_VALUES[np.minimum(cleared, 4)] * self.level, 0)
+        self._b2b = np.where(scored, tetris, self._b2b)
+
+        self.lines += np.where(scored, cleared, 0)
+        self._lines_left -= np.where(scored, cleared, 0)
+        level_up = scored & (self._lines_left <= 0)
+        self.level += level_up
+        self._lines_left += np.where(level_up, self.level + 4, 0)
+        self.score += increase
+
+
+if __name__ == "__main__":
+    # throughput with random placements (tests/test_batch.py checks the boards against TetrisEngine)
+    import time
+
+    boards = 4096
+    generator = np.random.default_rng(0)
+    batch = BatchEngine(range(boards))
+    start = time.perf_counter()
+    while not batch.over.all():
+        batch.step(generator.integers(0, 4, boards), generator.integers(0, WIDTH - 3, boards))
+    elapsed = time.perf_counter() - start
+    print(f"{batch.pieces.sum() / elapsed:.0f} placements/s with {boards} boards")
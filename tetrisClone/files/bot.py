@@ -0,0 +1,91 @@
+import time
+from collections import namedtuple
+
+from files.engine import TetrisEngine, EVENT_PLACE
+from files.playfield import get_playfield_type
+from files.search import find_placements
+
+# weights of the features a placement is judged by; a placement's value is the sum of each feature times its weight
+Weights = namedtuple("Weights", ["holes", "bumpiness", "height", "lines"])
+DEFAULT_WEIGHTS = Weights(-0.35663, -0.184483, -0.510066, 0.760666)
+
+
+def get_features(field):
+    """
+    returns the features of a board used to judge placements
+    :param field: (Playfield)
+    :return: (tuple) holes (empty squares with a block somewhere above them), bumpiness (sum of height differences
+    between neighbouring columns) and aggregate height (sum of column heights)
+    """
+    width, height = field.get_dimensions()
+    holes = 0
+    heights = []
+    for x in range(width):
+        column_height = 0
+        for y in range(height - 1, -1, -1):
+            if not field.is_clear(x, y):
+                if not column_height:
+                    column_height = y + 1
+            elif column_height:
+                holes += 1
+        heights.append(column_height)
+    bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+    return holes, bumpiness, sum(heights)
+
+
+def evaluate(field, piece_type, placement, weights=DEFAULT_WEIGHTS):
+    """
+    places a piece on a copy of the field and returns how good the result is
+    :param field: (Playfield)
+    :param piece_type: (type) piece class
+    :param placement: (Placement) from files.search
+    :param weights: (Weights)
+    :return: (float) higher is better
+    """
+    trial = field.copy()
+    coords = [(placement.x + dx, placement.y - dy) for dx, dy in piece_type._offsets[placement.rotation]]
+    lines = trial.add_blocks(coords, piece_type.get_colour())
+    holes, bumpiness, height = get_features(trial)
+    return (weights.holes * holes + weights.bumpiness * bumpiness + weights.height * height +
+            weights.lines * lines)
+
+
+def choose_placement(field, piece_type, weights=DEFAULT_WEIGHTS):
+    """
+    :return: (Placement) best placement for the piece by the weights, or None if it can't move at all
+    """
+    placements = find_placements(field, piece_type)
+    if not placements:
+        return None
+    return max(placements, key=lambda placement: evaluate(field, piece_type, placement, weights))
+
+
+def play_game(weights=DEFAULT_WEIGHTS, seed=None, max_pieces=500, field_type="bitboard"):
+    """
+    plays a whole game headless, always taking the best placement by the weights
+    :param weights: (Weights) or any sequence of 4 numbers in the same order
+    :param seed: (int) piece order seed
+    :param max_pieces: (int) the game is stopped after this many pieces, since good weights can play forever
+    :param field_type: (str) playfield type name, see playfield.get_playfield_type
+    :return: (dict) of the weights, seed, score, lines, level reached, pieces placed, pieces per second and whether
+    the game ended by topping out
+    """
+    weights = Weights(*weights)
+    engine = TetrisEngine(field_type=get_playfield_type(field_type), seed=seed)
+    lines = 0
+    pieces = 0
+    start = time.perf_counter()
+    while not engine.over and pieces < max_pieces:
+        placement = choose_placement(engine.field, type(engine.current), weights)
+        if placement is None:
+            engine.over = True
+            break
+        for event in engine.apply_placement(placement):
+            if event[0] == EVENT_PLACE:
+                lines += event[1]
+        engine.events.clear()
+        pieces += 1
+    elapsed = time.perf_counter() - start
+    return {"weights": list(weights), "seed": engine.seed, "score": engine.score, "lines": lines,
+            "level": engine.level, "pieces": pieces, "pieces_per_sec": round(pieces / elapsed, 1) if elapsed else 0,
+            "topped_out": engine.over}
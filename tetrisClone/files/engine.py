@@ -0,0 +1,319 @@
+import random
+
+from files.bag import Bag
+from files.playfield import Playfield
+import files.tetrominoes as tet
+
+FPS = 60  # logic frames per second, should be multiple of 30 (but other speeds should work)
+
+SCORING_BASE_VALUES = {1: 100, 2: 300, 3: 500, 4: 800, "SoftDrop": 1, "HardDrop": 2, "Combo": 50,
+                       "TSpin0": 400, "TSpin1": 800, "TSpin2": 1200, "TSpin3": 1600}
+NUMBER_TO_WORD = {1: "SINGLE", 2: "DOUBLE", 3: "TRIPLE"}
+BACK_TO_BACK_MULTIPLIER = 1.5  # for tetris and t spins
+
+# versus mode: garbage lines sent to the opponent per line clear, t-spins send 2 per line and back to backs 1 more
+GARBAGE_SENT = {1: 0, 2: 1, 3: 2, 4: 4}
+GARBAGE_COLOUR = (130,) * 3
+
+# input flags, combined into a bitmask for the pressed argument of TetrisEngine.step
+LEFT = 1
+RIGHT = 2
+SOFT_DROP = 4
+HARD_DROP = 8
+ROTATE_RIGHT = 16
+ROTATE_LEFT = 32
+HOLD = 64
+
+# events reported by the engine, drained by whatever is rendering the game
+EVENT_SCORE = "SCORE"  # (EVENT_SCORE, score increase, level up)
+EVENT_TEXT = "TEXT"  # (EVENT_TEXT, big text, small text, alpha)
+EVENT_MOVE = "MOVE"  # (EVENT_MOVE,) current piece moved or rotated
+EVENT_PIECE = "PIECE"  # (EVENT_PIECE,) a new piece took the field
+EVENT_HOLD = "HOLD"  # (EVENT_HOLD,) held piece changed
+EVENT_PLACE = "PLACE"  # (EVENT_PLACE, lines cleared) a piece was locked into the playfield
+EVENT_ATTACK = "ATTACK"  # (EVENT_ATTACK, lines) garbage lines to send to the opponent in versus mode
+
+
+class TetrisEngine:
+    """
+    the rules of tetris without any rendering; owns the bag, playfield, current piece and game state, and advances one
+    frame per call to step. Anything happening in a frame that a renderer might care about is appended to events.
+    """
+    # Define movement constants (auto repeat of held keys is timed by files.inputs and passed in as shift and drops)
+    MIN_PLACE_DELAY = 30  # Frames you get to move pieces after a rotation or drop
+    MAX_HOLDS = 2
+
+    def __init__(self, infinity=False, max_rotates=15, field_type=Playfield, seed=None):
+        """
+        :param infinity: (bool) if rotations can always reset the place delay
+        :param max_rotates: (int) how many rotations reset the place delay otherwise
+        :param field_type: (type) playfield class to use, e.g. Playfield or BitboardPlayfield
+        :param seed: (int) seed for the piece order, random if None (the seed used is kept in self.seed)
+        """
+        self._options = {"INFINITY": infinity, "MAX_ROTATES": max_rotates, "FIELD_TYPE": field_type}
+        self.events = []
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """
+        starts a new game
+        :param seed: (int) seed for the piece order, random if None
+        """
+        self.bag = Bag(seed)
+        self.seed = self.bag.seed
+        self._garbage_rng = random.Random(self.seed)  # picks the gap column of received garbage
+        self.pending_garbage = 0  # garbage lines received but not added to the field yet
+        self.field = self._options["FIELD_TYPE"]()
+        self.current = tet.num_to_piece(self.bag.next())(self.field)
+        self.held = None
+        self.level = 1
+        self.score = 0
+        self.lines = 0  # total lines cleared
+        self.frame = 0
+        self.over = False
+        self.game_state = {"lines": self._lines_to_next(), "next_move": self._get_next_move(),
+                           "rotates_left": self._options["MAX_ROTATES"], "combo_count": -1,
+                           "b2b": False, "holds": 0, "place_delay": 0}
+        self.events.clear()
+
+    def get_options(self):
+        """
+        :return: (dict) the settings the engine was created with ("INFINITY", "MAX_ROTATES" and "FIELD_TYPE")
+        """
+        return dict(self._options)
+
+    def step(self, pressed=0, shift=0, drops=0):
+        """
+        advances the game by one frame
+        :param pressed: (int) bitmask of input flags pressed this frame. They are applied in this order: moves,
+        rotations, soft drop, hard drop, then hold. So a hold pressed along with a hard drop holds the piece that
+        comes in after the dropped one. A key can only be pressed once per frame (see files.inputs for how a second
+        press is kept for the next frame)
+        :param shift: (int) columns held keys move the piece by after the presses, negative to the left. The piece
+        goes as far as it can in one move, so anything past the wall (e.g. WIDTH for instant auto repeat) stops there
+        :param drops: (int) rows held soft drop moves the piece down by after that, scored like single soft drops
+        :return: (list) of events that happened since the events were last cleared
+        """
+        if self.over:
+            return self.events
+        if pressed:
+            self._handle_input(pressed)
+        if (shift or drops) and not self.over:
+            self._handle_repeats(shift, drops)
+
+        self.game_state["next_move"] -= 1
+        self.game_state["place_delay"] -= 1
+        if self.game_state["next_move"] <= 0 and not self.over:
+            self.game_state["next_move"] = self._get_next_move()
+            if not self.current.drop():
+                if self.game_state["place_delay"] <= 0:
+                    self._place_piece()
+            else:
+                self.events.append((EVENT_MOVE,))
+        self.frame += 1
+        return self.events
+
+    def apply_placement(self, placement):
+        """
+        moves the current piece straight to a placement found by files.search and locks it in with a hard drop, for
+        bots that don't need the inputs played out frame by frame (soft drop points along the path aren't scored)
+        :param placement: (Placement)
+        :return: (list) of events, as with step
+        """
+        self.current.set_position(placement.x, placement.y, placement.rotation,
+                                  "ROTATE" if placement.t_spin else "DROP")
+        return self.step(HARD_DROP)
+
+    def receive_garbage(self, lines):
+        """
+        queues garbage lines from an opponent. They rise from the bottom the next time a piece is placed without
+        clearing lines, and lines sent back before then cancel them out first
+        :param lines: (int)
+        """
+        self.pending_garbage += lines
+
+    def _handle_input(self, pressed):
+        # hard drop and hold are handled last so the other inputs of the same frame apply to the piece being placed,
+        # and hold comes after hard drop so pressing both places the piece and then holds the next one
+        if pressed & LEFT:
+            if self.current.left():
+                self._move_helper()
+        if pressed & RIGHT:
+            if self.current.right():
+                self._move_helper()
+        if pressed & ROTATE_RIGHT:
+            self.current.rotate_right()
+            self._rotate_helper()
+        if pressed & ROTATE_LEFT:
+            self.current.rotate_left()
+            self._rotate_helper()
+        if pressed & SOFT_DROP:
+            if self.current.drop():
+                self._drop_helper()
+        if pressed & HARD_DROP:
+            self._increment_score(SCORING_BASE_VALUES["HardDrop"] * self.current.hard_drop())
+            self._place_piece()
+        if pressed & HOLD and not self.over:
+            if self.game_state["holds"] < self.MAX_HOLDS:
+                self._handle_hold()
+
+    def _handle_hold(self):
+        self.game_state["holds"] += 1
+        if self.held is None:
+            self.held = self.current
+            self._next_piece()
+        else:
+            self.held, self.current = self.current, self.held
+            self.current.reset()
+            self._reset_current()
+        self.events.append((EVENT_HOLD,))
+
+    def _rotate_helper(self):
+        """
+        runs whenever a piece rotates, updates needed values after rotations
+        """
+        self.events.append((EVENT_MOVE,))
+        if self.game_state["rotates_left"] >= 0:
+            self.game_state["place_delay"] = self.MIN_PLACE_DELAY
+            if not self._options["INFINITY"]:
+                self.game_state["rotates_left"] -= 1
+
+    def _move_helper(self):
+        """
+        runs whenever a piece moves. updates needed values for movement
+        """
+        self.events.append((EVENT_MOVE,))
+
+    def _drop_helper(self, rows=1):
+        self.events.append((EVENT_MOVE,))
+        self._increment_score(SCORING_BASE_VALUES["SoftDrop"] * rows)
+        self.game_state["place_delay"] = self.MIN_PLACE_DELAY
+
+    def _handle_repeats(self, shift, drops):
+        """
+        applies all the auto repeated movement owed this frame at once
+        """
+        if shift and self.current.shift(shift):
+            self._move_helper()
+        if drops:
+            rows = self.current.soft_drop(drops)
+            if rows:
+                self._drop_helper(rows)
+
+    def _get_next_move(self):
+        # return either FPS - level * FPS // 10 (linear decrease from 1 second to 0 seconds over 15 levels)
+        # or minimum of 1 frame (at 60 fps, this would drop the entire board length in 1/3 seconds)
+        return max(FPS - (self.level - 1) * FPS // 20, 1)
+
+    def _lines_to_next(self):
+        return 4 + self.level
+
+    def _increment_score(self, val, level_up=False):
+        self.score += val
+        self.events.append((EVENT_SCORE, val, level_up))
+
+    def _reset_current(self):
+        """
+        updates values whenever a new piece takes the field
+        """
+        self.game_state["rotates_left"] = self._options["MAX_ROTATES"]
+        self.game_state["next_move"] = self._get_next_move()
+        self.events.append((EVENT_PIECE,))
+
+    def _next_piece(self):
+        """
+        gets the next piece
+        """
+        self.current = tet.num_to_piece(self.bag.next())(self.field)
+        self._reset_current()
+
+    def _place_piece(self):
+        self.game_state["holds"] = 0  # only reset this when piece is placed
+
+        # placing a piece also clears lines, need to test t-spin before clearing/checking if lines will be cleared
+        is_t_spin = (type(self.current) == tet.TPiece and self.current.get_last_action() == "ROTATE" and
+                     self.current.t_spin_corners_satisfied())
+        lines_cleared = self.current.place()
+        topped_out = False
+        if lines_cleared > 0:
+            self.lines += lines_cleared
+            self.game_state["combo_count"] += 1
+            back_to_back = self.game_state["b2b"] and (lines_cleared == 4 or is_t_spin)
+            self._handle_scoring(lines_cleared, is_t_spin)
+            self._send_garbage(lines_cleared, is_t_spin, back_to_back)
+        else:
+            self.game_state["combo_count"] = -1
+            if is_t_spin:
+                score_increase = SCORING_BASE_VALUES["TSpin0"]
+                self.events.append((EVENT_TEXT, "T-SPIN", f"(+ {score_increase})", 800))
+                self._increment_score(score_increase, False)
+            if self.pending_garbage:
+                topped_out = self.field.insert_garbage(self.pending_garbage, self._garbage_rng.randrange(10),
+                                                       GARBAGE_COLOUR)
+                self.pending_garbage = 0
+        self.events.append((EVENT_PLACE, lines_cleared))
+
+        if topped_out or self.field.garbage_out():
+            self.over = True
+        self._next_piece()
+
+    def _send_garbage(self, lines, is_t_spin, back_to_back):
+        """
+        works out the garbage a line clear sends, cancelling out received garbage first
+        """
+        attack = lines * 2 if is_t_spin else GARBAGE_SENT[lines]
+        if back_to_back:
+            attack += 1
+        cancelled = min(attack, self.pending_garbage)
+        self.pending_garbage -= cancelled
+        if attack > cancelled:
+            self.events.append((EVENT_ATTACK, attack - cancelled))
+
+    def _handle_scoring(self, lines, is_t_spin):
+        score_increase = 0
+        level_up = False
+        if self.game_state["combo_count"] > 0:
+            combo_bonus = SCORING_BASE_VALUES["Combo"] * self.level * self.game_state["combo_count"]
+            score_increase += combo_bonus
+            text2 = f"{self.game_state['combo_count']} COMBO "
+        else:
+            text2 = ""
+
+        if lines == 4:
+            if self.game_state["b2b"]:
+                # multiplier is a float
+                score_increase += int(SCORING_BASE_VALUES[4] * self.level * BACK_TO_BACK_MULTIPLIER)
+                text1 = "TETRIS "
+                text2 = "B2B "
+                text_alpha = 950
+            else:
+                score_increase += SCORING_BASE_VALUES[4] * self.level
+                text1 = f"TETRIS"
+                text_alpha = 860
+                self.game_state["b2b"] = True
+        elif is_t_spin:
+            if self.game_state["b2b"]:
+                score_increase += int(SCORING_BASE_VALUES["TSpin" + str(lines)] * self.level * BACK_TO_BACK_MULTIPLIER)
+                text1 = f"T-SPIN {NUMBER_TO_WORD[lines]}"
+                text2 = "B2B "
+                text_alpha = 980
+            else:
+                score_increase += SCORING_BASE_VALUES["TSpin" + str(lines)] * self.level
+                text1 = f"T-SPIN {NUMBER_TO_WORD[lines]}"
+                text_alpha = 860
+                self.game_state["b2b"] = True
+        else:
+            self.game_state["b2b"] = False
+            score_increase += SCORING_BASE_VALUES[lines] * self.level
+            text1 = f"{NUMBER_TO_WORD[lines]}"
+            text_alpha = 800
+
+        text2 += f"(+ {score_increase})"
+
+        self.game_state["lines"] -= lines
+        if self.game_state["lines"] <= 0:
+            self.level += 1
+            self.game_state["lines"] += self._lines_to_next()
+            level_up = True
+        self._increment_score(score_increase, level_up)
+        self.events.append((EVENT_TEXT, text1, text2, text_alpha))
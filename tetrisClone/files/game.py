@@ -1,10 +1,20 @@
+import os
+
 import pygame as pg
-from files.bag import Bag
-from files.playfield import Playfield
+
+from files.playfield import Playfield, get_playfield_type
+from files.engine import TetrisEngine, FPS
+import files.engine as eng
 import files.tetrominoes as tet
+from files.sprites import SPRITES
+from files.text import TEXT_CACHE, DigitAtlas
+from files.timing import FixedStepClock
+from files.replay import Replay, ReplayRecorder
+from files.inputs import InputHandler, DAS, ARR, SOFT_DROP_ARR
+from files.profiler import FrameProfiler
+from files.assets import Assets, FontSet
 
 WINDOW_SIZE = 930, 840
-FPS = 60  # should be multiple of 30 (but other speeds should work)
 
 GRID_WIDTH = 4
 SQUARE_SIZE = 40
@@ -25,6 +35,9 @@ HOLD_SIZE = 190, 140
 HOLD_COORDS = 30, 20
 TEXT_BOX_SIZE = 250, 200
 TEXT_LOCATION = 0, 200
+PROFILER_SIZE = 220, 190
+PROFILER_COORDS = 15, 630
+PROFILER_KEY = pg.K_F3  # toggles the profiler overlay
 
 MARGIN = 15
 TEXT_COLOUR = (255,) * 3
@@ -34,41 +47,26 @@ GRID_COLOUR = (30,) * 3
 EMPTY_COLOUR = (10,) * 3
 
 VOLUME = 0.1
-SCORING_BASE_VALUES = {1: 100, 2: 300, 3: 500, 4: 800, "SoftDrop": 1, "HardDrop": 2, "Combo": 50,
-                       "TSpin0": 400, "TSpin1": 800, "TSpin2": 1200, "TSpin3": 1600}
-NUMBER_TO_WORD = {1: "SINGLE", 2: "DOUBLE", 3: "TRIPLE"}
-BACK_TO_BACK_MULTIPLIER = 1.5  # for tetris and t spins
 
 GHOST_ALPHA = 50  # transparency for ghost pieces if enabled
+PIECE_COLOURS = tuple(tet.num_to_piece(n).get_colour() for n in range(7))
 
-pg.init()
-pg.font.init()
-FONT = pg.font.SysFont('Lucon.ttf', FONT_SIZE)
-BIG_FONT = pg.font.SysFont('Lucon.ttf', FONT_SIZE + 10)
-SMALL_FONT = pg.font.SysFont('Lucon.ttf', FONT_SIZE - 9)
-
+GAME_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-def get_high_score():
-    try:
-        with open("high_score.txt", "r") as f:
-            return int(f.read())
-    except FileNotFoundError:
-        with open("high_score.txt", "w") as f:
-            f.write("0")
-            return 0
-
-
-def write_high_score(num):
-    if num > get_high_score():
-        with open("high_score.txt", "w") as f:
-            f.write(str(num))
+# pygame is only started and the fonts only loaded once the game window is created (or a font is first used), so
+# importing this module stays cheap
+ASSETS = Assets(os.path.join(GAME_FOLDER, "font_cache.json"))
+FONTS = FontSet(ASSETS, 'Lucon.ttf', normal=FONT_SIZE, big=FONT_SIZE + 10, small=FONT_SIZE - 9,
+                profiler=FONT_SIZE - 20)
 
 
 # following classes for certain surfaces are tightly coupled to the game window, and are placed here for organization
 class SurfaceField:
     """
-    sprite representing the game field in tetris, not the data structure
+    sprite representing the game field in tetris, not the data structure. Only squares that changed since the last
+    update are repainted, using a cached background of empty squares and the grid
     """
+    OVERLAY_KEY = (255, 0, 255)  # colour key for the transparent parts of the grid overlay
 
     def __init__(self, playfield: Playfield, cur_piece: tet.Piece):
         self.surface = pg.Surface([FIELD_SIZE[0] + GRID_WIDTH // 2, FIELD_SIZE[1] + GRID_WIDTH // 2])
@@ -76,22 +74,100 @@ class SurfaceField:
         self._cur_piece = cur_piece  # reference to current piece object (should not ever be none)
         self._ghost_coords = self._cur_piece.get_ghost_coords()
 
+        self._background = pg.Surface(self.surface.get_size())
+        self._background.fill(EMPTY_COLOUR)
+        self._draw_grid(self._background)
+        self._grid_overlay = pg.Surface(self.surface.get_size())
+        self._grid_overlay.fill(self.OVERLAY_KEY)
+        self._draw_grid(self._grid_overlay)
+        self._grid_overlay.set_colorkey(self.OVERLAY_KEY)
+
+        # every visible square's rect on the surface, top 2 rows are not rendered
+        self._cell_rects = {(x, y): pg.Rect(x * SQUARE_SIZE, FIELD_SIZE[1] - (y + 1) * SQUARE_SIZE, SQUARE_SIZE,
+                                            SQUARE_SIZE)
+                            for x in range(GRID_DIMENSIONS[0]) for y in range(FIELD_SIZE[1] // SQUARE_SIZE)}
+        # block (rgb), ghost (rgba) or block under ghost ((rgb, rgba)) colour -> pre-rendered square with the grid
+        self._tiles = {}
+        SPRITES.preload(PIECE_COLOURS, SQUARE_SIZE, ghost_alpha=GHOST_ALPHA)
+        for colour in PIECE_COLOURS:
+            self._get_tile(colour)
+            self._get_tile(colour + (GHOST_ALPHA,))
+            self._get_tile((colour, colour + (GHOST_ALPHA,)))
+        self._blit_sequence = []
+
+        self._drawn = {}  # (x, y) -> colour currently painted on that square, empty squares are left out
+        self._field_cells = {}  # (x, y) -> colour of placed blocks, rebuilt only when the playfield changes
+        self._overlay_cells = {}  # squares covered by the current piece and ghost in the last update
+        self._field_dirty = True
+        self._full_redraw = True
+
     def set_cur_piece(self, cur_piece):
         self._cur_piece = cur_piece
         self._ghost_coords = self._cur_piece.get_ghost_coords()
 
+    def field_changed(self):
+        """
+        marks the placed blocks as changed (i.e. after a piece was placed or lines were cleared)
+        """
+        self._field_dirty = True
+
+    def invalidate(self):
+        """
+        forces the next update to repaint the whole surface, needed after drawing over it (e.g. the pause text)
+        """
+        self._full_redraw = True
+
     def update(self, ghost):
         """
-        clears and redraws the field, current piece, and the grid (but not the ghost)
-        im sure there's a way to make this more optimized, but it probably doesn't matter on most computers
-        :return:
+        repaints the squares whose contents changed since the last update (placed blocks, current piece and ghost)
+        :return: (list) of pg.Rect areas of the surface that were repainted
         """
-        self.surface.fill(EMPTY_COLOUR)
-        self._draw_field()
-        self._draw_piece(self._cur_piece)
-        self._draw_grid()
+        colour = self._cur_piece.get_colour()
+        overlay = {cell: colour for cell in self._cur_piece.get_coordinates()}
         if ghost:
-            self._draw_ghost()
+            # the ghost goes on top, tinting the piece where they overlap (i.e. when the piece is on the ground)
+            ghost_colour = colour + (GHOST_ALPHA,)
+            for cell in self._ghost_coords:
+                overlay[cell] = (colour, ghost_colour) if cell in overlay else ghost_colour
+
+        if self._full_redraw:
+            self.surface.blit(self._background, (0, 0))
+            self._drawn.clear()
+            self._field_cells = self._get_field_cells()
+            self._field_dirty = False
+            dirty = set(self._field_cells) | set(overlay)
+        else:
+            dirty = set(self._overlay_cells)
+            dirty.update(overlay)
+            if self._field_dirty:
+                old_cells = self._field_cells
+                self._field_cells = self._get_field_cells()
+                self._field_dirty = False
+                dirty.update(old_cells.keys() ^ self._field_cells.keys())
+                dirty.update(cell for cell, contents in self._field_cells.items() if old_cells.get(cell) != contents)
+        self._overlay_cells = overlay
+
+        rects = []
+        sequence = self._blit_sequence
+        for cell in dirty:
+            contents = overlay.get(cell) or self._field_cells.get(cell)
+            rect = self._cell_rects.get(cell)
+            if rect is None or self._drawn.get(cell) == contents:
+                continue
+            if contents is None:
+                sequence.append((self._background, rect, rect))
+                del self._drawn[cell]
+            else:
+                sequence.append((self._tiles.get(contents) or self._get_tile(contents), rect))
+                self._drawn[cell] = contents
+            rects.append(rect)
+        self.surface.blits(sequence, False)
+        sequence.clear()
+
+        if self._full_redraw:
+            self._full_redraw = False
+            return [self.surface.get_rect()]
+        return rects
 
     def calculate_ghost(self):
         """
@@ -100,57 +176,61 @@ class SurfaceField:
         """
         self._ghost_coords = self._cur_piece.get_ghost_coords()
 
-    def _draw_ghost(self):
-        for x, y in self._ghost_coords:
-            x = x * SQUARE_SIZE
-            y = FIELD_SIZE[1] - (y + 1) * SQUARE_SIZE
-            self._draw_rect_alpha(self._cur_piece.get_colour() + (GHOST_ALPHA,),
-                                  pg.Rect(x, y, SQUARE_SIZE, SQUARE_SIZE))
-
-    def _draw_rect_alpha(self, colour, rect):
-        shape_surf = pg.Surface(pg.Rect(rect).size, pg.SRCALPHA)
-        pg.draw.rect(shape_surf, colour, shape_surf.get_rect())
-        self.surface.blit(shape_surf, rect)
-
-    def _draw_field(self):
+    def _get_field_cells(self):
+        cells = {}
         width, height = GRID_DIMENSIONS
-        for i in range(height):
-            for j in range(width):
-                contents = self._field.get_contents(j, height - i - 1)
+        for y in range(height):
+            for x in range(width):
+                contents = self._field.get_contents(x, y)
                 if contents is not None:
-                    self._draw_block(j, height - i - 1, contents)
-
-    def _draw_block(self, x, y, colour):
-        x = x * SQUARE_SIZE
-        y = FIELD_SIZE[1] - (y + 1) * SQUARE_SIZE
-        pg.draw.rect(self.surface, colour, pg.Rect(x, y, SQUARE_SIZE, SQUARE_SIZE))
-
-    def _draw_piece(self, piece):
-        coords = piece.get_coordinates()
-        colour = piece.get_colour()
-        for x, y in coords:
-            x = x * SQUARE_SIZE
-            y = FIELD_SIZE[1] - (y + 1) * SQUARE_SIZE
-            pg.draw.rect(self.surface, colour, pg.Rect(x, y, SQUARE_SIZE, SQUARE_SIZE))
-
-    def _draw_grid(self):
+                    cells[x, y] = contents
+        return cells
+
+    def _get_tile(self, contents):
+        """
+        returns (rendering and caching it the first time) a square painted with a block (rgb colour) with the grid
+        drawn over it, a ghost block (rgba colour) drawn over an empty square and the grid, or a ghost drawn over a block
+        and the grid ((rgb, rgba) pair)
+        :return: (pg.Surface)
+        """
+        tile = self._tiles.get(contents)
+        if tile is None:
+            # squares are identical apart from their contents, so any one square's area of the background works
+            area = pg.Rect(SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
+            if len(contents) == 2:
+                tile = self._get_tile(contents[0]).copy()
+                tile.blit(SPRITES.ghost(contents[1], SQUARE_SIZE), (0, 0))
+            elif len(contents) == 4:
+                tile = self._background.subsurface(area).copy()
+                tile.blit(SPRITES.ghost(contents, SQUARE_SIZE), (0, 0))
+            else:
+                tile = SPRITES.block(contents, SQUARE_SIZE).copy()
+                tile.blit(self._grid_overlay, (0, 0), area)
+            self._tiles[contents] = tile
+        return tile
+
+    @staticmethod
+    def _draw_grid(surface):
         for x in range(GRID_DIMENSIONS[0] + 1):
             x *= SQUARE_SIZE
-            pg.draw.line(self.surface, GRID_COLOUR, (x, 0), (x, FIELD_SIZE[1]), GRID_WIDTH)
+            pg.draw.line(surface, GRID_COLOUR, (x, 0), (x, FIELD_SIZE[1]), GRID_WIDTH)
 
         for y in range(GRID_DIMENSIONS[1] + 1):
             y *= SQUARE_SIZE
-            pg.draw.line(self.surface, GRID_COLOUR, (0, y), (FIELD_SIZE[0] + GRID_WIDTH, y), GRID_WIDTH)
+            pg.draw.line(surface, GRID_COLOUR, (0, y), (FIELD_SIZE[0] + GRID_WIDTH, y), GRID_WIDTH)
 
 
 class SurfaceScore:
     """
     Class for score/level UI element
     """
-    static_text_1 = FONT.render("SCORE:", True, TEXT_COLOUR)
-    static_text_2 = FONT.render("LEVEL:", True, TEXT_COLOUR)
+    static_text_1 = "SCORE:"
+    static_text_2 = "LEVEL:"
+    digits = None  # DigitAtlas, made with the first SurfaceScore
 
     def __init__(self):
+        if SurfaceScore.digits is None:
+            SurfaceScore.digits = DigitAtlas(FONTS.normal, TEXT_COLOUR)
         self.surface = pg.Surface(SCORE_SIZE)
         self.score = 0
         self.level = 1
@@ -171,27 +251,29 @@ class SurfaceScore:
 
     def _render(self):
         self.surface.fill(GRID_COLOUR)
-        score_text = FONT.render(str(self.score), True, TEXT_COLOUR)
-        level_text = FONT.render(str(self.level), True, TEXT_COLOUR)
-        score_x_pos = SCORE_SIZE[0] - score_text.get_rect().width - MARGIN
-        level_x_pos = SCORE_SIZE[0] - level_text.get_rect().width - MARGIN
-        self.surface.blit(self.static_text_1, (15, MARGIN))
-        self.surface.blit(score_text, (score_x_pos, FONT_SIZE + MARGIN))
-        self.surface.blit(level_text, (level_x_pos, FONT_SIZE * 2 + MARGIN * 3))
-        self.surface.blit(self.static_text_2, (15, FONT_SIZE * 2 + MARGIN * 3))
+        score_text = str(self.score)
+        level_text = str(self.level)
+        score_x_pos = SCORE_SIZE[0] - self.digits.get_width(score_text) - MARGIN
+        level_x_pos = SCORE_SIZE[0] - self.digits.get_width(level_text) - MARGIN
+        self.surface.blit(ASSETS.label(FONTS.normal, self.static_text_1, TEXT_COLOUR), (15, MARGIN))
+        self.digits.draw(self.surface, score_text, (score_x_pos, FONT_SIZE + MARGIN))
+        self.digits.draw(self.surface, level_text, (level_x_pos, FONT_SIZE * 2 + MARGIN * 3))
+        self.surface.blit(ASSETS.label(FONTS.normal, self.static_text_2, TEXT_COLOUR), (15, FONT_SIZE * 2 + MARGIN * 3))
 
 
 class SurfaceHold:
     """
     Class for displaying held piece
     """
-    static_text = FONT.render("HOLD:", True, TEXT_COLOUR)
+    static_text = "HOLD:"
     text_pos = (45, MARGIN)
 
     def __init__(self, size=HOLD_SIZE):
+        # the size and border the pieces are drawn with in _draw_graphic_on
+        SPRITES.preload(PIECE_COLOURS, int(SQUARE_SIZE // 1.2), 2)
         self.surface = pg.Surface(size)
         self.surface.fill(GRID_COLOUR)
-        self.surface.blit(self.static_text, self.text_pos)
+        self.surface.blit(ASSETS.label(FONTS.normal, self.static_text, TEXT_COLOUR), self.text_pos)
 
     def update(self, held: tet.Piece):
         """
@@ -208,22 +290,19 @@ class SurfaceHold:
 
     def _clear(self):
         self.surface.fill(GRID_COLOUR)
-        self.surface.blit(self.static_text, self.text_pos)
+        self.surface.blit(ASSETS.label(FONTS.normal, self.static_text, TEXT_COLOUR), self.text_pos)
 
     def _draw_graphic_on(self, colour, size, coords, offset, border):
-        for x, y in coords:
-            x = x * size + offset[0]
-            y = y * size + FONT_SIZE + offset[1]
-            if border > 0:
-                pg.draw.rect(self.surface, (0, 0, 0), pg.Rect(x, y, size, size))
-            pg.draw.rect(self.surface, colour, pg.Rect(x + border, y + border, size - border * 2, size - border * 2))
+        sprite = SPRITES.block(colour, int(size), border)
+        self.surface.blits([(sprite, (int(x * size + offset[0]), int(y * size + FONT_SIZE + offset[1])))
+                            for x, y in coords], False)
 
 
 class SurfaceNext(SurfaceHold):
     """
     Class for displaying next pieces
     """
-    static_text = FONT.render("NEXT:", True, TEXT_COLOUR)
+    static_text = "NEXT:"
     text_pos = (50, MARGIN)
 
     def __init__(self, bag, size=NEXT_SIZE):
@@ -259,13 +338,14 @@ class SurfaceText:
     def __init__(self):
         self.surface = pg.Surface(TEXT_BOX_SIZE)
         self.surface.fill(BG_COLOUR)
-        self.text1 = "PLACEHOLDER"
-        self.text2 = "TEXT"
         self.alpha = 0
+        self._drawn_alpha = None  # alpha the text was last drawn with, None if it has to be redrawn
+        self.write("PLACEHOLDER", "TEXT", 0)
 
     def write(self, text1, text2, alpha):
         """
-        sets the main text and subtext and alpha values
+        sets the main text and subtext and alpha values. The text is only rendered here (and cached), fading it out
+        just changes the alpha of the rendered surfaces
         :param text1: (str) large text to be shown on top
         :param text2: (str) small text to display score or combo info
         :param alpha: (int) positive integer to represent how long to display/how transparent the text is
@@ -274,325 +354,323 @@ class SurfaceText:
         self.text1 = text1
         self.text2 = text2
         self.alpha = alpha
+        self._text1 = TEXT_CACHE.render(FONTS.big, text1, TEXT_COLOUR)
+        if self._text1.get_rect().width > 250:
+            self._text1 = TEXT_CACHE.render(FONTS.normal, text1, TEXT_COLOUR)
+        self._text2 = TEXT_CACHE.render(FONTS.small, text2, TEXT_COLOUR)
+        self._drawn_alpha = None
         self.update()
 
-    def update(self):
+    def update(self, steps=1):
         """
-        renders the text onto surface and lowers the transparency
-        :return: (nothing)
+        draws the text onto surface and lowers the transparency. Nothing is redrawn while the visible alpha (which
+        stays at 255 for most of the time the text is shown) has not changed
+        :param steps: (int) logic steps since the last update, the text fades by FADE_RATE per step
+        :return: (bool) whether the surface changed
         """
+        alpha = max(0, min(self.alpha, 255))
+        self.alpha -= self.FADE_RATE * steps
+        if alpha == self._drawn_alpha:
+            return False
+        self._drawn_alpha = alpha
+
         self.surface.fill(BG_COLOUR)
-        text1 = BIG_FONT.render(self.text1, True, TEXT_COLOUR)
-        if text1.get_rect().width > 250:
-            text1 = FONT.render(self.text1, True, TEXT_COLOUR)
-        text1.set_alpha(self.alpha)
-        text2 = SMALL_FONT.render(self.text2, True, TEXT_COLOUR)
-        text2.set_alpha(self.alpha)
+        # cached surfaces are shared, so the alpha is set right before every blit
+        self._text1.set_alpha(alpha)
+        self._text2.set_alpha(alpha)
+
+        line1_x_pos = TEXT_BOX_SIZE[0] - self._text1.get_rect().width - MARGIN
+        line2_x_pos = TEXT_BOX_SIZE[0] - self._text2.get_rect().width - MARGIN
+
+        self.surface.blit(self._text1, (line1_x_pos, MARGIN))
+        self.surface.blit(self._text2, (line2_x_pos, FONT_SIZE + MARGIN))
+        return True
+
+
+class SurfaceProfiler:
+    """
+    Class for the debug overlay showing the frame profiler's averages over the last second
+    """
+    REFRESH_FRAMES = 15  # frames between redraws, so the numbers are readable and cheap to draw
+
+    def __init__(self):
+        self.surface = pg.Surface(PROFILER_SIZE)
+        self._frames_left = 0
+        self._lines = ()  # text of the lines drawn, a line is only rendered again when its text changes
+        self._line_surfaces = {}  # line index -> rendered text of self._lines
 
-        line1_x_pos = TEXT_BOX_SIZE[0] - text1.get_rect().width - MARGIN
-        line2_x_pos = TEXT_BOX_SIZE[0] - text2.get_rect().width - MARGIN
+    def update(self, profiler):
+        """
+        :param profiler: (FrameProfiler)
+        :return: (bool) whether the surface changed
+        """
+        self._frames_left -= 1
+        if self._frames_left > 0:
+            return False
+        self._frames_left = self.REFRESH_FRAMES
+        summary = profiler.get_summary(FPS)
+        lines = ()
+        if summary:
+            lines = (f"FRAME {summary['frame_ms']:.2f} ms", f"  MAX {summary['max_frame_ms']:.2f} ms",
+                     f"INPUT {summary['input_ms']:.2f} ms", f"LOGIC {summary['logic_ms']:.2f} ms",
+                     f"RENDER {summary['render_ms']:.2f} ms", f"ALLOC {summary['blocks']:+.0f} / frame",
+                     f"GC {summary['collections']} / sec")
+        if lines == self._lines:
+            return False
+        # the overlay's own rendering shows up in the numbers it draws, so it only renders the lines that changed
+        old_lines = self._lines
+        self._lines = lines
+        self.surface.fill(GRID_COLOUR)
+        for i, line in enumerate(lines):
+            if i >= len(old_lines) or old_lines[i] != line:
+                self._line_surfaces[i] = FONTS.profiler.render(line, True, TEXT_COLOUR)
+            self.surface.blit(self._line_surfaces[i], (MARGIN, MARGIN // 2 + i * 25))
+        return True
 
-        self.surface.blit(text1, (line1_x_pos, MARGIN))
-        self.surface.blit(text2, (line2_x_pos, FONT_SIZE + MARGIN))
-        self.alpha -= self.FADE_RATE
+    def clear(self):
+        self.surface.fill(BG_COLOUR)
+        self._frames_left = 0
+        self._lines = ()
 
 
 class TetrisGame:
     """
-    class for tetris game window; instantiating object will run an instance of the game
+    class for tetris game window; instantiating object will run an instance of the game. The rules themselves live in
+    TetrisEngine, this class only turns key presses into engine inputs and draws the engine's state
     """
-    # Define movement constants
-    MOVE_DELAY = 10  # Frames between continuous movements
-    MOVE_REPEAT = 3  # Frames between subsequent continuous movements
-    SOFT_DROP_SPEED = 2  # Frames between subsequent drops in a soft drop
-    MIN_PLACE_DELAY = 30  # Frames you get to move pieces after a rotation or drop
-    MAX_HOLDS = 2
-
-    def __init__(self, infinity=False, ghost=True, max_rotates=15, music=None):
+    KEY_BINDINGS = {pg.K_LEFT: eng.LEFT, pg.K_RIGHT: eng.RIGHT, pg.K_DOWN: eng.SOFT_DROP, pg.K_SPACE: eng.HARD_DROP,
+                    pg.K_x: eng.ROTATE_RIGHT, pg.K_UP: eng.ROTATE_RIGHT, pg.K_z: eng.ROTATE_LEFT, pg.K_c: eng.HOLD}
+
+    def __init__(self, infinity=False, ghost=True, max_rotates=15, music=None, field_type="list", seed=None,
+                 record=None, replay=None, profile=None, profile_stream=False, das=DAS, arr=ARR,
+                 soft_drop_arr=SOFT_DROP_ARR, leaderboard=None):
+        """
+        :param record: (str) path to save a replay of each game to, None to not record
+        :param replay: (str) path of a replay to play back instead of taking keyboard input
+        :param profile: (str) CSV file for per frame timings, None to only profile once the overlay is shown
+        :param profile_stream: (bool) write every frame to the profile file as it happens rather than the last
+        frames on exit
+        :param das: (float) ms left or right is held before the piece starts sliding
+        :param arr: (float) ms between moves while sliding, 0 to go straight to the wall
+        :param soft_drop_arr: (float) ms between drops while soft drop is held, 0 to drop straight down
+        :param leaderboard: (Leaderboard) from the shared leaderboard module (see main.load_leaderboard), scores are
+        added to it and it is closed when the window is. None to not keep scores
+        """
+        ASSETS.init()
         self.display = pg.display.set_mode(WINDOW_SIZE)
         self.display.fill(BG_COLOUR)
         pg.display.set_caption("Tetris 2.1")
-        self._options = {"INFINITY": infinity, "GHOST": ghost, "MAX_ROTATES": max_rotates}
+        self._options = {"GHOST": ghost}
         if music is not None:  # I don't plan on writing a soundtrack, so only one song will play :D
             pg.mixer.music.load(music)
             pg.mixer.music.set_volume(VOLUME)
             pg.mixer.music.play(-1)
 
-        self.bag = Bag()
-        self.field = Playfield()
-        self.current = tet.num_to_piece(self.bag.next())(self.field)
-        self.held = None
-        self.level = 1
-        self.game_state = {"lines": self._lines_to_next(), "next_move": self._get_next_move(), "move_timer": 0,
-                           "drop_timer": 0, "rotates_left": max_rotates, "combo_count": -1, "b2b": False,
-                           "holds": 0, "place_delay": 0}
-        self._surface_field = SurfaceField(self.field, self.current)
-        self.display.blit(self._surface_field.surface, FIELD_COORDS)
+        self._record_path = record
+        self._recorder = None
+        self._input = InputHandler(das, arr, soft_drop_arr=soft_drop_arr)
+        self._events = []  # events other than bound keys taken off the queue since the last frame
+        self._playback = None  # iterator of recorded (pressed, shift, drops) inputs when playing a replay back
+        self._replaying = replay is not None
+        if replay is not None:
+            replay = Replay.load(replay)
+            self.engine = replay.create_engine(get_playfield_type(field_type))
+            self._playback = replay.inputs()
+        else:
+            self.engine = TetrisEngine(infinity, max_rotates, get_playfield_type(field_type), seed)
+        self._clock = FixedStepClock(FPS)
+        self._leaderboard = leaderboard
+        self._profile_path = profile
+        self._profiler = None
+        if profile is not None:
+            self._profiler = FrameProfiler(csv_path=profile if profile_stream else None)
+        self._surface_profiler = SurfaceProfiler()
+        self._show_profiler = False
+        self._create_surfaces()
+        self.running = True
+        self._start()
+        if self._leaderboard is not None:
+            self._leaderboard.close()
+        if self._profiler is not None:
+            if self._profile_path is not None and not profile_stream:
+                self._profiler.dump(self._profile_path)
+            self._profiler.close()
+
+    def _create_surfaces(self):
+        if self._record_path is not None:
+            self._recorder = ReplayRecorder(self.engine)
+        self._dirty_rects = []  # areas of the display changed since the last frame
+        self._full_flip = True  # next frame updates the whole display rather than just the dirty areas
+        self._surface_field = SurfaceField(self.engine.field, self.engine.current)
         self._surface_score = SurfaceScore()
-        self.display.blit(self._surface_score.surface, SCORE_COORDS)
+        self._blit(self._surface_score.surface, SCORE_COORDS)
         self._surface_hold = SurfaceHold()
-        self.display.blit(self._surface_hold.surface, HOLD_COORDS)
-        self._surface_next = SurfaceNext(self.bag)
-        self.display.blit(self._surface_next.surface, NEXT_COORDS)
+        self._blit(self._surface_hold.surface, HOLD_COORDS)
+        self._surface_next = SurfaceNext(self.engine.bag)
+        self._blit(self._surface_next.surface, NEXT_COORDS)
         self._surface_text = SurfaceText()
-        self.running = True
-        self.over = False
-        self._start()
+
+    def _blit(self, surface, coords, area=None):
+        """
+        blits onto the display and remembers the changed area so only it gets sent to the screen this frame
+        """
+        self._dirty_rects.append(self.display.blit(surface, coords, area))
 
     def _start(self):
         self.render_hs()
 
-        while self.running and not self.over:
-            for event in pg.event.get():
+        self._clock.reset()
+        self._input.reset()
+        while self.running and not self.engine.over:
+            steps = self._clock.tick()
+            profiler = self._profiler
+            if profiler is not None:
+                profiler.start_frame()
+            self._pump_events()
+            for event in self._events:
                 if event.type == pg.QUIT:
                     self.running = False
                 elif event.type == pg.KEYDOWN:
-                    self._handle_input(event.key)
-            self._handle_held(pg.key.get_pressed())
-
-            self.game_state["next_move"] -= 1
-            self.game_state["place_delay"] -= 1
-            if self.game_state["next_move"] <= 0:
-                self.game_state["next_move"] = self._get_next_move()
-                if not self.current.drop():
-                    if self.game_state["place_delay"] <= 0:
-                        self._place_piece()
+                    if event.key == pg.K_ESCAPE:
+                        self.pause()
+                    elif event.key == PROFILER_KEY:
+                        self._toggle_profiler()
+            self._events.clear()
+            # everything owed since the last logic step goes into the first step of this frame, and stays with the
+            # input handler when there is no step this frame
+            inputs = self._input.update() if steps else None
+            if profiler is not None:
+                profiler.mark("input")
+            for _ in range(steps):
+                if self._playback is not None:
+                    inputs = next(self._playback, None)
+                    if inputs is None:  # replay finished
+                        self.engine.over = True
+                        break
+                self.engine.step(*inputs)
+                if self._recorder is not None:
+                    self._recorder.record(*inputs)
+                inputs = (0, 0, 0)
+                if self.engine.over:
+                    break
+            self._handle_events()
+            self._clock.logic_done()
+            if profiler is not None:
+                profiler.mark("logic")
 
             self._update_field()
 
-            if self._surface_text.alpha > -10:
-                self._surface_text.update()
-                self.display.blit(self._surface_text.surface, TEXT_LOCATION)
+            if steps and self._surface_text.alpha > -10 and self._surface_text.update(steps):
+                self._blit(self._surface_text.surface, TEXT_LOCATION)
+            if self._show_profiler and self._profiler is not None and self._surface_profiler.update(self._profiler):
+                self._blit(self._surface_profiler.surface, PROFILER_COORDS)
 
-            pg.display.flip()
-            pg.time.Clock().tick(FPS)
-
-        write_high_score(self._surface_score.score)
-        if self.over and self.running:
+            if self._full_flip:
+                pg.display.flip()
+                self._full_flip = False
+            else:
+                pg.display.update(self._dirty_rects)
+            self._dirty_rects.clear()
+            self._clock.render_done()
+            if profiler is not None:
+                profiler.mark("render")
+                profiler.end_frame(steps)
+            self._clock.wait(self._pump_events)
+
+        if self._replaying:
+            # replays don't count towards the high score, and there is no next game to restart into
+            if self.running:
+                self.pause(text="REPLAY OVER")
+            return
+        if self._recorder is not None:
+            self._recorder.save(self._record_path)
+        if self.engine.score > 0 and self._leaderboard is not None:
+            self._leaderboard.add(self.engine.score, level=self.engine.level, lines=self.engine.lines)
+        if self.engine.over and self.running:
             self.pause(text="GAME OVER")
             self.restart()
 
+    def _pump_events(self):
+        """
+        takes everything off the event queue, handing bound key presses and releases to the input handler with the
+        time they were taken off the queue and keeping the other events for the frame to handle. The loop calls this
+        while it waits between frames too, so DAS and ARR are timed to within the poll interval rather than a frame
+        """
+        now = self._input.now()
+        for event in pg.event.get():
+            if event.type == pg.KEYDOWN and event.key in self.KEY_BINDINGS:
+                self._input.key_down(self.KEY_BINDINGS[event.key], now)
+            elif event.type == pg.KEYUP and event.key in self.KEY_BINDINGS:
+                self._input.key_up(self.KEY_BINDINGS[event.key], now)
+            else:
+                self._events.append(event)
+
+    def _toggle_profiler(self):
+        """
+        shows or hides the profiler overlay, starting the profiler the first time it is shown
+        """
+        self._show_profiler = not self._show_profiler
+        if self._profiler is None:
+            self._profiler = FrameProfiler()
+        if not self._show_profiler:
+            self._surface_profiler.clear()
+            self._blit(self._surface_profiler.surface, PROFILER_COORDS)
+
     def restart(self):
-        self.bag = Bag()
-        self.field = Playfield()
-        self.current = tet.num_to_piece(self.bag.next())(self.field)
-        self.held = None
-        self.level = 1
-        self.game_state = {"lines": self._lines_to_next(), "next_move": self._get_next_move(), "move_timer": 0,
-                           "drop_timer": 0, "rotates_left": self._options["MAX_ROTATES"], "combo_count": -1,
-                           "b2b": False, "holds": 0, "place_delay": 0}
-        self._surface_field = SurfaceField(self.field, self.current)
-        self.display.blit(self._surface_field.surface, FIELD_COORDS)
-        self._surface_score = SurfaceScore()
-        self.display.blit(self._surface_score.surface, SCORE_COORDS)
-        self._surface_hold = SurfaceHold()
-        self.display.blit(self._surface_hold.surface, HOLD_COORDS)
-        self._surface_next = SurfaceNext(self.bag)
-        self.display.blit(self._surface_next.surface, NEXT_COORDS)
-        self._surface_text = SurfaceText()
-        self.over = False
+        self.engine.reset()
+        self._create_surfaces()
         self._start()
 
+    def _handle_events(self):
+        """
+        updates the surfaces affected by whatever happened in the engine since the last frame
+        """
+        profiler = self._profiler
+        for event in self.engine.events:
+            match event[0]:
+                case eng.EVENT_SCORE:
+                    self._increment_score(event[1], event[2])
+                    if event[2] and profiler is not None:
+                        profiler.note("level up")
+                case eng.EVENT_TEXT:
+                    self._surface_text.write(event[1], event[2], event[3])
+                case eng.EVENT_MOVE:
+                    self._surface_field.calculate_ghost()
+                case eng.EVENT_PLACE:
+                    self._surface_field.field_changed()
+                    if event[1] and profiler is not None:
+                        profiler.note(f"{event[1]} lines")
+                case eng.EVENT_PIECE:
+                    self._surface_field.set_cur_piece(self.engine.current)
+                    self._surface_next.update()
+                    self._blit(self._surface_next.surface, NEXT_COORDS)
+                case eng.EVENT_HOLD:
+                    self._surface_hold.update(self.engine.held)
+                    self._blit(self._surface_hold.surface, HOLD_COORDS)
+        self.engine.events.clear()
+
     def _update_field(self):
-        self._surface_field.update(self._options["GHOST"])
-        self.display.blit(self._surface_field.surface, FIELD_COORDS)
+        for rect in self._surface_field.update(self._options["GHOST"]):
+            self._blit(self._surface_field.surface, rect.move(FIELD_COORDS), rect)
 
     def _increment_score(self, val, level_up=False):
         self._surface_score.update(val, level_up)
-        self.display.blit(self._surface_score.surface, SCORE_COORDS)
-
-    def _handle_input(self, key):
-        match key:
-            case pg.K_ESCAPE:
-                self.pause()
-            case pg.K_LEFT:
-                self.game_state["move_timer"] = 0
-                if self.current.left():
-                    self._move_helper()
-            case pg.K_RIGHT:
-                self.game_state["move_timer"] = 0
-                if self.current.right():
-                    self._move_helper()
-            case pg.K_DOWN:
-                self.game_state["drop_timer"] = 0
-                if self.current.drop():
-                    self._drop_helper()
-            case pg.K_SPACE:
-                self._increment_score(SCORING_BASE_VALUES["HardDrop"] * self.current.hard_drop())
-                self._place_piece()
-            case pg.K_x | pg.K_UP:
-                self.current.rotate_right()
-                self._rotate_helper()
-            case pg.K_z:
-                self.current.rotate_left()
-                self._rotate_helper()
-            case pg.K_c:
-                if self.game_state["holds"] < self.MAX_HOLDS:
-                    self._handle_hold()
-
-    def _handle_hold(self):
-        self.game_state["holds"] += 1
-        if self.held is None:
-            self.held = self.current
-            self._next_piece()
-        else:
-            self.held, self.current = self.current, self.held
-            self.current.__init__(self.field)
-            self._reset_current()
-        self._surface_hold.update(self.held)
-        self.display.blit(self._surface_hold.surface, HOLD_COORDS)
-
-    def _rotate_helper(self):
-        """
-        runs whenever a piece rotates, updates needed values after rotations
-        """
-        self._surface_field.calculate_ghost()
-        if self.game_state["rotates_left"] >= 0:
-            self.game_state["place_delay"] = self.MIN_PLACE_DELAY
-            if not self._options["INFINITY"]:
-                self.game_state["rotates_left"] -= 1
-
-    def _move_helper(self):
-        """
-        runs whenever a piece moves. updates needed values for movement
-        """
-        self._surface_field.calculate_ghost()
-
-    def _drop_helper(self):
-        self._increment_score(SCORING_BASE_VALUES["SoftDrop"])
-        self.game_state["place_delay"] = self.MIN_PLACE_DELAY
-
-    def _handle_held(self, keys):
-        if keys[pg.K_LEFT] and keys[pg.K_RIGHT]:
-            pass
-        elif keys[pg.K_LEFT]:
-            self.game_state["move_timer"] += 1
-            if self.game_state["move_timer"] >= self.MOVE_DELAY:
-                self.game_state["move_timer"] -= self.MOVE_REPEAT
-                if self.current.left():
-                    self._move_helper()
-        elif keys[pg.K_RIGHT]:
-            self.game_state["move_timer"] += 1
-            if self.game_state["move_timer"] >= self.MOVE_DELAY:
-                self.game_state["move_timer"] -= self.MOVE_REPEAT
-                if self.current.right():
-                    self._move_helper()
-        if keys[pg.K_DOWN]:
-            self.game_state["drop_timer"] += 1
-            if self.game_state["drop_timer"] >= self.MOVE_DELAY:
-                self.game_state["drop_timer"] -= self.SOFT_DROP_SPEED
-                if self.current.drop():
-                    self._drop_helper()
-
-    def _get_next_move(self):
-        # return either FPS - level * FPS // 10 (linear decrease from 1 second to 0 seconds over 15 levels)
-        # or minimum of 1 frame (at 60 fps, this would drop the entire board length in 1/3 seconds)
-        return max(FPS - (self.level - 1) * FPS // 20, 1)
-
-    def _lines_to_next(self):
-        return 4 + self.level
-
-    def _reset_current(self):
-        """
-        updates values whenever a new piece takes the field
-        """
-        self.game_state["rotates_left"] = self._options["MAX_ROTATES"]
-        self.game_state["next_move"] = self._get_next_move()
-        self._surface_field.set_cur_piece(self.current)
-        self._surface_next.update()
-        self.display.blit(self._surface_next.surface, NEXT_COORDS)
-
-    def _next_piece(self):
-        """
-        gets the next piece
-        """
-        self.current = tet.num_to_piece(self.bag.next())(self.field)
-        self._reset_current()
-
-    def _place_piece(self):
-        self.game_state["holds"] = 0  # only reset this when piece is placed
-
-        # placing a piece also clears lines, need to test t-spin before clearing/checking if lines will be cleared
-        is_t_spin = (type(self.current) == tet.TPiece and self.current.get_last_action() == "ROTATE" and
-                     self.current.t_spin_corners_satisfied())
-        lines_cleared = self.current.place()
-        if lines_cleared > 0:
-            self.game_state["combo_count"] += 1
-            self._handle_scoring(lines_cleared, is_t_spin)
-        else:
-            self.game_state["combo_count"] = -1
-            if is_t_spin:
-                score_increase = SCORING_BASE_VALUES["TSpin0"]
-                self._surface_text.write("T-SPIN", f"(+ {score_increase})", 800)
-                self._increment_score(score_increase, False)
-
-        if self.field.garbage_out():
-            self.over = True
-        self._next_piece()
-
-    def _handle_scoring(self, lines, is_t_spin):
-        score_increase = 0
-        level_up = False
-        if self.game_state["combo_count"] > 0:
-            combo_bonus = SCORING_BASE_VALUES["Combo"] * self.level * self.game_state["combo_count"]
-            score_increase += combo_bonus
-            text2 = f"{self.game_state['combo_count']} COMBO "
-        else:
-            text2 = ""
-
-        if lines == 4:
-            if self.game_state["b2b"]:
-                # multiplier is a float
-                score_increase += int(SCORING_BASE_VALUES[4] * self.level * BACK_TO_BACK_MULTIPLIER)
-                text1 = "TETRIS "
-                text2 = "B2B "
-                text_alpha = 950
-            else:
-                score_increase += SCORING_BASE_VALUES[4] * self.level
-                text1 = f"TETRIS"
-                text_alpha = 860
-                self.game_state["b2b"] = True
-        elif is_t_spin:
-            if self.game_state["b2b"]:
-                pass
-                score_increase += int(SCORING_BASE_VALUES["TSpin" + str(lines)] * self.level * BACK_TO_BACK_MULTIPLIER)
-                text1 = f"T-SPIN {NUMBER_TO_WORD[lines]}"
-                text2 = "B2B "
-                text_alpha = 980
-            else:
-                score_increase += SCORING_BASE_VALUES["TSpin" + str(lines)] * self.level
-                text1 = f"T-SPIN {NUMBER_TO_WORD[lines]}"
-                text_alpha = 860
-                self.game_state["b2b"] = True
-        else:
-            self.game_state["b2b"] = False
-            score_increase += SCORING_BASE_VALUES[lines] * self.level
-            text1 = f"{NUMBER_TO_WORD[lines]}"
-            text_alpha = 800
-
-        text2 += f"(+ {score_increase})"
-
-        self.game_state["lines"] -= lines
-        if self.game_state["lines"] <= 0:
-            self.level += 1
-            self.game_state["lines"] += self._lines_to_next()
-            level_up = True
-        self._increment_score(score_increase, level_up)
-        self._surface_text.write(text1, text2, text_alpha)
+        self._blit(self._surface_score.surface, SCORE_COORDS)
 
     def render_hs(self):
         hs_surface = pg.Surface(HSCORE_SIZE)
         hs_surface.fill(GRID_COLOUR)
-        text = FONT.render("HIGH SCORE:", True, TEXT_COLOUR)
-        score_text = FONT.render(str(get_high_score()), True, TEXT_COLOUR)
+        text = ASSETS.label(FONTS.normal, "HIGH SCORE:", TEXT_COLOUR)
+        high_score = 0 if self._leaderboard is None else self._leaderboard.get_high_score()
+        score_text = FONTS.normal.render(str(high_score), True, TEXT_COLOUR)
         score_x_pos = SCORE_SIZE[0] - score_text.get_rect().width - MARGIN
         hs_surface.blit(text, (15, MARGIN))
         hs_surface.blit(score_text, (score_x_pos, FONT_SIZE + MARGIN))
-        self.display.blit(hs_surface, HSCORE_COORDS)
+        self._blit(hs_surface, HSCORE_COORDS)
 
     def pause(self, text="GAME PAUSED"):
-        message = BIG_FONT.render(text, True, TEXT_COLOUR)
-        sub_message = FONT.render("Press Escape to Continue", True, TEXT_COLOUR)
+        message = ASSETS.label(FONTS.big, text, TEXT_COLOUR)
+        sub_message = ASSETS.label(FONTS.normal, "Press Escape to Continue", TEXT_COLOUR)
         message_pos = FIELD_SIZE[0] // 2 - message.get_rect().width // 2, FIELD_SIZE[1] // 2 - 50
         sub_message_pos = FIELD_SIZE[0] // 2 - sub_message.get_rect().width // 2, FIELD_SIZE[1] // 2 + 50
         self._surface_field.surface.blit(message, message_pos)
@@ -607,3 +685,8 @@ class TetrisGame:
                 elif event.type == pg.KEYDOWN:
                     if event.key == pg.K_ESCAPE:
                         paused = False
+        self._surface_field.invalidate()
+        self._clock.reset()
+        self._input.reset()
+        if self._profiler is not None:
+            self._profiler.discard()
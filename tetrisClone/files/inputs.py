@@ -0,0 +1,169 @@
+import time
+
+from files.engine import LEFT, RIGHT, SOFT_DROP
+from files.playfield import WIDTH, HEIGHT
+
+# auto repeat timings in milliseconds (these used to be counted in 60 fps frames: 10, 3 and 2 frames)
+DAS = 167  # delayed auto shift: how long left or right is held before the piece starts sliding
+ARR = 50  # auto repeat rate: time between moves once sliding, 0 shifts the piece straight to the wall
+SOFT_DROP_DELAY = 167  # how long soft drop is held before the piece keeps dropping
+SOFT_DROP_ARR = 33  # time between drops after that, 0 drops the piece as far as it goes without locking it
+
+
+class KeyRepeat:
+    """
+    the repeat schedule of one held key: once the key has been down for delay ms a repeat is owed, and another every
+    interval ms after that. The schedule runs on the press and release timestamps rather than on frames, so a slow
+    frame doesn't delay anything, the repeats it missed are just owed together the next time they are taken
+    """
+    def __init__(self, delay, interval, limit):
+        """
+        :param delay: (float) ms before the first repeat
+        :param interval: (float) ms between repeats, 0 for as many as limit as soon as the delay has passed
+        :param limit: (int) most repeats that can be of any use at once (e.g. the width of the playfield)
+        """
+        self.delay = delay
+        self.interval = interval
+        self.limit = limit
+        self._down_at = None  # timestamp of the press, None while the key is up
+        self._up_at = None  # timestamp of the release, kept until the repeats before it have been taken
+        self._taken = 0  # repeats already taken since the press
+
+    def press(self, now):
+        self._down_at = now
+        self._up_at = None
+        self._taken = 0
+
+    def release(self, now):
+        if self._down_at is not None:
+            self._up_at = now
+
+    def clear(self):
+        """
+        forgets the key was ever pressed
+        """
+        self._down_at = self._up_at = None
+        self._taken = 0
+
+    def is_down(self):
+        return self._down_at is not None and self._up_at is None
+
+    def take(self, now):
+        """
+        :param now: (float) ms timestamp
+        :return: (int) repeats owed by now (or by the release, if that came first) that haven't been taken yet
+        """
+        if self._down_at is None:
+            return 0
+        end = now if self._up_at is None else min(now, self._up_at)
+        held_for = end - self._down_at
+        if held_for < self.delay:
+            owed = 0
+        elif self.interval <= 0:
+            owed = self._taken + self.limit  # always as far as possible, e.g. for each new piece that spawns
+        else:
+            owed = min(1 + int((held_for - self.delay) // self.interval), self._taken + self.limit)
+        repeats = owed - self._taken
+        self._taken = owed
+        if self._up_at is not None and end == self._up_at:
+            self._down_at = self._up_at = None
+        return repeats
+
+
+class InputHandler:
+    """
+    turns timestamped key presses and releases into the inputs of TetrisEngine.step. Presses are passed on as they
+    are, while held movement keys are repeated on the DAS and ARR schedules (in ms), and everything owed since the last
+    update is handed over at once as a shift and a number of drops for a single engine step.
+
+    A key pressed more than once between two updates is handed over once per update, so each press still counts (the
+    engine takes presses as a bitmask per frame, which can only hold a key once).
+    Key events should be passed on with the time they happened (or were taken off the event queue) rather than the
+    time of the frame that handles them, otherwise the schedules are only as precise as the frame rate.
+
+    usage, once per frame:
+        for each key event: handler.key_down(flag, timestamp) / handler.key_up(flag, timestamp)
+        pressed, shift, drops = handler.update()
+        engine.step(pressed, shift, drops)  (later steps in the same frame get no input)
+    """
+    def __init__(self, das=DAS, arr=ARR, soft_drop_delay=SOFT_DROP_DELAY, soft_drop_arr=SOFT_DROP_ARR,
+                 timer=time.perf_counter):
+        """
+        :param das: (float) ms left or right is held before it repeats
+        :param arr: (float) ms between repeated moves, 0 to shift straight to the wall
+        :param soft_drop_delay: (float) ms soft drop is held before it repeats
+        :param soft_drop_arr: (float) ms between repeated drops, 0 to drop straight down
+        :param timer: function returning the current time in seconds, used when no timestamp is given
+        """
+        self._timer = timer
+        self._presses = []  # input flags pressed since the last update that haven't been handed over, in order
+        self._left = KeyRepeat(das, arr, WIDTH)
+        self._right = KeyRepeat(das, arr, WIDTH)
+        self._soft_drop = KeyRepeat(soft_drop_delay, soft_drop_arr, HEIGHT)
+        self._repeats = {LEFT: self._left, RIGHT: self._right, SOFT_DROP: self._soft_drop}
+
+    def now(self):
+        """
+        :return: (float) the current time in ms, on the same clock as the default timestamps
+        """
+        return self._timer() * 1000
+
+    def key_down(self, flag, now=None):
+        """
+        :param flag: (int) engine input flag of the key
+        :param now: (float) ms timestamp of the press, the current time if None
+        """
+        if now is None:
+            now = self.now()
+        self._presses.append(flag)
+        repeat = self._repeats.get(flag)
+        if repeat is not None:
+            repeat.press(now)
+
+    def key_up(self, flag, now=None):
+        """
+        :param flag: (int) engine input flag of the key
+        :param now: (float) ms timestamp of the release, the current time if None
+        """
+        if now is None:
+            now = self.now()
+        repeat = self._repeats.get(flag)
+        if repeat is None:
+            return
+        repeat.release(now)
+        other = self._right if flag == LEFT else self._left if flag == RIGHT else None
+        if other is not None and other.is_down():
+            # nothing moves while both directions are held, and letting go of one charges the other from the start
+            repeat.take(now)
+            other.press(now)
+
+    def update(self, now=None):
+        """
+        :param now: (float) ms timestamp to take the owed repeats up to, the current time if None
+        :return: (tuple) pressed bitmask, shift (columns, negative to the left) and drops owed since the last update
+        """
+        if now is None:
+            now = self.now()
+        pressed = 0
+        repeated = []  # presses of keys already in this update, kept for the next one
+        for flag in self._presses:
+            if pressed & flag:
+                repeated.append(flag)
+            else:
+                pressed |= flag
+        self._presses = repeated
+        left = self._left.take(now)
+        right = self._right.take(now)
+        if self._left.is_down() and self._right.is_down():
+            shift = 0
+        else:
+            shift = right - left
+        return pressed, shift, self._soft_drop.take(now)
+
+    def reset(self):
+        """
+        forgets every key (e.g. after the game was paused, when releases could have been missed)
+        """
+        self._presses.clear()
+        for repeat in self._repeats.values():
+            repeat.clear()
@@ -3,8 +3,129 @@ HEIGHT = 22
 # top 2 rows are invisible and not rendered
 # game ends as soon as piece lands and has blocks above 20th row (i.e. off screen).
 
+_shape_bottoms = {}  # shape -> (dx, dy) of its lowest block in each column, filled in by _get_bottoms
+_shape_spans = {}  # shape -> (leftmost dx, rightmost dx, lowest dy), filled in by _get_span
 
-class Playfield:
+
+def _get_bottoms(shape):
+    """
+    returns the lowest block of a shape in every column it covers, which are the only blocks that can land on the
+    surface of those columns
+    :param shape: (tuple) of (dy, bits) pairs, see Playfield.fits
+    :return: (tuple) of (dx, dy) pairs
+    """
+    bottoms = _shape_bottoms.get(shape)
+    if bottoms is None:
+        lowest = {}
+        for dy, bits in shape:
+            dx = 0
+            while bits:
+                if bits & 1:
+                    lowest[dx] = max(lowest.get(dx, dy), dy)
+                bits >>= 1
+                dx += 1
+        bottoms = _shape_bottoms[shape] = tuple(lowest.items())
+    return bottoms
+
+
+def _landing_from_heights(heights, shape, x, y):
+    """
+    finds where a shape lands from the column heights alone, which works as long as every column's lowest block is
+    above that column's surface (nothing can be in the way then)
+    :return: (int) landing y, or None if a block is under its column's surface and an overhang might be in the way
+    """
+    landing = 0
+    for dx, dy in _get_bottoms(shape):
+        surface = heights[x + dx] + dy  # corner y that puts this block right on top of its column
+        if surface > y:
+            return None
+        if surface > landing:
+            landing = surface
+    return landing
+
+
+def _get_span(shape):
+    """
+    returns the columns and the lowest row a shape has blocks in, which is all it takes to find how far it can slide
+    while it is above the stack
+    :param shape: (tuple) of (dy, bits) pairs, see Playfield.fits
+    :return: (tuple) of leftmost dx, rightmost dx and lowest dy
+    """
+    span = _shape_spans.get(shape)
+    if span is None:
+        bits = 0
+        for _, row_bits in shape:
+            bits |= row_bits
+        span = _shape_spans[shape] = ((bits & -bits).bit_length() - 1, bits.bit_length() - 1, max(dy for dy, _ in shape))
+    return span
+
+
+def _slide_from_heights(heights, shape, x, y, n):
+    """
+    finds where a shape moved sideways stops from the column heights alone, which works as long as the whole shape is
+    above the highest column (only the walls can be in the way then)
+    :return: (int) x the shape ends up at, or None if it is low enough that blocks might be in the way
+    """
+    left, right, bottom = _get_span(shape)
+    if y - bottom < max(heights):
+        return None
+    if n < 0:
+        return max(x + n, -left)
+    return min(x + n, WIDTH - 1 - right)
+
+
+class BasePlayfield:
+    """
+    what every playfield type shares: the column heights kept up to date as blocks are added, which the landing and
+    sliding shortcuts use. Subclasses store the blocks, raising _heights as they add them, and provide _copy_grid and
+    _get_column_top for copying and rescanning them
+    """
+    def __init__(self):
+        self._heights = [0] * WIDTH  # 1 + the highest filled row of each column, 0 for an empty column
+
+    def copy(self):
+        """
+        :return: independent copy of this playfield (of the same type), e.g. for a bot to try placements on
+        """
+        other = type(self).__new__(type(self))
+        other._heights = self._heights[:]
+        self._copy_grid(other)
+        return other
+
+    def _copy_grid(self, other):
+        """
+        gives other its own copy of this playfield's blocks
+        :param other: (BasePlayfield) of the same type, made without __init__
+        """
+        raise NotImplementedError
+
+    def _update_heights(self):
+        """
+        recalculates every column height, needed after line clears since a column's top block may have been cleared
+        """
+        heights = self._heights
+        get_column_top = self._get_column_top
+        for x in range(WIDTH):
+            heights[x] = get_column_top(x, heights[x] - 1) + 1
+
+    def _get_column_top(self, x, y):
+        """
+        :return: (int) highest filled row of column x at or below row y, -1 if there is none
+        """
+        raise NotImplementedError
+
+    def get_heights(self):
+        """
+        :return: (list) 1 + the highest filled row of each column (0 for an empty column)
+        """
+        return self._heights[:]
+
+    @staticmethod
+    def get_dimensions():
+        return WIDTH, HEIGHT
+
+
+class Playfield(BasePlayfield):
     """
     class representing the current screen of pieces/map of tetris game
     """
@@ -12,8 +133,18 @@ class Playfield:
         """
         creates a 2d array of HEIGHT rows with WIDTH columns, coordinate on the board is grid[y][x]
         """
+        super().__init__()
         self._grid = [[None for _ in range(WIDTH)] for _ in range(HEIGHT)]
 
+    def _copy_grid(self, other):
+        other._grid = [row[:] for row in self._grid]
+
+    def _get_column_top(self, x, y):
+        grid = self._grid
+        while y >= 0 and grid[y][x] is None:
+            y -= 1
+        return y
+
     def add_blocks(self, coords, colour):
         """
         adds pieces to board grid and removes row if necessary. Returns number of rows cleared
@@ -27,6 +158,8 @@ class Playfield:
             try:
                 self._grid[y][x] = colour
                 modified_rows.add(y)
+                if y >= self._heights[x]:
+                    self._heights[x] = y + 1
             except IndexError:
                 pass
 
@@ -40,8 +173,30 @@ class Playfield:
                 score += 1
             modified_rows.remove(y)
 
+        if score:
+            self._update_heights()
         return score
 
+    def insert_garbage(self, lines, gap, colour):
+        """
+        pushes everything up and fills the bottom rows with blocks except for one gap column (versus mode garbage)
+        :param lines: (int) number of rows to add
+        :param gap: (int) column left empty
+        :param colour: list or tuple; (r, g, b) values
+        :return: (boolean) true if blocks were pushed off the top of the playfield
+        """
+        lines = min(lines, HEIGHT)
+        pushed_out = any(element is not None for row in self._grid[HEIGHT - lines:] for element in row)
+        del self._grid[HEIGHT - lines:]
+        for _ in range(lines):
+            row = [colour] * WIDTH
+            row[gap] = None
+            self._grid.insert(0, row)
+        # everything moved up by lines, then the gap column may be lower than that
+        self._heights = [min(height + lines, HEIGHT) for height in self._heights]
+        self._update_heights()
+        return pushed_out
+
     def garbage_out(self):
         """
         returns true if there is a piece above row 20 (i.e. oob). Call this method after adding blocks
@@ -74,6 +229,58 @@ class Playfield:
             return self._grid[y][x] is None
         return False
 
+    def fits(self, shape, x: int, y: int):
+        """
+        returns true if every block of a shape is clear when the shape's top left corner is placed at x, y
+        :param shape: (tuple) of (dy, bits) pairs; bit i of bits is a block at column x + i on row y - dy
+        :param x: (int)
+        :param y: (int)
+        :return: (boolean)
+        """
+        for dy, bits in shape:
+            col = x
+            while bits:
+                if bits & 1 and not self.is_clear(col, y - dy):
+                    return False
+                bits >>= 1
+                col += 1
+        return True
+
+    def get_landing(self, shape, x: int, y: int):
+        """
+        returns the lowest y a shape that fits at x, y can be moved straight down to (i.e. where it would land)
+        :param shape: (tuple) of (dy, bits) pairs, see fits
+        :param x: (int)
+        :param y: (int)
+        :return: (int)
+        """
+        landing = _landing_from_heights(self._heights, shape, x, y)
+        if landing is not None:
+            return landing
+        # part of the shape is below the surface, so step down a row at a time in case it is under an overhang
+        while self.fits(shape, x, y - 1):
+            y -= 1
+        return y
+
+    def get_slide(self, shape, x: int, y: int, n: int):
+        """
+        returns the x a shape that fits at x, y ends up at when moved up to n columns sideways, stopping at the first
+        wall or block in the way
+        :param shape: (tuple) of (dy, bits) pairs, see fits
+        :param x: (int)
+        :param y: (int)
+        :param n: (int) columns to move, negative to the left
+        :return: (int)
+        """
+        target = _slide_from_heights(self._heights, shape, x, y, n)
+        if target is not None:
+            return target
+        step = 1 if n > 0 else -1
+        end = x + n
+        while x != end and self.fits(shape, x + step, y):
+            x += step
+        return x
+
     def _check_row(self, n):
         """
         returns true if row n is completely filled
@@ -85,6 +292,218 @@ class Playfield:
                 return False
         return True
 
-    @staticmethod
-    def get_dimensions():
-        return WIDTH, HEIGHT
+
+# each bitboard row keeps PAD wall bits on both sides of the WIDTH playable bits, so a shape mask can be shifted up to
+# PAD columns past either wall and still land on a set bit instead of needing separate bounds checks
+PAD = 4
+ROW_BITS = WIDTH + PAD * 2
+FULL_ROW = (1 << ROW_BITS) - 1
+EMPTY_ROW = FULL_ROW ^ (((1 << WIDTH) - 1) << PAD)
+
+
+class BitboardPlayfield(BasePlayfield):
+    """
+    alternate playfield where every row is an integer bitmask, so row-full checks and whole-piece collision tests are
+    a few integer operations. Colours are kept separately as piece ids in a bytearray (0 meaning empty).
+    Has the same public methods as Playfield and can be used anywhere a Playfield is expected.
+    """
+    def __init__(self):
+        """
+        creates HEIGHT empty rows (bit PAD + x of row y is the x, y square) and a WIDTH * HEIGHT colour id array
+        """
+        super().__init__()
+        self._rows = [EMPTY_ROW] * HEIGHT
+        self._ids = bytearray(WIDTH * HEIGHT)
+        self._palette = [None]  # id -> colour, id 0 is an empty square
+        self._colour_ids = {}
+
+    def _copy_grid(self, other):
+        other._rows = self._rows[:]
+        other._ids = self._ids[:]
+        other._palette = self._palette[:]
+        other._colour_ids = dict(self._colour_ids)
+
+    def _get_column_top(self, x, y):
+        rows = self._rows
+        bit = 1 << (x + PAD)
+        while y >= 0 and not rows[y] & bit:
+            y -= 1
+        return y
+
+    def add_blocks(self, coords, colour):
+        """
+        adds pieces to board grid and removes row if necessary. Returns number of rows cleared
+        :param coords: array of coordinates list or tuple: (x, y)
+        :param colour: list or tuple; (r, g, b) values
+        :return: (int) number of rows cleared
+        """
+        colour_id = self._get_colour_id(colour)
+        modified_rows = set()
+        for x, y in coords:
+            if 0 <= x < WIDTH and 0 <= y < HEIGHT:
+                self._rows[y] |= 1 << (x + PAD)
+                self._ids[y * WIDTH + x] = colour_id
+                modified_rows.add(y)
+                if y >= self._heights[x]:
+                    self._heights[x] = y + 1
+
+        # same naive line clear gravity as Playfield, clearing from the top so cleared rows don't shift first
+        score = 0
+        for y in sorted(modified_rows, reverse=True):
+            if self._rows[y] == FULL_ROW:
+                del self._rows[y]
+                self._rows.append(EMPTY_ROW)
+                del self._ids[y * WIDTH:(y + 1) * WIDTH]
+                self._ids.extend(bytes(WIDTH))
+                score += 1
+
+        if score:
+            self._update_heights()
+        return score
+
+    def insert_garbage(self, lines, gap, colour):
+        """
+        pushes everything up and fills the bottom rows with blocks except for one gap column (versus mode garbage)
+        :param lines: (int) number of rows to add
+        :param gap: (int) column left empty
+        :param colour: list or tuple; (r, g, b) values
+        :return: (boolean) true if blocks were pushed off the top of the playfield
+        """
+        colour_id = self._get_colour_id(colour)
+        lines = min(lines, HEIGHT)
+        pushed_out = any(row != EMPTY_ROW for row in self._rows[HEIGHT - lines:])
+        del self._rows[HEIGHT - lines:]
+        self._rows[:0] = [FULL_ROW ^ (1 << (gap + PAD))] * lines
+        row_ids = bytearray([colour_id] * WIDTH)
+        row_ids[gap] = 0
+        del self._ids[(HEIGHT - lines) * WIDTH:]
+        self._ids[:0] = row_ids * lines
+        # everything moved up by lines, then the gap column may be lower than that
+        self._heights = [min(height + lines, HEIGHT) for height in self._heights]
+        self._update_heights()
+        return pushed_out
+
+    def _get_colour_id(self, colour):
+        colour_id = self._colour_ids.get(colour)
+        if colour_id is None:
+            colour_id = len(self._palette)
+            self._palette.append(colour)
+            self._colour_ids[colour] = colour_id
+        return colour_id
+
+    def garbage_out(self):
+        """
+        returns true if there is a piece above row 20 (i.e. oob). Call this method after adding blocks
+        :return: (boolean)
+        """
+        return self._rows[20] != EMPTY_ROW
+
+    def get_contents(self, x: int, y: int):
+        """
+        returns tuple of colour of piece in x, y coordinate, or None, will raise exception if out of bounds
+        :param x: between 0 to WIDTH - 1
+        :param y: between 0 to HEIGHT - 1
+        :return: (r, g, b) or None
+        """
+        if not (0 <= x < WIDTH and 0 <= y < HEIGHT):
+            raise IndexError("playfield coordinate out of range")
+        return self._palette[self._ids[y * WIDTH + x]]
+
+    def is_clear(self, x: int, y: int):
+        """
+        returns true if there is an empty space at requested x, y position, false if it is occupied or out of bounds
+        :param x: (int)
+        :param y: (int)
+        :return: (boolean)
+        """
+        if 0 <= x < WIDTH and 0 <= y < HEIGHT:
+            return not self._rows[y] >> (x + PAD) & 1
+        return False
+
+    def fits(self, shape, x: int, y: int):
+        """
+        returns true if every block of a shape is clear when the shape's top left corner is placed at x, y
+        :param shape: (tuple) of (dy, bits) pairs; bit i of bits is a block at column x + i on row y - dy
+        :param x: (int)
+        :param y: (int)
+        :return: (boolean)
+        """
+        if not -PAD <= x <= WIDTH:
+            return False
+        shift = x + PAD
+        rows = self._rows
+        for dy, bits in shape:
+            row = y - dy
+            if not 0 <= row < HEIGHT or rows[row] & (bits << shift):
+                return False
+        return True
+
+    def get_landing(self, shape, x: int, y: int):
+        """
+        returns the lowest y a shape that fits at x, y can be moved straight down to (i.e. where it would land)
+        :param shape: (tuple) of (dy, bits) pairs, see fits
+        :param x: (int)
+        :param y: (int)
+        :return: (int)
+        """
+        landing = _landing_from_heights(self._heights, shape, x, y)
+        if landing is not None:
+            return landing
+        # part of the shape is below the surface, check row by row in case it is under an overhang
+        shift = x + PAD
+        masks = [(dy, bits << shift) for dy, bits in shape]
+        rows = self._rows
+        while True:
+            for dy, mask in masks:
+                row = y - 1 - dy
+                if row < 0 or rows[row] & mask:
+                    return y
+            y -= 1
+
+    def get_slide(self, shape, x: int, y: int, n: int):
+        """
+        returns the x a shape that fits at x, y ends up at when moved up to n columns sideways, stopping at the first
+        wall or block in the way
+        :param shape: (tuple) of (dy, bits) pairs, see fits
+        :param x: (int)
+        :param y: (int)
+        :param n: (int) columns to move, negative to the left
+        :return: (int)
+        """
+        target = _slide_from_heights(self._heights, shape, x, y, n)
+        if target is not None:
+            return target
+        # the shape only covers the same few rows the whole way, so pair each mask with its row once and shift along
+        rows = self._rows
+        masks = [(rows[y - dy], bits) for dy, bits in shape]
+        step = 1 if n > 0 else -1
+        end = x + n
+        while x != end:
+            shift = x + step + PAD
+            if any(row & (bits << shift) for row, bits in masks):
+                break
+            x += step
+        return x
+
+    def _check_row(self, n):
+        """
+        returns true if row n is completely filled
+        :param n: (int) row number, between 0 to HEIGHT - 1
+        :return: (boolean)
+        """
+        return self._rows[n] == FULL_ROW
+
+
+PLAYFIELD_TYPES = {"list": Playfield, "bitboard": BitboardPlayfield}
+
+
+def get_playfield_type(name: str):
+    """
+    returns the playfield class registered under name, so both engines can be swapped in and benchmarked side by side
+    :param name: (str) one of the keys of PLAYFIELD_TYPES
+    :return: (type) Playfield or BitboardPlayfield
+    """
+    try:
+        return PLAYFIELD_TYPES[name]
+    except KeyError:
+        raise ValueError(f"Unknown playfield type {name!r}, expected one of {sorted(PLAYFIELD_TYPES)}") from None
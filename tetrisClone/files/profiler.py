@@ -0,0 +1,134 @@
+import csv
+import gc
+import sys
+import time
+from collections import deque
+
+SECTIONS = ("input", "logic", "render")
+COLUMNS = ("frame", "frame_ms") + tuple(f"{section}_ms" for section in SECTIONS) + \
+          ("steps", "blocks", "collections", "notes")
+
+
+class FrameProfiler:
+    """
+    per frame timings for the game loop, split into the sections in SECTIONS, together with how many memory blocks
+    the frame left allocated (net, from sys.getallocatedblocks) and how many garbage collections ran during it.
+    The last frames are kept in a ring buffer, and can also be streamed to a CSV file as they happen.
+
+    usage, once per frame:
+        profiler.start_frame()
+        <input>
+        profiler.mark("input")
+        ...
+        profiler.end_frame(steps)
+    """
+    def __init__(self, size=600, csv_path=None):
+        """
+        :param size: (int) frames kept in the ring buffer
+        :param csv_path: (str) file to write every frame to as it ends, None to only keep the ring buffer
+        """
+        self.frames = deque(maxlen=size)  # rows of COLUMNS values
+        self._frame = 0
+        self._csv_file = None
+        self._csv = None
+        if csv_path is not None:
+            self._csv_file = open(csv_path, "w", newline="")
+            self._csv = csv.writer(self._csv_file)
+            self._csv.writerow(COLUMNS)
+
+        self._frame_start = None
+        self._mark = None
+        self._sections = dict.fromkeys(SECTIONS, 0.0)
+        self._blocks = 0
+        self._collections = 0
+        self._notes = []
+        self._discard = False
+
+    def start_frame(self):
+        now = time.perf_counter()
+        self._frame_time = 0.0 if self._frame_start is None else now - self._frame_start
+        self._frame_start = now
+        self._mark = now
+        for section in SECTIONS:
+            self._sections[section] = 0.0
+        self._blocks = sys.getallocatedblocks()
+        self._collections = self._count_collections()
+        self._notes.clear()
+
+    def mark(self, section):
+        """
+        adds the time since the last mark (or the frame start) to a section
+        :param section: (str) one of SECTIONS
+        """
+        now = time.perf_counter()
+        self._sections[section] += now - self._mark
+        self._mark = now
+
+    def note(self, text):
+        """
+        attaches a note to the current frame (e.g. that lines were cleared), to find what caused a slow frame
+        :param text: (str)
+        """
+        self._notes.append(text)
+
+    def discard(self):
+        """
+        drops the current frame (e.g. the game was paused during it) and doesn't count it towards the next frame time
+        """
+        self._discard = True
+
+    def end_frame(self, steps=1):
+        """
+        :param steps: (int) logic steps run this frame
+        """
+        if self._discard:
+            self._discard = False
+            self._frame_start = None
+            return
+        self._frame += 1
+        row = (self._frame, self._frame_time * 1000) + tuple(self._sections[section] * 1000 for section in SECTIONS) + \
+              (steps, sys.getallocatedblocks() - self._blocks, self._count_collections() - self._collections,
+               " ".join(self._notes))
+        self.frames.append(row)
+        if self._csv is not None:
+            self._csv.writerow(self._format(row))
+
+    def get_summary(self, frames=60):
+        """
+        :param frames: (int) how many of the latest frames to look at
+        :return: (dict) average frame and section times in ms, the slowest frame time, and average net allocated
+        blocks and total collections over those frames
+        """
+        recent = list(self.frames)[-frames:]
+        if not recent:
+            return {}
+        summary = {column: sum(row[i] for row in recent) / len(recent)
+                   for i, column in enumerate(COLUMNS) if column.endswith("_ms")}
+        summary["max_frame_ms"] = max(row[1] for row in recent)
+        summary["blocks"] = sum(row[6] for row in recent) / len(recent)
+        summary["collections"] = sum(row[7] for row in recent)
+        return summary
+
+    def dump(self, path):
+        """
+        writes the frames in the ring buffer to a CSV file
+        :param path: (str)
+        """
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerows(map(self._format, self.frames))
+
+    def close(self):
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = None
+            self._csv = None
+
+    @staticmethod
+    def _format(row):
+        return [f"{value:.3f}" if isinstance(value, float) else value for value in row]
+
+    @staticmethod
+    def _count_collections():
+        return sum(generation["collections"] for generation in gc.get_stats())
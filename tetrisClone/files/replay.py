@@ -0,0 +1,189 @@
+import hashlib
+import zlib
+
+from files.engine import TetrisEngine
+from files.playfield import Playfield
+
+MAGIC = b"TRPL"
+VERSION = 1
+
+# file layout (all numbers are unsigned LEB128 varints):
+#   MAGIC, VERSION, seed, infinity, max_rotates, frames, score, 8 byte board hash,
+#   then zlib compressed input records: frames since the previous record, pressed bitmask, shift (zigzag encoded,
+#   see to_zigzag) and drops.
+# A record is only written on frames with any input, every other frame has none.
+
+
+def write_varint(out, n):
+    """
+    appends a non negative integer to a bytearray as an unsigned LEB128 varint (1 byte for anything below 128)
+    :param out: (bytearray)
+    :param n: (int)
+    """
+    if n < 0:
+        raise ValueError("replays can only store non negative numbers")
+    while n >= 0x80:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def read_varint(data, pos):
+    """
+    :param data: (bytes)
+    :param pos: (int) index the varint starts at
+    :return: (tuple) the number and the index after it
+    """
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def to_zigzag(n):
+    """
+    maps signed integers onto non negative ones (0, -1, 1, -2, ... -> 0, 1, 2, 3, ...) so they can be varints
+    """
+    return n * 2 if n >= 0 else -n * 2 - 1
+
+
+def from_zigzag(n):
+    return n >> 1 if not n & 1 else -(n >> 1) - 1
+
+
+def board_hash(field):
+    """
+    returns an 8 byte digest of everything on the playfield, used to check a replay ends on the same board
+    :param field: (Playfield)
+    :return: (bytes)
+    """
+    width, height = field.get_dimensions()
+    digest = hashlib.blake2b(digest_size=8)
+    for y in range(height):
+        digest.update(repr([field.get_contents(x, y) for x in range(width)]).encode())
+    return digest.digest()
+
+
+class ReplayRecorder:
+    """
+    records the inputs given to a TetrisEngine, one call to record per engine step starting from a freshly reset game
+    """
+    def __init__(self, engine: TetrisEngine):
+        self._engine = engine
+        self._records = bytearray()
+        self._frames = 0
+        self._last_record = 0  # frame of the last record written
+
+    def record(self, pressed=0, shift=0, drops=0):
+        """
+        records the inputs of one engine step, as passed to TetrisEngine.step
+        :param pressed: (int) bitmask
+        :param shift: (int)
+        :param drops: (int)
+        """
+        if pressed or shift or drops:
+            write_varint(self._records, self._frames - self._last_record)
+            write_varint(self._records, pressed)
+            write_varint(self._records, to_zigzag(shift))
+            write_varint(self._records, drops)
+            self._last_record = self._frames
+        self._frames += 1
+
+    def to_bytes(self):
+        """
+        :return: (bytes) the replay with the engine's current score and board as the expected result
+        """
+        engine = self._engine
+        options = engine.get_options()
+        out = bytearray(MAGIC)
+        for n in (VERSION, engine.seed, options["INFINITY"], options["MAX_ROTATES"], self._frames, engine.score):
+            write_varint(out, int(n))
+        out += board_hash(engine.field)
+        out += zlib.compress(bytes(self._records), 9)
+        return bytes(out)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+
+class Replay:
+    """
+    a recorded game: the engine settings, every frame's inputs, and the score and board hash it should end with
+    """
+    def __init__(self, data: bytes):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("not a replay file")
+        pos = len(MAGIC)
+        version, pos = read_varint(data, pos)
+        if version != VERSION:
+            raise ValueError(f"unsupported replay version {version}")
+        self.seed, pos = read_varint(data, pos)
+        infinity, pos = read_varint(data, pos)
+        self.infinity = bool(infinity)
+        self.max_rotates, pos = read_varint(data, pos)
+        self.frames, pos = read_varint(data, pos)
+        self.score, pos = read_varint(data, pos)
+        self.board_hash = data[pos:pos + 8]
+        self._records = zlib.decompress(data[pos + 8:])
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def inputs(self):
+        """
+        yields the (pressed, shift, drops) inputs of every frame in order
+        """
+        records = self._records
+        pos = 0
+        frame = 0  # frame about to be yielded
+        record_frame = 0  # frame of the last record read
+        while pos < len(records):
+            delta, pos = read_varint(records, pos)
+            pressed, pos = read_varint(records, pos)
+            shift, pos = read_varint(records, pos)
+            drops, pos = read_varint(records, pos)
+            record_frame += delta
+            while frame < record_frame:
+                yield 0, 0, 0
+                frame += 1
+            yield pressed, from_zigzag(shift), drops
+            frame += 1
+        while frame < self.frames:
+            yield 0, 0, 0
+            frame += 1
+
+    def create_engine(self, field_type=Playfield):
+        """
+        :return: (TetrisEngine) new game with the recorded settings and seed
+        """
+        return TetrisEngine(self.infinity, self.max_rotates, field_type, self.seed)
+
+    def verify(self, field_type=Playfield):
+        """
+        plays the replay back headless as fast as possible
+        :return: (bool) whether it ended with the recorded score and board
+        """
+        engine = self.create_engine(field_type)
+        for pressed, shift, drops in self.inputs():
+            engine.step(pressed, shift, drops)
+            engine.events.clear()
+        return engine.score == self.score and board_hash(engine.field) == self.board_hash
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    for replay_path in sys.argv[1:]:
+        start = time.perf_counter()
+        replay = Replay.load(replay_path)
+        result = "OK" if replay.verify() else "MISMATCH"
+        print(f"{replay_path}: {result} ({replay.frames} frames, score {replay.score}, "
+              f"{time.perf_counter() - start:.3f} s)")
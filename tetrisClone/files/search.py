@@ -0,0 +1,183 @@
+from collections import namedtuple
+
+import files.tetrominoes as tet
+from files.engine import LEFT, RIGHT, SOFT_DROP, HARD_DROP, ROTATE_RIGHT, ROTATE_LEFT
+from files.playfield import WIDTH
+
+# x, y: corner position of the piece once placed, rotation: 0-3, t_spin: whether placing it there scores as a t-spin,
+# path: engine input flags that get the piece there from the start position (ignoring gravity), ending in a hard drop
+Placement = namedtuple("Placement", ["x", "rotation", "y", "t_spin", "path"])
+
+_T_SPIN_CORNERS = ((0, 0), (0, 2), (2, 0), (2, 2))  # same corners as TPiece.t_spin_corners_satisfied
+# one move takes a piece's lowest block at most 5 rows down (a kick 2 down and a rotation that moves the lowest block
+# 3 further down), so positions with their lowest block at least this far above the stack only lead above the stack
+_OPEN_AIR_BAND = 5
+
+
+def find_placements(field, piece_type, start=tet.SPAWN):
+    """
+    returns every final resting position a piece can reach from start, found with a breadth first search over
+    PieceStates one move (or one row down) at a time, using the piece's precomputed collision masks and SRS kick tables
+    instead of moving Piece objects around. Every state is only expanded once.
+    Rows above the stack are empty, so while the piece is well above it every position is reachable by rotating at the
+    start, moving sideways and dropping; those states are counted as reached without searching them, and the search
+    starts from the ones close enough to the stack to touch it (see _get_open_air_states). On low stacks that takes
+    about half the time of searching every state (the find_all_placements benchmark in benchmark.py), and
+    tests/test_search.py checks the placements against a search without it.
+    Placements covering the same squares are only listed once, except that t-spin and non t-spin versions of a T
+    piece placement are both kept.
+    :param field: (Playfield) or anything else with fits, get_heights and is_clear methods
+    :param piece_type: (type) piece class, e.g. from tetrominoes.num_to_piece
+    :param start: (tuple) corner x, corner y, rotation of the piece before moving
+    :return: (list) of Placement, in order of path length
+    """
+    shapes = piece_type._shapes
+    offsets = piece_type._offsets
+    kicks = piece_type._kicks
+    field_fits = field.fits
+    fit_cache = {}  # (rotation, x, y) -> whether it fits, most positions get checked from several neighbours
+
+    def fits(rotation, x, y):
+        position = (rotation, x, y)
+        result = fit_cache.get(position)
+        if result is None:
+            result = fit_cache[position] = field_fits(shapes[rotation], x, y)
+        return result
+
+    can_rotate = piece_type is not tet.OPiece
+    is_t = piece_type is tet.TPiece
+    kind = piece_type.KIND
+
+    x, y, rotation = start
+    if not fits(rotation, x, y):
+        return []
+
+    # a state is a PieceState's fields followed by whether the last move was a rotation, which is only tracked for t
+    # pieces (needed for t-spins). Plain tuples are used as they are much cheaper to make, state[:4] is equal to (and
+    # hashes the same as) the PieceState
+    start_state = (kind, rotation, x, y, False)
+    parents = {start_state: None}  # state -> (previous state, action), doubles as the visited set
+    # states to search, by how many moves it takes to get to them
+    frontiers = _get_open_air_states(field, piece_type, start_state, parents) or {0: [start_state]}
+    seen = set()  # squares (and t-spin flag) of placements already found
+    placements = []
+
+    distance = 0
+    frontier = frontiers.pop(0, [])
+    while frontier or frontiers:
+        next_frontier = []
+        for state in frontier:
+            _, rotation, x, y, rotated = state
+
+            if fits(rotation, x, y - 1):
+                moves = [((kind, rotation, x, y - 1, False), SOFT_DROP)]
+            else:
+                t_spin = False
+                if rotated:
+                    t_spin = sum(not field.is_clear(x + dx, y - dy) for dx, dy in _T_SPIN_CORNERS) >= 3
+                key = (frozenset((x + dx, y - dy) for dx, dy in offsets[rotation]), t_spin)
+                if key not in seen:
+                    seen.add(key)
+                    placements.append(Placement(x, rotation, y, t_spin, _build_path(parents, state)))
+                moves = []
+            if fits(rotation, x - 1, y):
+                moves.append(((kind, rotation, x - 1, y, False), LEFT))
+            if fits(rotation, x + 1, y):
+                moves.append(((kind, rotation, x + 1, y, False), RIGHT))
+
+            if can_rotate:
+                for new_rotation, action in (((rotation + 1) & 3, ROTATE_RIGHT), ((rotation - 1) & 3, ROTATE_LEFT)):
+                    for dx, dy in kicks[rotation][new_rotation]:
+                        if fits(new_rotation, x + dx, y + dy):
+                            moves.append(((kind, new_rotation, x + dx, y + dy, is_t), action))
+                            break
+
+            for new_state, action in moves:
+                if new_state not in parents:
+                    parents[new_state] = (state, action)
+                    next_frontier.append(new_state)
+        distance += 1
+        frontier = next_frontier + frontiers.pop(distance, [])
+
+    return placements
+
+
+def _get_open_air_states(field, piece_type, start_state, parents):
+    """
+    every row from the top of the stack up is empty, so a piece whose lowest block is in those rows only has the walls
+    in its way. If the piece starts high enough above the stack and can take every rotation where it starts, it can
+    reach each of those positions by rotating, moving sideways and dropping. They are all added to parents as reached
+    from the start (see _build_path), and only the ones whose lowest block is within _OPEN_AIR_BAND rows of the stack
+    are returned to be searched, since the others only lead to positions that are also above the stack.
+    :param start_state: (tuple) search state the piece starts in
+    :param parents: (dict) search states reached so far, filled in
+    :return: (dict) moves to get there -> list of states to search, or None if the piece doesn't start high enough
+    """
+    kind, start_rotation, start_x, start_y, _ = start_state
+    shapes = piece_type._shapes
+    stack = max(field.get_heights())  # lowest empty row above every column
+    # the search has to start from every position in the band, so they all need to be below the start
+    if start_y - _OPEN_AIR_BAND - 2 < stack:
+        return None
+
+    frontiers = {}
+    for turns, rotation in _get_start_rotations(piece_type, start_rotation):
+        # rotating at the start needs to work without kicks, each turn on the way too
+        if not all(field.fits(shapes[(start_rotation + turn) & 3], start_x, start_y) for turn in turns):
+            return None
+        offsets = piece_type._offsets[rotation]
+        left = min(dx for dx, _ in offsets)
+        right = max(dx for dx, _ in offsets)
+        bottom = max(dy for _, dy in offsets)
+        for x in range(-left, WIDTH - right):
+            for y in range(start_y, stack + bottom - 1, -1):
+                state = (kind, rotation, x, y, False)
+                if state not in parents:
+                    parents[state] = (start_state, None)
+                    if y - bottom < stack + _OPEN_AIR_BAND:
+                        frontiers.setdefault(len(turns) + abs(x - start_x) + start_y - y, []).append(state)
+    return frontiers
+
+
+def _get_start_rotations(piece_type, rotation):
+    """
+    :return: (tuple) of (turns, rotation) pairs for each rotation a piece can take from rotation, where turns are the
+    rotations on the way as quarter turns (1 right, -1 left)
+    """
+    if piece_type is tet.OPiece:
+        return ((), rotation),
+    return ((), rotation), ((1,), (rotation + 1) & 3), ((1, 2), (rotation + 2) & 3), ((-1,), (rotation - 1) & 3)
+
+
+def find_all_placements(field, start=tet.SPAWN):
+    """
+    runs find_placements for every piece type
+    :param field: (Playfield)
+    :param start: (tuple) corner x, corner y, rotation of the pieces before moving
+    :return: (dict) bag number (0-6) -> list of Placement
+    """
+    return {n: find_placements(field, tet.num_to_piece(n), start) for n in range(7)}
+
+
+def _build_path(parents, state):
+    """
+    walks back from state to the start state, turning the actions taken into a tuple of engine input flags
+    """
+    actions = []
+    link = parents[state]
+    while link is not None:
+        previous, action = link
+        if action is None:  # an open air state, reached by rotating at the start, moving sideways and dropping
+            _, rotation, x, y, _ = state
+            _, start_rotation, start_x, start_y, _ = previous
+            turns = (rotation - start_rotation) & 3
+            actions.extend((SOFT_DROP,) * (start_y - y))
+            actions.extend((LEFT if x < start_x else RIGHT,) * abs(x - start_x))
+            actions.extend((ROTATE_LEFT,) if turns == 3 else (ROTATE_RIGHT,) * turns)
+        else:
+            actions.append(action)
+        state = previous
+        link = parents[state]
+    actions.reverse()
+    actions.append(HARD_DROP)
+    return tuple(actions)
@@ -0,0 +1,59 @@
+import pygame as pg
+
+
+class SpriteCache:
+    """
+    pre-rendered square sprites, one per colour, size and style, so drawing a block in the render loop is a single
+    blit instead of allocating a surface or rasterizing a rect every frame
+    """
+    def __init__(self):
+        self._sprites = {}
+
+    def block(self, colour, size, border=0):
+        """
+        returns a size by size square of colour, with a black border of the given width if border > 0
+        :param colour: (r, g, b)
+        :param size: (int) side length in pixels
+        :param border: (int) border width in pixels
+        :return: (pg.Surface)
+        """
+        key = ("BLOCK", colour, size, border)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            sprite = pg.Surface((size, size))
+            if border > 0:
+                sprite.fill((0, 0, 0))
+            sprite.fill(colour, pg.Rect(border, border, size - border * 2, size - border * 2))
+            self._sprites[key] = sprite
+        return sprite
+
+    def ghost(self, colour, size):
+        """
+        returns a size by size translucent square
+        :param colour: (r, g, b, a)
+        :param size: (int) side length in pixels
+        :return: (pg.Surface) with per pixel alpha
+        """
+        key = ("GHOST", colour, size)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            sprite = pg.Surface((size, size), pg.SRCALPHA)
+            sprite.fill(colour)
+            self._sprites[key] = sprite
+        return sprite
+
+    def preload(self, colours, size, border=0, ghost_alpha=None):
+        """
+        renders the block (and ghost, if ghost_alpha is given) sprites for every colour ahead of time
+        :param colours: (iterable) of (r, g, b)
+        :param size: (int) side length in pixels
+        :param border: (int) border width for the block sprites
+        :param ghost_alpha: (int) alpha of the ghost sprites, or None to skip them
+        """
+        for colour in colours:
+            self.block(colour, size, border)
+            if ghost_alpha is not None:
+                self.ghost(colour + (ghost_alpha,), size)
+
+
+SPRITES = SpriteCache()
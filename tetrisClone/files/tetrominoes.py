@@ -1,3 +1,5 @@
+from collections import namedtuple
+
 from files.playfield import Playfield
 
 DEFAULT_WALL_KICK_DATA = {"0>1": ((-1, 0), (-1, 1), (0, -2), (-1, -2)), "1>0": ((1, 0), (1, -1), (0, 2), (1, 2)),
@@ -33,53 +35,231 @@ def num_to_piece(n: int):
             return OPiece
 
 
+def _build_kick_table(kick_data):
+    """
+    turns "a>b" keyed wall kick data into a 4x4 table indexed [from][to], where each entry starts with the unkicked
+    (0, 0) offset so a rotation is just a walk over one tuple. Transitions that can't happen are left empty.
+    :param kick_data: (dict) of the form DEFAULT_WALL_KICK_DATA
+    :return: (tuple) of 4 tuples of 4 tuples of (dx, dy)
+    """
+    table = [[() for _ in range(4)] for _ in range(4)]
+    for key, kicks in kick_data.items():
+        start, end = map(int, key.split(">"))
+        table[start][end] = ((0, 0),) + tuple(kicks)
+    return tuple(tuple(row) for row in table)
+
+
+def _build_shape(offsets):
+    """
+    turns relative coordinates into the (dy, bits) row masks taken by Playfield.fits
+    :param offsets: (iterable) of x, y relative to corner, y increasing downwards
+    :return: (tuple) of (dy, bits) pairs
+    """
+    rows = {}
+    for x, y in offsets:
+        rows[y] = rows.get(y, 0) | 1 << x
+    return tuple(sorted(rows.items()))
+
+
+# a piece's position as a plain immutable value: kind is the bag number (see num_to_piece), rotation 0-3 and x, y the
+# corner position. States cost nothing to copy and can be used as dict and set keys, e.g. by a search. The functions
+# below work out the state a move leads to on a playfield without changing anything; Piece keeps its position as a
+# state and moves it with them.
+PieceState = namedtuple("PieceState", ["kind", "rotation", "x", "y"])
+
+SPAWN_X, SPAWN_Y = 3, 21  # corner position every piece starts at
+SPAWN = (SPAWN_X, SPAWN_Y, 0)  # corner x, corner y and rotation every piece starts with (see spawn)
+
+# collision masks [kind][rotation] and kick tables [kind][from][to] of every piece type, filled in once the piece
+# classes are built at the bottom of the module
+_SHAPES = ()
+_KICKS = ()
+
+
+def spawn(kind):
+    """
+    :param kind: (int) bag number (0-6)
+    :return: (PieceState) a piece of that kind as it enters the playfield
+    """
+    return PieceState(kind, 0, SPAWN_X, SPAWN_Y)
+
+
+def get_shape(state):
+    """
+    :return: (tuple) (dy, bits) collision mask of the state, as taken by Playfield.fits
+    """
+    return _SHAPES[state[0]][state[1]]
+
+
+def get_coordinates(state):
+    """
+    :return: (list) of (x, y) squares the piece covers
+    """
+    kind, rotation, x, y = state
+    return [(x + dx, y - dy) for dx, dy in _PIECE_TYPES[kind]._offsets[rotation]]
+
+
+def move(state, field, dx):
+    """
+    :param dx: (int) columns to move by, all at once (e.g. 1 or -1)
+    :return: (PieceState) the moved state, or None if it doesn't fit there
+    """
+    kind, rotation, x, y = state
+    if not field.fits(_SHAPES[kind][rotation], x + dx, y):
+        return None
+    return PieceState(kind, rotation, x + dx, y)
+
+
+def slide(state, field, n):
+    """
+    moves up to n columns sideways, stopping at the first wall or block in the way (see Playfield.get_slide)
+    :param n: (int) columns, negative to the left
+    :return: (PieceState) which is state itself if it can't move at all
+    """
+    kind, rotation, x, y = state
+    new_x = field.get_slide(_SHAPES[kind][rotation], x, y, n)
+    return state if new_x == x else PieceState(kind, rotation, new_x, y)
+
+
+def drop(state, field, n=1):
+    """
+    moves up to n rows down, stopping where the piece lands
+    :param n: (int) rows
+    :return: (PieceState) which is state itself if it is already on the ground
+    """
+    kind, rotation, x, y = state
+    shape = _SHAPES[kind][rotation]
+    if n == 1:  # the common case, a single fits check is cheaper than finding the landing row
+        return PieceState(kind, rotation, x, y - 1) if field.fits(shape, x, y - 1) else state
+    new_y = max(y - n, field.get_landing(shape, x, y))
+    return state if new_y == y else PieceState(kind, rotation, x, new_y)
+
+
+def hard_drop(state, field):
+    """
+    :return: (PieceState) where the piece lands when dropped straight down
+    """
+    kind, rotation, x, y = state
+    new_y = field.get_landing(_SHAPES[kind][rotation], x, y)
+    return state if new_y == y else PieceState(kind, rotation, x, new_y)
+
+
+def rotate(state, field, rotation):
+    """
+    tries to rotate into a rotation state using the SRS kick tables (based on the tetris guidelines)
+    :param rotation: (int) 0-3 rotation state to rotate into
+    :return: (PieceState) the rotated and possibly kicked state, or None if no kick fits
+    """
+    kind, old_rotation, x, y = state
+    shape = _SHAPES[kind][rotation]
+    fits = field.fits
+    # first entry of the kick table is (0, 0), i.e. the plain rotation
+    for dx, dy in _KICKS[kind][old_rotation][rotation]:
+        if fits(shape, x + dx, y + dy):
+            return PieceState(kind, rotation, x + dx, y + dy)
+    return None
+
+
 class Piece:
     """
-    class for abstract piece class with shared functionality
+    class for abstract piece class with shared functionality. Subclasses only declare their 4 rotation states in
+    _ROTATIONS; offset, collision mask and kick tables are generated once from those at import (see _build_tables).
+    The position is a PieceState, and moving the piece replaces it with the state the functions above return.
 
     fields:
-    - coordinates: (list) of 4 x, y coordinates for each of the piece components
-    - corner: (list) position of top left corner of piece area (used for relative coordinates used for rotations)
-    - rotation: (int) 0-3 current rotation state of piece
+    - state: (PieceState) kind, rotation state and corner position (top left corner of the piece area)
     - field: current playing field object
-    - placed: (boolean) whether the piece has been placed (just so it cannot be placed twice due to bad code)
+    - last move: what the last successful move was, needed to tell t-spins apart
     """
+    _ROTATIONS = None  # relative x, y coordinates of the 4 blocks for each rotation state, y increases downwards
+    _KICK_DATA = DEFAULT_WALL_KICK_DATA
+    KIND = None  # bag number, set for each subclass along with the tables
+
+    # generated tables (indexed by rotation state)
+    _offsets = None
+    _shapes = None
+    _kicks = None
+
     def __init__(self, pf: Playfield):
         if type(self) is Piece:
             raise Exception('Piece is an abstract class and cannot be instantiated directly')
-        self._corner = [3, 21]  # x, y position of top left corner of 'hit-box' for rotations and absolute position
-        self._coordinates = self._abs_coords(self.default_piece_positions())
-        self._rotation = 0
+        self._state = spawn(self.KIND)
         self._field = pf
         self._last_move = None
         # all/most methods called on the piece will be with respect to the 'field', so it is also a field
 
+    @classmethod
+    def _build_tables(cls, kind):
+        """
+        generates the immutable per rotation offset and collision mask tables and the per transition kick table
+        :param kind: (int) bag number of the piece type
+        """
+        cls.KIND = kind
+        cls._offsets = tuple(tuple(offsets) for offsets in cls._ROTATIONS)
+        cls._shapes = tuple(_build_shape(offsets) for offsets in cls._offsets)
+        cls._kicks = _build_kick_table(cls._KICK_DATA)
+
     # GETTER METHODS:
+    def get_state(self):
+        """
+        :return: (PieceState)
+        """
+        return self._state
+
     def get_corner_position(self):
-        return self._corner
+        return self._state[2], self._state[3]
+
+    def get_rotation(self):
+        return self._state[1]
 
     def get_coordinates(self):
-        return self._coordinates
+        _, rotation, x, y = self._state
+        return [(x + dx, y - dy) for dx, dy in self._offsets[rotation]]
 
     def get_last_action(self):
         return self._last_move
 
-    def _get_kicks(self, orientation):
-        return DEFAULT_WALL_KICK_DATA[str(self._rotation) + ">" + str(orientation)]
-
     # abstract getter methods (called by methods in this class)
     @staticmethod
     def get_colour():
         raise NotImplementedError("Subclass did not implement get_colour method")
 
-    @staticmethod
-    def default_piece_positions():
-        raise NotImplementedError("Subclass did not implement default_piece_positions method")
-
-    def _get_rotation_coords(self, order):
-        raise NotImplementedError("Subclass did not implement _try_place method")
+    # refers to relative coordinates of a piece in default rotation state. Needed for drawing the piece when it is not
+    # in play.
+    @classmethod
+    def default_piece_positions(cls):
+        if cls._ROTATIONS is None:
+            raise NotImplementedError("Subclass did not implement _ROTATIONS")
+        return cls._offsets[0]
 
     # SETTER METHODS
+    def set_state(self, state, last_move=None):
+        """
+        puts the piece straight into a state without checking the moves to get there
+        :param state: (PieceState) of this piece's kind
+        :param last_move: (str) "MOVE", "DROP", "ROTATE" or None, what get_last_action should report
+        """
+        self._state = PieceState(*state)
+        self._last_move = last_move
+
+    def set_position(self, x, y, rotation, last_move=None):
+        """
+        puts the piece straight into a position without checking the moves to get there, e.g. for a bot applying a
+        placement found by files.search
+        :param x: (int) corner x
+        :param y: (int) corner y
+        :param rotation: (int) 0-3 rotation state
+        :param last_move: (str) "MOVE", "DROP", "ROTATE" or None, what get_last_action should report
+        """
+        self._state = PieceState(self.KIND, rotation, x, y)
+        self._last_move = last_move
+
+    def reset(self):
+        """
+        puts the piece back where it spawned (e.g. when it comes back out of hold)
+        """
+        self.set_position(SPAWN_X, SPAWN_Y, 0)
+
     def left(self):
         """
         moves piece one to the left if possible, otherwise this function does not do anything
@@ -94,245 +274,156 @@ class Piece:
         """
         return self._move(1)
 
-    # in theory n will only be 1 or -1, but this still saves repeated code
-    def _move(self, n):
+    def _move(self, dx):
         """
-        moves piece n squares in positive or negative x direction (downwards would be a drop)
-        :param n: (int) how much x position can be changed
+        :param dx: (int) columns to move by
         :return: (boolean) if the movement was successful
         """
-        for coord in self._coordinates:
-            if not self._field.is_clear(coord[0] + n, coord[1]):
-                return False
-        for coord in self._coordinates:
-            coord[0] += n
-        self._corner[0] += n
+        state = move(self._state, self._field, dx)
+        if state is None:
+            return False
+        self._state = state
         self._last_move = "MOVE"
         return True
 
+    def shift(self, n):
+        """
+        moves the piece up to n squares sideways, stopping at the first wall or block in the way, as a single move
+        (e.g. straight to the wall) using the playfield's slide lookup
+        :param n: (int) squares to move, negative to the left
+        :return: (int) how many squares the piece moved
+        """
+        state = slide(self._state, self._field, n)
+        moved = abs(state[2] - self._state[2])
+        if moved:
+            self._state = state
+            self._last_move = "MOVE"
+        return moved
+
+    def soft_drop(self, n):
+        """
+        drops the piece by up to n rows without placing it, using the playfield's landing height lookup
+        :param n: (int) rows to drop
+        :return: (int) how many rows the piece dropped
+        """
+        return self._drop_to(drop(self._state, self._field, n))
+
     def drop(self):
         """
         drops the piece by one and returns true if the piece has space, if piece can no longer move, returns false
         :return: (boolean) true if piece was able to move
         """
-        for coord in self._coordinates:
-            if not self._field.is_clear(coord[0], coord[1] - 1):
-                return False
-        for coord in self._coordinates:
-            coord[1] -= 1
-        self._corner[1] -= 1
-        self._last_move = "DROP"
-        return True
+        return self._drop_to(drop(self._state, self._field)) > 0
 
     def place(self):
         """
         places the piece and returns lines cleared, otherwise returns 0
         :return: (int) lines cleared from placing that piece
         """
-        return self._field.add_blocks(self._coordinates, self.get_colour())
+        return self._field.add_blocks(self.get_coordinates(), self.get_colour())
 
     def hard_drop(self):
         """
-        calls drop over and over until it returns false. Not sure about the practicality, but this function is useful
-        abstraction regardless of necessity
+        drops the piece as far down as it can go in one move, using the playfield's landing height lookup
         :return: (int) number of rows piece was dropped
         """
-        counter = 0
-        while self.drop():
-            counter += 1
-        return counter
+        return self._drop_to(hard_drop(self._state, self._field))
 
     def get_ghost_coords(self):
         """
         returns the coordinates of pieces as if the piece were to be hard dropped
         :return:
         """
-        copy = [coord.copy() for coord in self._coordinates]
-        while True:
-            for coord in copy:
-                if not self._field.is_clear(coord[0], coord[1] - 1):
-                    return copy
-            for coord in copy:
-                coord[1] -= 1
+        return get_coordinates(hard_drop(self._state, self._field))
 
     def rotate_right(self):
         """
         tries to rotate the piece right (using the SRS algorithm)
         :return: nothing
         """
-        if self._rotation == 3:
-            new_state = 0
-        else:
-            new_state = self._rotation + 1
-        self._perform_rotate(new_state)
+        self._perform_rotate((self._state[1] + 1) & 3)
 
     def rotate_left(self):
         """
-        tries to rotate the piece right (using the SRS algorithm)
+        tries to rotate the piece left (using the SRS algorithm)
         :return: nothing
         """
-        if self._rotation == 0:
-            new_state = 3
-        else:
-            new_state = self._rotation - 1
-        self._perform_rotate(new_state)
+        self._perform_rotate((self._state[1] - 1) & 3)
 
     # shared helper methods
     def _perform_rotate(self, orientation):
         """
-        attempts to put the piece into specified rotation state/orientation, setting the rotation state to that value
-        if the rotation attempt is successful. Rotation states are defined via the graphic (based on tetris guidelines)
-        and kicks are attempted as needed according to those guidelines.
         :param orientation: (int) 0-3 orientation piece is attempting to rotation into
         :return: (nothing)
         """
-        coords = self._get_rotation_coords(orientation)
-        if self._try_set_coords(coords):
-            # helper function above sets coordinates, we only need to change rotation value
-            self._rotation = orientation
+        state = rotate(self._state, self._field, orientation)
+        if state is not None:
+            self._state = state
             self._last_move = "ROTATE"
-        else:
-            for dx, dy in self._get_kicks(orientation):
-                if self._try_set_coords([[x + dx, y + dy] for x, y in coords]):
-                    self._rotation = orientation
-                    self._corner[0] += dx
-                    self._corner[1] += dy
-                    self._last_move = "ROTATE"
-                    break
-
-    def _try_set_coords(self, coords):
-        """
-        attempts to set the current coordinates to be replaced by new specified coordinates, if all new coordinates are
-        not in conflict with the current playing field, return true. Otherwise, do not change the coordinates and return
-        false.
-        :param coords: (list) of four sets of x, y coordinates
-        :return: (boolean) whether function was successful
-        """
-        valid = True
-        for x, y in coords:
-            if not self._field.is_clear(x, y):
-                valid = False
-                break
-        if valid:
-            self._coordinates = coords
-            return True
-        return False
+
+    def _drop_to(self, state):
+        """
+        :param state: (PieceState) the piece dropped to, from one of the drop functions
+        :return: (int) rows the piece dropped
+        """
+        rows = self._state[3] - state[3]
+        if rows:
+            self._state = state
+            self._last_move = "DROP"
+        return rows
 
     def _abs_coords(self, coords):
         """
-        takes in list of 4 relative coordinates to corner point, turns them into absolute coordinates
+        takes in list of relative coordinates to corner point, turns them into absolute coordinates
         :param coords: (iterable) of x, y
-        :return: (tuple) represents a possible value for self._coordinates
+        :return: (list) represents the absolute coordinates of the piece blocks
         """
-        return [[self._corner[0] + x, self._corner[1] - y] for x, y in coords]
+        x, y = self._state[2], self._state[3]
+        return [(x + dx, y - dy) for dx, dy in coords]
 
 
 # subclasses do not introduce new methods, and only implement or polymorph previously designed methods.
 class IPiece(Piece):
-    def __init__(self, pf):
-        super().__init__(pf)
-        # list of coordinates of each piece component when spawning
-
-    # while this seems like a static method, the absolute coordinates after rotation are dependent on piece position
-    # in the playing field and therefore the function cannot be made completely static.
-    def _get_rotation_coords(self, orientation):
-        """
-        gets the positions of pieces if tetromino was to rotate into specified position
-        :param orientation: (int) rotation state, represented as an integer from 0-3
-        :return: coords
-        """
-        match orientation:
-            case 0:
-                return self._abs_coords(((0, 1), (1, 1), (2, 1), (3, 1)))
-            case 1:
-                return self._abs_coords(((2, 0), (2, 1), (2, 2), (2, 3)))
-            case 2:
-                return self._abs_coords(((0, 2), (1, 2), (2, 2), (3, 2)))
-            case 3:
-                return self._abs_coords(((1, 0), (1, 1), (1, 2), (1, 3)))
-
-    def _get_kicks(self, orientation):  # override for I piece
-        return I_WALL_KICK_DATA[str(self._rotation) + ">" + str(orientation)]
+    # while the rotation states look static, the absolute coordinates after rotation are dependent on piece position
+    # in the playing field, so these are stored relative to the corner and turned into absolute coordinates on demand
+    _ROTATIONS = (((0, 1), (1, 1), (2, 1), (3, 1)),
+                  ((2, 0), (2, 1), (2, 2), (2, 3)),
+                  ((0, 2), (1, 2), (2, 2), (3, 2)),
+                  ((1, 0), (1, 1), (1, 2), (1, 3)))
+    _KICK_DATA = I_WALL_KICK_DATA  # override for I piece
 
     @staticmethod
     def get_colour():
         return 1, 237, 250  # Cyan
 
-    # next method refers to relative coordinates of a piece in default rotation state. I.e. the line of coordinates of
-    # _get_rotation_coords corresponding to case 0. Needed for drawing the piece when it is not in play in retrospect.
-    @staticmethod
-    def default_piece_positions():
-        return (0, 1), (1, 1), (2, 1), (3, 1)
-
 
 class ZPiece(Piece):
-    def _get_rotation_coords(self, orientation):
-        """
-        gets the positions of pieces if tetromino was to rotate into specified position
-        :param orientation: (int) rotation state, represented as an integer from 0-3
-        :return: coords
-        """
-        match orientation:
-            case 0:
-                return self._abs_coords(((0, 0), (1, 0), (1, 1), (2, 1)))
-            case 1:
-                return self._abs_coords(((2, 0), (2, 1), (1, 1), (1, 2)))
-            case 2:
-                return self._abs_coords(((0, 1), (1, 2), (1, 1), (2, 2)))
-            case 3:
-                return self._abs_coords(((1, 0), (1, 1), (0, 1), (0, 2)))
+    _ROTATIONS = (((0, 0), (1, 0), (1, 1), (2, 1)),
+                  ((2, 0), (2, 1), (1, 1), (1, 2)),
+                  ((0, 1), (1, 2), (1, 1), (2, 2)),
+                  ((1, 0), (1, 1), (0, 1), (0, 2)))
 
     @staticmethod
     def get_colour():
         return 253, 63, 89  # Salmon
 
-    @staticmethod
-    def default_piece_positions():
-        return (0, 0), (1, 0), (1, 1), (2, 1)
-
 
 class SPiece(Piece):
-    def _get_rotation_coords(self, orientation):
-        """
-        gets the positions of pieces if tetromino was to rotate into specified position
-        :param orientation: (int) rotation state, represented as an integer from 0-3
-        :return: coords
-        """
-        match orientation:
-            case 0:
-                return self._abs_coords(((0, 1), (1, 0), (1, 1), (2, 0)))
-            case 1:
-                return self._abs_coords(((2, 2), (2, 1), (1, 1), (1, 0)))
-            case 2:
-                return self._abs_coords(((0, 2), (1, 2), (1, 1), (2, 1)))
-            case 3:
-                return self._abs_coords(((0, 0), (1, 1), (0, 1), (1, 2)))
+    _ROTATIONS = (((0, 1), (1, 0), (1, 1), (2, 0)),
+                  ((2, 2), (2, 1), (1, 1), (1, 0)),
+                  ((0, 2), (1, 2), (1, 1), (2, 1)),
+                  ((0, 0), (1, 1), (0, 1), (1, 2)))
 
     @staticmethod
     def get_colour():
         return 83, 218, 63  # Green
 
-    @staticmethod
-    def default_piece_positions():
-        return (0, 1), (1, 0), (1, 1), (2, 0)
-
 
 class TPiece(Piece):
-    def _get_rotation_coords(self, orientation):
-        """
-        gets the positions of pieces if tetromino was to rotate into specified position
-        :param orientation: (int) rotation state, represented as an integer from 0-3
-        :return: coords
-        """
-        match orientation:
-            case 0:
-                return self._abs_coords(((0, 1), (1, 0), (1, 1), (2, 1)))
-            case 1:
-                return self._abs_coords(((1, 2), (2, 1), (1, 1), (1, 0)))
-            case 2:
-                return self._abs_coords(((0, 1), (1, 2), (1, 1), (2, 1)))
-            case 3:
-                return self._abs_coords(((1, 0), (1, 1), (0, 1), (1, 2)))
+    _ROTATIONS = (((0, 1), (1, 0), (1, 1), (2, 1)),
+                  ((1, 2), (2, 1), (1, 1), (1, 0)),
+                  ((0, 1), (1, 2), (1, 1), (2, 1)),
+                  ((1, 0), (1, 1), (0, 1), (1, 2)))
 
     def t_spin_corners_satisfied(self):
         """
@@ -350,82 +441,40 @@ class TPiece(Piece):
     def get_colour():
         return 221, 10, 178  # Purple
 
-    @staticmethod
-    def default_piece_positions():
-        return (0, 1), (1, 0), (1, 1), (2, 1)
-
 
 class LPiece(Piece):
-    def _get_rotation_coords(self, orientation):
-        """
-        gets the positions of pieces if tetromino was to rotate into specified position
-        :param orientation: (int) rotation state, represented as an integer from 0-3
-        :return: coords
-        """
-        match orientation:
-            case 0:
-                return self._abs_coords(((0, 1), (2, 0), (1, 1), (2, 1)))
-            case 1:
-                return self._abs_coords(((1, 2), (2, 2), (1, 1), (1, 0)))
-            case 2:
-                return self._abs_coords(((0, 1), (0, 2), (1, 1), (2, 1)))
-            case 3:
-                return self._abs_coords(((1, 0), (1, 1), (0, 0), (1, 2)))
+    _ROTATIONS = (((0, 1), (2, 0), (1, 1), (2, 1)),
+                  ((1, 2), (2, 2), (1, 1), (1, 0)),
+                  ((0, 1), (0, 2), (1, 1), (2, 1)),
+                  ((1, 0), (1, 1), (0, 0), (1, 2)))
 
     @staticmethod
     def get_colour():
         return 255, 200, 46  # Orange
 
-    @staticmethod
-    def default_piece_positions():
-        return (0, 1), (2, 0), (1, 1), (2, 1)
-
 
 class JPiece(Piece):
-    def _get_rotation_coords(self, orientation):
-        """
-        gets the positions of pieces if tetromino was to rotate into specified position
-        :param orientation: (int) rotation state, represented as an integer from 0-3
-        :return: coords
-        """
-        match orientation:
-            case 0:
-                return self._abs_coords(((0, 1), (0, 0), (1, 1), (2, 1)))
-            case 1:
-                return self._abs_coords(((1, 2), (2, 0), (1, 1), (1, 0)))
-            case 2:
-                return self._abs_coords(((0, 1), (2, 2), (1, 1), (2, 1)))
-            case 3:
-                return self._abs_coords(((1, 0), (1, 1), (0, 2), (1, 2)))
+    _ROTATIONS = (((0, 1), (0, 0), (1, 1), (2, 1)),
+                  ((1, 2), (2, 0), (1, 1), (1, 0)),
+                  ((0, 1), (2, 2), (1, 1), (2, 1)),
+                  ((1, 0), (1, 1), (0, 2), (1, 2)))
 
     @staticmethod
     def get_colour():
         return 0, 119, 211  # Blue
 
-    @staticmethod
-    def default_piece_positions():
-        return (0, 1), (0, 0), (1, 1), (2, 1)
-
 
 class OPiece(Piece):
-    def _get_rotation_coords(self, orientation):
-        """
-        gets the positions of pieces if tetromino was to rotate into specified position
-        :param orientation: (int) rotation state, represented as an integer from 0-3
-        :return: coords
-        """
-        return self._abs_coords(((1, 0), (2, 0), (1, 1), (2, 1)))
-
-    def rotate_left(self):
-        pass
-
-    def rotate_right(self):
-        pass
+    _ROTATIONS = (((1, 0), (2, 0), (1, 1), (2, 1)),) * 4
+    _KICK_DATA = {}  # no rotations at all, so rotating never changes the state
 
     @staticmethod
     def get_colour():
         return 254, 251, 52  # Yellow
 
-    @staticmethod
-    def default_piece_positions():
-        return (1, 0), (2, 0), (1, 1), (2, 1)
+
+_PIECE_TYPES = (TPiece, IPiece, JPiece, LPiece, ZPiece, SPiece, OPiece)  # in bag number order, see num_to_piece
+for _kind, _piece_type in enumerate(_PIECE_TYPES):
+    _piece_type._build_tables(_kind)
+_SHAPES = tuple(piece_type._shapes for piece_type in _PIECE_TYPES)
+_KICKS = tuple(piece_type._kicks for piece_type in _PIECE_TYPES)
@@ -0,0 +1,66 @@
+from collections import OrderedDict
+
+DIGITS = "0123456789"
+
+
+class TextCache:
+    """
+    least recently used cache of rendered strings, so text that is drawn over and over is only rasterized once.
+    Surfaces are shared between callers; anything that changes a cached surface's alpha must set it before every blit
+    """
+    def __init__(self, max_size=128):
+        self._surfaces = OrderedDict()
+        self._max_size = max_size
+
+    def render(self, font, text, colour):
+        """
+        returns the surface font.render(text, True, colour) would, rendering it only if it is not cached
+        :param font: (pg.font.Font)
+        :param text: (str)
+        :param colour: (r, g, b)
+        :return: (pg.Surface)
+        """
+        key = (font, text, colour)
+        surface = self._surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, True, colour)
+            self._surfaces[key] = surface
+            if len(self._surfaces) > self._max_size:
+                self._surfaces.popitem(last=False)
+        else:
+            self._surfaces.move_to_end(key)
+        return surface
+
+
+class DigitAtlas:
+    """
+    pre-rendered digits of one font and colour, used to draw numbers that change too often to be worth caching whole
+    (e.g. the score) by blitting one glyph per digit
+    """
+    def __init__(self, font, colour):
+        self._glyphs = {digit: font.render(digit, True, colour) for digit in DIGITS}
+        # digits are placed one advance apart, like the font lays out a string (the last item of a glyph's metrics)
+        self._widths = {digit: metrics[4] for digit, metrics in zip(DIGITS, font.metrics(DIGITS))}
+
+    def get_width(self, text):
+        """
+        returns the width in pixels of a number drawn with this atlas
+        :param text: (str) string of digits
+        :return: (int)
+        """
+        return sum(self._widths[digit] for digit in text)
+
+    def draw(self, surface, text, pos):
+        """
+        draws a number onto surface with its top left corner at pos
+        :param surface: (pg.Surface)
+        :param text: (str) string of digits
+        :param pos: (tuple) x, y
+        """
+        x, y = pos
+        for digit in text:
+            surface.blit(self._glyphs[digit], (x, y))
+            x += self._widths[digit]
+
+
+TEXT_CACHE = TextCache()
@@ -0,0 +1,100 @@
+import time
+
+
+class FixedStepClock:
+    """
+    clock for a fixed timestep game loop: game logic advances in steps of exactly 1 / rate seconds no matter how fast
+    frames are rendered, and slow frames are caught up with several steps (up to max_steps, anything beyond that is
+    counted as dropped). Also keeps the timings of the last frame.
+
+    usage, once per frame:
+        for _ in range(clock.tick()): <advance logic one step>
+        clock.logic_done()
+        <render>
+        clock.render_done()
+        clock.wait()
+    """
+    def __init__(self, rate, max_steps=5, timer=time.perf_counter):
+        """
+        :param rate: (int) logic steps per second
+        :param max_steps: (int) most logic steps run in one frame when catching up
+        :param timer: function returning the current time in seconds
+        """
+        self.step_time = 1 / rate
+        self.max_steps = max_steps
+        self._timer = timer
+        self._accumulator = 0.0  # time not yet consumed by logic steps
+        self._last_tick = None
+        self._mark = None
+
+        self.frame_time = 0.0  # seconds between the last two ticks
+        self.logic_time = 0.0  # seconds spent between tick and logic_done in the last frame
+        self.render_time = 0.0  # seconds spent between logic_done and render_done in the last frame
+        self.frames = 0
+        self.steps = 0
+        self.dropped_steps = 0
+
+    def tick(self):
+        """
+        starts a new frame
+        :return: (int) number of logic steps to run this frame
+        """
+        now = self._timer()
+        elapsed = self.step_time if self._last_tick is None else now - self._last_tick
+        self._last_tick = now
+        self._mark = now
+        self.frame_time = elapsed
+        self.frames += 1
+
+        self._accumulator += elapsed
+        steps = int(self._accumulator / self.step_time)
+        self._accumulator -= steps * self.step_time
+        if steps > self.max_steps:
+            self.dropped_steps += steps - self.max_steps
+            steps = self.max_steps
+        self.steps += steps
+        return steps
+
+    def logic_done(self):
+        now = self._timer()
+        self.logic_time = now - self._mark
+        self._mark = now
+
+    def render_done(self):
+        now = self._timer()
+        self.render_time = now - self._mark
+        self._mark = now
+
+    def wait(self, poll=None, poll_interval=0.002):
+        """
+        sleeps until the next logic step is due, since there is nothing new to render before then
+        :param poll: function called every poll_interval while waiting (e.g. to take events off the queue as they
+        come in, so they can be timestamped closer to when they happened), None to sleep straight through
+        :param poll_interval: (float) seconds between polls
+        """
+        if self._last_tick is None:
+            return
+        while True:
+            remaining = self.step_time - self._accumulator - (self._timer() - self._last_tick)
+            if remaining <= 0:
+                return
+            if poll is None:
+                time.sleep(remaining)
+                return
+            time.sleep(min(remaining, poll_interval))
+            poll()
+
+    def reset(self):
+        """
+        forgets the time since the last tick (e.g. after the game was paused) so it isn't caught up on
+        """
+        self._last_tick = None
+        self._accumulator = 0.0
+
+    def get_stats(self):
+        """
+        :return: (dict) timings of the last frame in milliseconds and the frame, step and dropped step counts
+        """
+        return {"frame_ms": self.frame_time * 1000, "logic_ms": self.logic_time * 1000,
+                "render_ms": self.render_time * 1000, "frames": self.frames, "steps": self.steps,
+                "dropped_steps": self.dropped_steps}
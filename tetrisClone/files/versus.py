@@ -0,0 +1,441 @@
+import asyncio
+import random
+import struct
+
+from files.bot import DEFAULT_WEIGHTS, choose_placement
+from files.engine import TetrisEngine, GARBAGE_COLOUR, EVENT_ATTACK, EVENT_PLACE, FPS
+from files.playfield import Playfield, WIDTH, HEIGHT, PAD
+from files.replay import write_varint, read_varint
+import files.tetrominoes as tet
+
+# every message is a 2 byte big endian length followed by the payload, which starts with one of these type bytes:
+JOIN = b"J"  # client -> server: room name (utf-8)
+START = b"B"  # server -> client: seed (varint), player index (byte, SPECTATOR for spectators)
+STATE = b"S"  # client -> server: state update (see VersusClient._state_message); relayed with the player index added
+GARBAGE = b"G"  # client -> server -> opponent: garbage lines (byte)
+OVER = b"O"  # client -> server: this player topped out; server -> everyone in the room: index of the loser (byte)
+DRAW = b"D"  # client -> server: this player reached the frame limit, the match is a draw unless it is already over
+
+SPECTATOR = 255
+NOBODY = 254  # loser index of a drawn match
+HEADER = struct.Struct("!H")
+
+# state update flags
+HAS_PIECE = 1
+HAS_ROWS = 2
+HAS_SCORE = 4
+
+# board squares are sent as 4 bit ids, 2 to a byte: 0 empty, 1-7 piece (bag number + 1), 8 garbage
+ROW_BYTES = WIDTH // 2
+COLOUR_IDS = {tet.num_to_piece(n).get_colour(): n + 1 for n in range(7)}
+COLOUR_IDS[None] = 0
+GARBAGE_ID = 8
+COLOUR_IDS[GARBAGE_COLOUR] = GARBAGE_ID
+
+
+def send(writer, payload):
+    """
+    writes one message (only buffers it, the event loop sends it)
+    :param writer: (asyncio.StreamWriter)
+    :param payload: (bytes) type byte followed by the message
+    """
+    writer.write(HEADER.pack(len(payload)) + payload)
+
+
+async def read_message(reader):
+    """
+    :param reader: (asyncio.StreamReader)
+    :return: (bytes) payload of the next message, or None if the connection closed
+    """
+    try:
+        header = await reader.readexactly(HEADER.size)
+        return await reader.readexactly(HEADER.unpack(header)[0])
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+
+
+def encode_row(field, y):
+    """
+    :return: (bytes) the squares of row y packed 2 per byte
+    """
+    ids = [COLOUR_IDS.get(field.get_contents(x, y), GARBAGE_ID) for x in range(WIDTH)]
+    return bytes(ids[i] << 4 | ids[i + 1] for i in range(0, WIDTH, 2))
+
+
+class BoardEncoder:
+    """
+    remembers the rows last sent so only the rows that changed since then are sent again. Rows that changed because
+    lines were cleared or garbage pushed them up are usually identical to another row that was already sent, so
+    those are sent as the index of that row instead of the row itself
+    """
+    def __init__(self):
+        self._rows = [bytes(ROW_BYTES)] * HEIGHT
+
+    def encode(self, field, out):
+        """
+        appends the changed rows of the field to out: a varint bitmask of the changed rows, a varint bitmask of which
+        of those are copies of previously sent rows, then the index (byte) of the previous row each copy is taken from,
+        then ROW_BYTES for each remaining changed row, all from the bottom up
+        :param field: (Playfield)
+        :param out: (bytearray)
+        """
+        old = self._rows
+        previous = {}
+        for y in range(HEIGHT - 1, -1, -1):
+            previous[old[y]] = y
+        mask = copy_mask = 0
+        copies = bytearray()
+        literals = bytearray()
+        new = [encode_row(field, y) for y in range(HEIGHT)]
+        for y, row in enumerate(new):
+            if row != old[y]:
+                mask |= 1 << y
+                source = previous.get(row)
+                if source is None:
+                    literals += row
+                else:
+                    copy_mask |= 1 << y
+                    copies.append(source)
+        self._rows = new
+        write_varint(out, mask)
+        write_varint(out, copy_mask)
+        out += copies
+        out += literals
+
+
+class RemoteBoard:
+    """
+    another player's board, rebuilt from their state updates (for drawing opponents or spectating)
+    """
+    def __init__(self):
+        self.rows = [bytes(ROW_BYTES)] * HEIGHT
+        self.piece = None  # PieceState of the falling piece
+        self.score = 0
+        self.frame = 0
+
+    def apply(self, data, pos):
+        """
+        applies a state update
+        :param data: (bytes) message
+        :param pos: (int) index the update starts at
+        """
+        self.frame, pos = read_varint(data, pos)
+        flags = data[pos]
+        pos += 1
+        if flags & HAS_PIECE:
+            self.piece = tet.PieceState(data[pos] >> 2, data[pos] & 3, data[pos + 1] - PAD, data[pos + 2])
+            pos += 3
+        if flags & HAS_ROWS:
+            mask, pos = read_varint(data, pos)
+            copy_mask, pos = read_varint(data, pos)
+            old = self.rows[:]
+            for y in range(HEIGHT):
+                if copy_mask >> y & 1:
+                    self.rows[y] = old[data[pos]]
+                    pos += 1
+            for y in range(HEIGHT):
+                if mask >> y & 1 and not copy_mask >> y & 1:
+                    self.rows[y] = data[pos:pos + ROW_BYTES]
+                    pos += ROW_BYTES
+        if flags & HAS_SCORE:
+            self.score, pos = read_varint(data, pos)
+
+    def get_contents(self, x, y):
+        """
+        :return: (int) square id at x, y: 0 empty, 1-7 piece (bag number + 1), 8 garbage
+        """
+        byte = self.rows[y][x >> 1]
+        return byte & 15 if x & 1 else byte >> 4
+
+
+class Room:
+    def __init__(self):
+        self.players = []  # writers of the 2 players, index in this list is the player index
+        self.spectators = []
+        self.seed = None
+        self.finished = False
+
+    def everyone(self):
+        return self.players + self.spectators
+
+
+class VersusServer:
+    """
+    asyncio server for versus matches. Clients join a room by name; the first 2 are the players and anyone after
+    that spectates. The server doesn't run any games itself, it only hands out a shared seed and relays state updates
+    and garbage between clients, so one process can hold many matches.
+    """
+    def __init__(self):
+        self._rooms = {}
+
+    async def start(self, host="127.0.0.1", port=0):
+        """
+        :param port: (int) port to listen on, 0 for any free port
+        :return: (asyncio.Server)
+        """
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def handle(self, reader, writer):
+        message = await read_message(reader)
+        if message is None or message[:1] != JOIN:
+            writer.close()
+            return
+        name = message[1:].decode()
+        room = self._rooms.get(name)
+        if room is None or room.finished:
+            room = self._rooms[name] = Room()
+
+        if len(room.players) < 2:
+            index = len(room.players)
+            room.players.append(writer)
+            if len(room.players) == 2:
+                room.seed = random.getrandbits(32)
+                for i, player in enumerate(room.players):
+                    self._send_start(player, room.seed, i)
+                for spectator in room.spectators:
+                    self._send_start(spectator, room.seed, SPECTATOR)
+        else:
+            index = SPECTATOR
+            room.spectators.append(writer)
+            if room.seed is not None:
+                self._send_start(writer, room.seed, SPECTATOR)
+
+        try:
+            while not room.finished:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                if index == SPECTATOR:
+                    continue
+                kind = message[:1]
+                if kind == STATE:
+                    relayed = STATE + bytes((index,)) + message[1:]
+                    for other in room.everyone():
+                        if other is not writer:
+                            send(other, relayed)
+                elif kind == GARBAGE and len(room.players) == 2:
+                    send(room.players[1 - index], message)
+                elif kind == OVER:
+                    self._finish(room, index)
+                elif kind == DRAW:
+                    self._finish(room, NOBODY)
+        finally:
+            if index != SPECTATOR:
+                self._finish(room, index)  # leaving a match counts as losing it, unless it already has a result
+            if room.finished and self._rooms.get(name) is room:
+                del self._rooms[name]
+            writer.close()
+
+    @staticmethod
+    def _send_start(writer, seed, index):
+        message = bytearray(START)
+        write_varint(message, seed)
+        message.append(index)
+        send(writer, bytes(message))
+
+    @staticmethod
+    def _finish(room, loser):
+        """
+        settles the match and tells everyone in the room, only the first result counts
+        :param loser: (int) player index, NOBODY for a draw
+        """
+        if room.finished:
+            return
+        room.finished = True
+        for writer in room.everyone():
+            send(writer, OVER + bytes((loser,)))
+
+
+class BotController:
+    """
+    plays for a versus client: waits a few frames with each new piece (to not be unbeatable), then places it where
+    files.bot thinks is best
+    """
+    def __init__(self, weights=DEFAULT_WEIGHTS, think_frames=10):
+        self._weights = weights
+        self._think_frames = think_frames
+        self._piece = None
+        self._wait = 0
+
+    def __call__(self, engine, boards):
+        if engine.current is not self._piece:
+            self._piece = engine.current
+            self._wait = self._think_frames
+        if self._wait > 0:
+            self._wait -= 1
+            engine.step()
+            return
+        placement = choose_placement(engine.field, type(engine.current), self._weights)
+        if placement is None:
+            engine.step()
+        else:
+            engine.apply_placement(placement)
+
+
+class VersusClient:
+    """
+    one player (or a spectator) in a versus match. A player runs their own TetrisEngine and sends the server compact
+    state updates: the falling piece when it moves, only the board rows that changed when the field changes, and
+    the score when it changes, along with garbage for the opponent. Opponents' boards are kept in self.boards.
+    """
+    def __init__(self, controller=None, room="default", field_type=Playfield, realtime=True, max_frames=None):
+        """
+        :param controller: function taking the TetrisEngine and the opponents' boards (dict of player index ->
+        RemoteBoard) that advances the engine one frame with that frame's inputs, e.g. BotController() or
+        files.versus_window.KeyboardController(). Setting engine.over gives up the match. None to spectate
+        :param room: (str) name of the room to join
+        :param field_type: (type) playfield class for the engine
+        :param realtime: (bool) run at FPS frames per second, otherwise as fast as possible
+        :param max_frames: (int) frames after which the match is settled as a draw (unless the other player already
+        lost), None for no limit
+        """
+        self._controller = controller
+        self._room = room
+        self._field_type = field_type
+        self._realtime = realtime
+        self._max_frames = max_frames
+        self._encoder = BoardEncoder()
+        self._last_piece = None
+        self._last_score = 0
+        self.engine = None
+        self.index = None
+        self.boards = {}  # player index -> RemoteBoard
+        self.loser = None  # index of the player who lost once the match is over
+        self.frames = 0
+        self.bytes_sent = 0
+        self.max_frame_bytes = 0  # most bytes sent in a single frame
+
+    async def run(self, host, port):
+        """
+        joins the room and plays (or watches) until the match is over
+        :return: (str) "WIN", "LOSS" or "DRAW" for players, "OVER" for spectators
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        send(writer, JOIN + self._room.encode())
+        message = await read_message(reader)
+        if message is None or message[:1] != START:
+            writer.close()
+            raise ConnectionError("server did not start the match")
+        seed, pos = read_varint(message, 1)
+        self.index = message[pos]
+
+        try:
+            if self._controller is None:
+                await self._receive(reader)
+                return "OVER"
+            self.engine = TetrisEngine(field_type=self._field_type, seed=seed)
+            receiver = asyncio.create_task(self._receive(reader))
+            try:
+                await self._play(writer, receiver)
+            finally:
+                receiver.cancel()
+        finally:
+            writer.close()
+
+        if self.loser is None or self.loser == NOBODY:  # the connection dropping without a result is a draw too
+            return "DRAW"
+        return "LOSS" if self.loser == self.index else "WIN"
+
+    async def _play(self, writer, receiver):
+        loop = asyncio.get_running_loop()
+        next_frame = loop.time()
+        while self.loser is None:
+            if self._max_frames is not None and self.frames >= self._max_frames:
+                await self._settle(writer, receiver, DRAW)
+                return
+            self._controller(self.engine, self.boards)
+            self.frames += 1
+            sent = self._send_frame(writer)
+            self.bytes_sent += sent
+            self.max_frame_bytes = max(self.max_frame_bytes, sent)
+            if self.engine.over:
+                await self._settle(writer, receiver, OVER)
+                return
+            if sent:
+                await writer.drain()
+            if self._realtime:
+                next_frame += 1 / FPS
+                await asyncio.sleep(max(0.0, next_frame - loop.time()))
+            else:
+                await asyncio.sleep(0)  # let the receiver handle incoming garbage
+
+    async def _settle(self, writer, receiver, message):
+        """
+        tells the server how this player's match ended and waits for the result, so it is the same one everyone else
+        sees (e.g. the opponent may have topped out first)
+        :param message: (bytes) OVER or DRAW
+        """
+        send(writer, message)
+        await writer.drain()
+        while self.loser is None and not receiver.done():
+            await asyncio.sleep(0.01)
+
+    def _send_frame(self, writer):
+        """
+        sends whatever changed in the engine this frame
+        :return: (int) bytes sent
+        """
+        engine = self.engine
+        attack = 0
+        field_changed = False
+        for event in engine.events:
+            if event[0] == EVENT_ATTACK:
+                attack += event[1]
+            elif event[0] == EVENT_PLACE:
+                field_changed = True
+        engine.events.clear()
+
+        sent = 0
+        if attack:
+            message = GARBAGE + bytes((min(attack, 255),))
+            send(writer, message)
+            sent += len(message) + HEADER.size
+        message = self._state_message(field_changed)
+        if message is not None:
+            send(writer, message)
+            sent += len(message) + HEADER.size
+        return sent
+
+    def _state_message(self, field_changed):
+        """
+        :return: (bytes) state update: frame (varint), flags (byte), then if the HAS_PIECE flag is set the piece's bag
+        number * 4 + rotation, corner x + PAD and corner y (a byte each), if HAS_ROWS is set the changed rows (see
+        BoardEncoder.encode), and if HAS_SCORE is set the score (varint). None if nothing changed
+        """
+        engine = self.engine
+        piece = engine.current.get_state()
+        flags = 0
+        if piece != self._last_piece:
+            flags |= HAS_PIECE
+        if field_changed:
+            flags |= HAS_ROWS
+        if engine.score != self._last_score:
+            flags |= HAS_SCORE
+        if not flags:
+            return None
+
+        message = bytearray(STATE)
+        write_varint(message, engine.frame)
+        message.append(flags)
+        if flags & HAS_PIECE:
+            self._last_piece = piece
+            message += bytes((piece.kind << 2 | piece.rotation, piece.x + PAD, piece.y))
+        if flags & HAS_ROWS:
+            self._encoder.encode(engine.field, message)
+        if flags & HAS_SCORE:
+            self._last_score = engine.score
+            write_varint(message, engine.score)
+        return bytes(message)
+
+    async def _receive(self, reader):
+        while self.loser is None:
+            message = await read_message(reader)
+            if message is None:
+                return
+            kind = message[:1]
+            if kind == STATE:
+                self.boards.setdefault(message[1], RemoteBoard()).apply(message, 2)
+            elif kind == GARBAGE and self.engine is not None:
+                self.engine.receive_garbage(message[1])
+            elif kind == OVER:
+                self.loser = message[1]
@@ -0,0 +1,174 @@
+import pygame as pg
+
+from files.engine import GARBAGE_COLOUR, EVENT_MOVE, EVENT_PIECE, EVENT_HOLD, EVENT_PLACE
+from files.game import (ASSETS, FONTS, SurfaceField, SurfaceHold, SurfaceNext, TetrisGame, BG_COLOUR, GRID_COLOUR,
+                        EMPTY_COLOUR, TEXT_COLOUR, PIECE_COLOURS, MARGIN, SQUARE_SIZE, FIELD_SIZE, GRID_WIDTH,
+                        HOLD_SIZE, NEXT_SIZE)
+from files.inputs import InputHandler, DAS, ARR, SOFT_DROP_ARR
+from files.playfield import WIDTH
+from files.sprites import SPRITES
+from files.text import DigitAtlas
+import files.tetrominoes as tet
+
+HEADER_HEIGHT = 60  # space above the fields for the names and scores
+HOLD_COORDS = MARGIN, HEADER_HEIGHT
+FIELD_COORDS = HOLD_COORDS[0] + HOLD_SIZE[0] + MARGIN, HEADER_HEIGHT
+NEXT_COORDS = FIELD_COORDS[0] + FIELD_SIZE[0] + GRID_WIDTH // 2 + MARGIN, HEADER_HEIGHT
+
+# the opponent's board is drawn at half size, only from what their client sends (see files.versus.RemoteBoard)
+OPPONENT_SQUARE = SQUARE_SIZE // 2
+OPPONENT_ROWS = FIELD_SIZE[1] // SQUARE_SIZE
+OPPONENT_SIZE = OPPONENT_SQUARE * WIDTH, OPPONENT_SQUARE * OPPONENT_ROWS
+OPPONENT_COORDS = NEXT_COORDS[0] + NEXT_SIZE[0] + MARGIN, HEADER_HEIGHT
+# square ids of a RemoteBoard: 0 empty, 1-7 piece (bag number + 1), 8 garbage
+REMOTE_COLOURS = (None,) + PIECE_COLOURS + (GARBAGE_COLOUR,)
+
+WINDOW_SIZE = OPPONENT_COORDS[0] + OPPONENT_SIZE[0] + MARGIN, HEADER_HEIGHT + FIELD_SIZE[1] + MARGIN * 2
+
+
+class KeyboardController:
+    """
+    plays for a versus client (see files.versus.VersusClient) from the keyboard, with the same key bindings and auto
+    repeat as TetrisGame. Opens a window showing the player's hold, board and next pieces, and the opponent's board as
+    their client sends it. Closing the window gives up the match.
+    """
+    def __init__(self, ghost=True, das=DAS, arr=ARR, soft_drop_arr=SOFT_DROP_ARR):
+        """
+        :param ghost: (bool) show where the piece would land
+        :param das: (float) ms left or right is held before the piece starts sliding
+        :param arr: (float) ms between moves while sliding, 0 to go straight to the wall
+        :param soft_drop_arr: (float) ms between drops while soft drop is held, 0 to drop straight down
+        """
+        ASSETS.init()
+        self.display = pg.display.set_mode(WINDOW_SIZE)
+        self.display.fill(BG_COLOUR)
+        pg.display.set_caption("Tetris Versus")
+        pg.display.flip()
+        self._ghost = ghost
+        self._input = InputHandler(das, arr, soft_drop_arr=soft_drop_arr)
+        self._digits = DigitAtlas(FONTS.small, TEXT_COLOUR)
+        self._opponent_background = pg.Surface(OPPONENT_SIZE)
+        self._opponent_background.fill(EMPTY_COLOUR)
+        for x in range(0, OPPONENT_SIZE[0] + 1, OPPONENT_SQUARE):
+            pg.draw.line(self._opponent_background, GRID_COLOUR, (x, 0), (x, OPPONENT_SIZE[1]), GRID_WIDTH // 2)
+        for y in range(0, OPPONENT_SIZE[1] + 1, OPPONENT_SQUARE):
+            pg.draw.line(self._opponent_background, GRID_COLOUR, (0, y), (OPPONENT_SIZE[0], y), GRID_WIDTH // 2)
+        self._opponent = self._opponent_background.copy()
+        SPRITES.preload(REMOTE_COLOURS[1:], OPPONENT_SQUARE, 1)
+        self._engine = None
+        self._surface_field = None
+        self._surface_hold = None
+        self._surface_next = None
+        self._dirty_rects = []
+        self._scores = None  # own and opponent score last drawn
+        self._opponent_frame = None  # frame of the opponent's last drawn update
+
+    def __call__(self, engine, boards):
+        """
+        advances the engine one frame with the keys pressed and held since the last frame, then redraws the window
+        :param engine: (TetrisEngine)
+        :param boards: (dict) player index -> RemoteBoard of the opponent
+        """
+        if engine is not self._engine:
+            self._start(engine)
+        now = self._input.now()
+        for event in pg.event.get():
+            if event.type == pg.QUIT:
+                engine.over = True
+                return
+            if event.type == pg.KEYDOWN and event.key in TetrisGame.KEY_BINDINGS:
+                self._input.key_down(TetrisGame.KEY_BINDINGS[event.key], now)
+            elif event.type == pg.KEYUP and event.key in TetrisGame.KEY_BINDINGS:
+                self._input.key_up(TetrisGame.KEY_BINDINGS[event.key], now)
+        engine.step(*self._input.update(now))
+        self._draw(engine, next(iter(boards.values()), None))
+
+    def show_result(self, result):
+        """
+        writes the result over the player's board and waits for a key press or the window to be closed
+        :param result: (str) "WIN", "LOSS" or "DRAW", as from VersusClient.run
+        """
+        message = FONTS.big.render(result, True, TEXT_COLOUR)
+        sub_message = ASSETS.label(FONTS.small, "Press any key", TEXT_COLOUR)
+        centre_x, centre_y = FIELD_COORDS[0] + FIELD_SIZE[0] // 2, FIELD_COORDS[1] + FIELD_SIZE[1] // 2
+        self.display.blit(message, message.get_rect(center=(centre_x, centre_y - 40)))
+        self.display.blit(sub_message, sub_message.get_rect(center=(centre_x, centre_y + 40)))
+        pg.display.flip()
+        while True:
+            event = pg.event.wait()
+            if event.type in (pg.QUIT, pg.KEYDOWN):
+                return
+
+    def _start(self, engine):
+        self._engine = engine
+        self._input.reset()
+        self._surface_field = SurfaceField(engine.field, engine.current)
+        self._surface_hold = SurfaceHold()
+        self._blit(self._surface_hold.surface, HOLD_COORDS)
+        self._surface_next = SurfaceNext(engine.bag)
+        self._blit(self._surface_next.surface, NEXT_COORDS)
+
+    def _blit(self, surface, coords, area=None):
+        self._dirty_rects.append(self.display.blit(surface, coords, area))
+
+    def _draw(self, engine, opponent):
+        # the events are only read here, the versus client clears them once it has sent what changed
+        for event in engine.events:
+            if event[0] == EVENT_MOVE:
+                self._surface_field.calculate_ghost()
+            elif event[0] == EVENT_PLACE:
+                self._surface_field.field_changed()
+            elif event[0] == EVENT_PIECE:
+                self._surface_field.set_cur_piece(engine.current)
+                self._surface_next.update()
+                self._blit(self._surface_next.surface, NEXT_COORDS)
+            elif event[0] == EVENT_HOLD:
+                self._surface_hold.update(engine.held)
+                self._blit(self._surface_hold.surface, HOLD_COORDS)
+        for rect in self._surface_field.update(self._ghost):
+            self._blit(self._surface_field.surface, rect.move(FIELD_COORDS), rect)
+
+        if opponent is not None and opponent.frame != self._opponent_frame:
+            self._opponent_frame = opponent.frame
+            self._draw_opponent(opponent)
+            self._blit(self._opponent, OPPONENT_COORDS)
+        scores = engine.score, 0 if opponent is None else opponent.score
+        if scores != self._scores:
+            self._scores = scores
+            self._draw_header(scores)
+
+        pg.display.update(self._dirty_rects)
+        self._dirty_rects.clear()
+
+    def _draw_opponent(self, board):
+        """
+        redraws the opponent's board and falling piece, only done when they sent an update
+        :param board: (RemoteBoard)
+        """
+        squares = {}
+        for y in range(OPPONENT_ROWS):
+            for x in range(WIDTH):
+                square = board.get_contents(x, y)
+                if square:
+                    squares[x, y] = REMOTE_COLOURS[square]
+        if board.piece is not None:
+            for x, y in tet.get_coordinates(board.piece):
+                squares[x, y] = PIECE_COLOURS[board.piece.kind]
+        self._opponent.blit(self._opponent_background, (0, 0))
+        self._opponent.blits([(SPRITES.block(colour, OPPONENT_SQUARE, 1),
+                               (x * OPPONENT_SQUARE, (OPPONENT_ROWS - 1 - y) * OPPONENT_SQUARE))
+                              for (x, y), colour in squares.items() if 0 <= y < OPPONENT_ROWS], False)
+
+    def _draw_header(self, scores):
+        """
+        redraws the names and scores above both boards
+        :param scores: (tuple) own and opponent score
+        """
+        for name, score, x, width in (("YOU", scores[0], FIELD_COORDS[0], FIELD_SIZE[0]),
+                                      ("THEM", scores[1], OPPONENT_COORDS[0], OPPONENT_SIZE[0])):
+            area = pg.Rect(x, 0, width, HEADER_HEIGHT)
+            self.display.fill(BG_COLOUR, area)
+            self.display.blit(ASSETS.label(FONTS.small, name, TEXT_COLOUR), (x, MARGIN))
+            text = str(score)
+            self._digits.draw(self.display, text, (x + width - self._digits.get_width(text), MARGIN))
+            self._dirty_rects.append(area)
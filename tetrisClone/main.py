@@ -1,4 +1,29 @@
-from files.game import TetrisGame
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # for the shared leaderboard module
+
+from leaderboard import Leaderboard, get_leaderboard_path
+from files.game import TetrisGame, GAME_FOLDER
+
+HIGH_SCORE_PATH = get_leaderboard_path(GAME_FOLDER)
+LEGACY_HIGH_SCORE_PATH = os.path.join(GAME_FOLDER, "high_score.txt")
+
+
+def load_leaderboard():
+    """
+    opens the tetris leaderboard, carrying over the score from the old single high score file if there is one
+    :return: (Leaderboard)
+    """
+    leaderboard = Leaderboard(HIGH_SCORE_PATH)
+    if not leaderboard.get_entries() and os.path.exists(LEGACY_HIGH_SCORE_PATH):
+        try:
+            with open(LEGACY_HIGH_SCORE_PATH, "r") as f:
+                leaderboard.add(int(f.read()))
+        except ValueError:
+            pass
+    return leaderboard
+
 
 if __name__ == "__main__":
-    TetrisGame(music="files/TetrisTheme.ogg")
+    TetrisGame(music="files/TetrisTheme.ogg", leaderboard=load_leaderboard())
@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from files.bot import DEFAULT_WEIGHTS, play_game
+from files.playfield import PLAYFIELD_TYPES
+
+
+def parse_weights(text):
+    """
+    :param text: (str) 4 comma separated numbers: holes, bumpiness, aggregate height, lines cleared
+    :return: (tuple) of 4 floats
+    """
+    weights = tuple(float(n) for n in text.split(","))
+    if len(weights) != 4:
+        raise argparse.ArgumentTypeError("weights need 4 values: holes,bumpiness,height,lines")
+    return weights
+
+
+def load_finished(path):
+    """
+    reads the games already in a results file so an interrupted tournament can carry on where it stopped. A last line
+    cut off by an interruption is removed from the file (that game is played again), so new results appended after it
+    start on a line of their own
+    :param path: (str) JSONL results file
+    :return: (set) of (weights, seed) pairs already played
+    """
+    finished = set()
+    if not os.path.exists(path):
+        return finished
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1  # just past the last complete line
+        if end < len(data):
+            f.truncate(end)
+    for line in data[:end].decode().splitlines():
+        try:
+            result = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        finished.add((tuple(result["weights"]), result["seed"]))
+    return finished
+
+
+def main():
+    parser = argparse.ArgumentParser(description="plays seeded headless games for each set of bot weights in "
+                                                 "parallel and appends one JSON line per game to a results file")
+    parser.add_argument("results", help="JSONL file to append results to, games already in it are skipped")
+    parser.add_argument("-w", "--weights", type=parse_weights, action="append",
+                        help="holes,bumpiness,height,lines weights, can be given several times "
+                             f"(default {','.join(map(str, DEFAULT_WEIGHTS))})")
+    parser.add_argument("-g", "--games", type=int, default=10, help="games per set of weights")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the first game, the rest count up from it")
+    parser.add_argument("-p", "--max-pieces", type=int, default=500, help="pieces before a game is stopped")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--field", default="bitboard", choices=sorted(PLAYFIELD_TYPES), help="playfield type")
+    args = parser.parse_args()
+
+    weight_sets = args.weights or [tuple(DEFAULT_WEIGHTS)]
+    finished = load_finished(args.results)
+    games = [(weights, seed) for weights in weight_sets for seed in range(args.seed, args.seed + args.games)
+             if (weights, seed) not in finished]
+    print(f"{len(games)} games to play ({len(finished)} already in {args.results})")
+
+    start = time.perf_counter()
+    # every game is its own task so all cores stay busy until the end, and results are written as soon as each game
+    # finishes so an interrupted run only loses the games in progress
+    with ProcessPoolExecutor(args.workers) as pool, open(args.results, "a") as results:
+        futures = [pool.submit(play_game, weights, seed, args.max_pieces, args.field) for weights, seed in games]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.write(json.dumps(result) + "\n")
+            results.flush()
+            print(f"[{done}/{len(games)}] weights {result['weights']} seed {result['seed']}: score {result['score']}, "
+                  f"{result['lines']} lines, level {result['level']}, {result['pieces_per_sec']} pieces/s")
+    print(f"finished in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
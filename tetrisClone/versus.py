@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import random
+import time
+
+from files.engine import FPS
+from files.versus import VersusServer, VersusClient, BotController
+
+
+async def serve(host, port):
+    server = await VersusServer().start(host, port)
+    print(f"versus server listening on {', '.join(str(sock.getsockname()) for sock in server.sockets)}")
+    async with server:
+        await server.serve_forever()
+
+
+async def play(host, port, room, spectate):
+    client = VersusClient(None if spectate else BotController(), room)
+    result = await client.run(host, port)
+    print(f"{result} after {client.frames} frames")
+
+
+async def play_keyboard(host, port, room, controller, against_bot):
+    """
+    plays a match from the keyboard, on a server on this machine against a bot if against_bot is set
+    :return: (str) result of the match
+    """
+    server = bot = None
+    if against_bot:
+        server = await VersusServer().start()
+        host, port = server.sockets[0].getsockname()[:2]
+        bot = asyncio.create_task(VersusClient(BotController(think_frames=30), room).run(host, port))
+    try:
+        return await VersusClient(controller, room).run(host, port)
+    finally:
+        if server is not None:
+            bot.cancel()
+            server.close()
+            await server.wait_closed()
+
+
+async def demo(matches, spectators, max_frames, realtime):
+    """
+    runs matches between bots through a server on this machine and reports how much each client sent per frame
+    """
+    server = await VersusServer().start()
+    host, port = server.sockets[0].getsockname()[:2]
+    start = time.perf_counter()
+    # bots with the same seed and speed would play identical games, so each gets a different reaction time
+    players = [VersusClient(BotController(think_frames=random.randint(5, 20)), f"match {n}", realtime=realtime,
+                            max_frames=max_frames) for n in range(matches) for _ in range(2)]
+    tasks = [asyncio.create_task(client.run(host, port)) for client in players]
+    await asyncio.sleep(0.1)  # players have to take the first 2 places in every room
+    watchers = [VersusClient(None, f"match {n}") for n in range(matches) for _ in range(spectators)]
+    tasks += [asyncio.create_task(client.run(host, port)) for client in watchers]
+    results = await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+
+    frames = sum(client.frames for client in players)
+    sent = sum(client.bytes_sent for client in players)
+    print(f"{matches} matches in {elapsed:.1f} s: {results.count('WIN')} won, {results.count('DRAW')} drawn")
+    print(f"{frames} frames played, {sent / max(frames, 1):.2f} bytes sent per frame on average, "
+          f"at most {max(client.max_frame_bytes for client in players)} in one frame")
+    if watchers:
+        print(f"spectators saw final scores of {[board.score for board in watchers[0].boards.values()]} in match 0")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="tetris versus mode over TCP")
+    commands = parser.add_subparsers(dest="command", required=True)
+    server = commands.add_parser("server", help="run a versus server")
+    server.add_argument("--host", default="127.0.0.1")
+    server.add_argument("--port", type=int, default=7777)
+    human = commands.add_parser("play", help="join a room and play with the keyboard")
+    human.add_argument("--host", default="127.0.0.1")
+    human.add_argument("--port", type=int, default=7777)
+    human.add_argument("--room", default="default")
+    human.add_argument("--bot", action="store_true", help="play a bot on a server on this machine instead")
+    client = commands.add_parser("bot", help="join a room as a bot player, or spectate it")
+    client.add_argument("--host", default="127.0.0.1")
+    client.add_argument("--port", type=int, default=7777)
+    client.add_argument("--room", default="default")
+    client.add_argument("--spectate", action="store_true")
+    loopback = commands.add_parser("demo", help="run bot matches through a loopback server")
+    loopback.add_argument("-m", "--matches", type=int, default=10)
+    loopback.add_argument("-s", "--spectators", type=int, default=1, help="spectators per match")
+    loopback.add_argument("--max-frames", type=int, default=FPS * 60 * 3, help="frames before a match is a draw")
+    loopback.add_argument("--fast", action="store_true", help="play as fast as possible instead of in real time")
+    args = parser.parse_args()
+
+    if args.command == "server":
+        asyncio.run(serve(args.host, args.port))
+    elif args.command == "play":
+        from files.versus_window import KeyboardController  # only the keyboard client needs pygame
+        controller = KeyboardController()
+        controller.show_result(asyncio.run(play_keyboard(args.host, args.port, args.room, controller, args.bot)))
+    elif args.command == "bot":
+        asyncio.run(play(args.host, args.port, args.room, args.spectate))
+    else:
+        asyncio.run(demo(args.matches, args.spectators, args.max_frames, not args.fast))
+
+
+if __name__ == "__main__":
+    main()